@@ -1,5 +1,7 @@
 import api from './api';
 
+const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
+
 export interface DashboardOverview {
   user_stats: {
     total: number;
@@ -22,7 +24,7 @@ export interface DashboardOverview {
   system_health: {
     status: string;
     uptime: string;
-    last_backup: string;
+    last_backup: string | null;
   };
 }
 
@@ -81,12 +83,12 @@ export interface SystemHealth {
   api_status: string;
   storage_status: string;
   uptime: string;
-  memory_usage: number;
-  cpu_usage: number;
-  disk_usage: number;
+  memory_usage: number | null;
+  cpu_usage: number | null;
+  disk_usage: number | null;
   active_sessions: number;
   recent_errors: number;
-  last_backup: string;
+  last_backup: string | null;
 }
 
 export interface ChartData {
@@ -121,6 +123,12 @@ export interface RecentUser {
   };
 }
 
+export interface DashboardStreamEvent {
+  event: 'snapshot' | 'counters' | 'activity';
+  ts?: string;
+  data: any;
+}
+
 class DashboardService {
   // Get dashboard overview
   async getOverview(): Promise<DashboardOverview> {
@@ -211,6 +219,52 @@ class DashboardService {
       throw new Error(error.response?.data?.message || 'Failed to fetch recent users');
     }
   }
+
+  // Subscribe to live counter deltas and activity; returns an unsubscribe function
+  subscribeToStream(onEvent: (event: DashboardStreamEvent) => void): () => void {
+    let source: EventSource | null = null;
+    let retry: ReturnType<typeof setTimeout> | null = null;
+    let closed = false;
+
+    const open = async () => {
+      // EventSource cannot send headers: exchange the access token for a
+      // short-lived single-use ticket and put that in the query string
+      let ticket: string;
+      try {
+        const response = await api.post('/api/v1/dashboard/stream/ticket');
+        ticket = response.data.ticket;
+      } catch {
+        if (!closed) retry = setTimeout(open, 5000);
+        return;
+      }
+      if (closed) return;
+
+      source = new EventSource(
+        `${API_BASE_URL}/api/v1/dashboard/stream?ticket=${encodeURIComponent(ticket)}`
+      );
+      source.addEventListener('snapshot', (e) => {
+        onEvent({ event: 'snapshot', data: JSON.parse((e as MessageEvent).data) });
+      });
+      (['counters', 'activity'] as const).forEach((name) => {
+        source!.addEventListener(name, (e) => {
+          const message = JSON.parse((e as MessageEvent).data);
+          onEvent({ event: name, ts: message.ts, data: message.data });
+        });
+      });
+      // The browser would reconnect with the same (already used) ticket
+      source.onerror = () => {
+        source?.close();
+        if (!closed) retry = setTimeout(open, 3000);
+      };
+    };
+    open();
+
+    return () => {
+      closed = true;
+      if (retry) clearTimeout(retry);
+      source?.close();
+    };
+  }
 }
 
 export default new DashboardService();
\ No newline at end of file
@@ -0,0 +1,198 @@
+"""
+Audit Log API endpoints for Admin Panel
+Browse and export audit log entries with filtering
+"""
+
+import base64
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, Query as OrmQuery, joinedload
+from sqlalchemy import and_, or_, func
+
+from database import get_db, SessionLocal
+from models.audit_models import AuditLog
+from models.user_models import User
+from auth.dependencies import log_user_activity, require_permission
+from schemas.audit_schemas import AuditLogResponse, AuditLogListResponse
+
+router = APIRouter(prefix="/audit", tags=["Audit Logs"])
+
+EXPORT_COLUMNS = [
+    "id", "created_at", "user_id", "username", "action", "resource", "resource_id",
+    "description", "user_ip", "user_agent", "method", "endpoint", "response_status",
+    "duration_ms", "level", "success", "old_values", "new_values"
+]
+
+# Rows fetched per round trip while streaming an export
+EXPORT_BATCH_SIZE = 500
+
+class AuditLogFilters:
+    """Shared query parameters for listing and exporting"""
+    
+    def __init__(
+        self,
+        user_id: Optional[int] = Query(None, description="Filter by user ID"),
+        resource: Optional[str] = Query(None, description="Filter by resource (users, products, ...)"),
+        resource_id: Optional[str] = Query(None, description="Filter by resource ID"),
+        action: Optional[str] = Query(None, description="Filter by action (create, update, ...)"),
+        date_from: Optional[datetime] = Query(None, description="Created at or after"),
+        date_to: Optional[datetime] = Query(None, description="Created before")
+    ):
+        self.user_id = user_id
+        self.resource = resource
+        self.resource_id = resource_id
+        self.action = action
+        self.date_from = date_from
+        self.date_to = date_to
+    
+    def apply(self, query: OrmQuery) -> OrmQuery:
+        if self.user_id is not None:
+            query = query.filter(AuditLog.user_id == self.user_id)
+        if self.resource:
+            query = query.filter(AuditLog.resource == self.resource)
+        if self.resource_id:
+            query = query.filter(AuditLog.resource_id == self.resource_id)
+        if self.action:
+            query = query.filter(AuditLog.action == self.action)
+        if self.date_from:
+            query = query.filter(AuditLog.created_at >= self.date_from)
+        if self.date_to:
+            query = query.filter(AuditLog.created_at < self.date_to)
+        return query
+    
+    def to_dict(self) -> dict:
+        return {k: (v.isoformat() if isinstance(v, datetime) else v)
+                for k, v in vars(self).items() if v is not None}
+
+def _encode_cursor(log: AuditLog) -> str:
+    raw = f"{log.created_at.isoformat()}|{log.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        created_at, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(log_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def _to_response(log: AuditLog) -> AuditLogResponse:
+    response = AuditLogResponse.model_validate(log)
+    if not response.username and log.user:
+        response.username = log.user.username
+    return response
+
+# ============================================================================
+# AUDIT LOG ENDPOINTS
+# ============================================================================
+
+@router.get("/logs", response_model=AuditLogListResponse)
+async def get_audit_logs(
+    filters: AuditLogFilters = Depends(),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200, description="Items per page"),
+    current_user: User = Depends(require_permission("audit.read")),
+    db: Session = Depends(get_db)
+):
+    """
+    Get audit log entries, newest first
+    
+    Uses keyset pagination on (created_at, id): each page is an index range
+    scan no matter how deep the client has paged.
+    """
+    query = filters.apply(db.query(AuditLog).options(joinedload(AuditLog.user)))
+    
+    if cursor:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        # Compare against the cursor row's stored value: SQLite keeps
+        # CURRENT_TIMESTAMP rows without fractional seconds, so a re-bound
+        # datetime would not compare equal to it. The encoded timestamp is
+        # only used if that row has since been purged.
+        anchor = func.coalesce(
+            db.query(AuditLog.created_at).filter(AuditLog.id == cursor_id).scalar_subquery(),
+            cursor_created_at
+        )
+        query = query.filter(or_(
+            AuditLog.created_at < anchor,
+            and_(AuditLog.created_at == anchor, AuditLog.id < cursor_id)
+        ))
+    
+    # Fetch one extra row to know whether another page exists
+    logs = query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit + 1).all()
+    has_more = len(logs) > limit
+    logs = logs[:limit]
+    
+    return AuditLogListResponse(
+        items=[_to_response(log) for log in logs],
+        limit=limit,
+        next_cursor=_encode_cursor(logs[-1]) if has_more else None
+    )
+
+@router.get("/logs/export")
+async def export_audit_logs(
+    request: Request,
+    filters: AuditLogFilters = Depends(),
+    format: str = Query("ndjson", regex="^(ndjson|csv)$", description="Export format"),
+    current_user: User = Depends(require_permission("audit.read")),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream matching audit log entries as NDJSON or CSV
+    
+    Rows are fetched EXPORT_BATCH_SIZE at a time with yield_per and written
+    out as they arrive, so the full result set is never held in memory.
+    """
+    client_ip = request.client.host if request.client else "unknown"
+    log_user_activity(
+        db, current_user, "export", "audit_logs",
+        description=f"Exported audit logs as {format}",
+        user_ip=client_ip,
+        new_values=filters.to_dict()
+    )
+    
+    def generate() -> Iterator[str]:
+        # The request session is closed once the handler returns, so the
+        # stream uses its own
+        export_db = SessionLocal()
+        try:
+            query = filters.apply(
+                export_db.query(AuditLog).options(joinedload(AuditLog.user))
+            ).order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+            
+            if format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(EXPORT_COLUMNS)
+            
+            for log in query.yield_per(EXPORT_BATCH_SIZE):
+                row = _to_response(log).model_dump(mode="json")
+                if format == "csv":
+                    writer.writerow([
+                        json.dumps(row[col], ensure_ascii=False) if isinstance(row[col], (dict, list)) else row[col]
+                        for col in EXPORT_COLUMNS
+                    ])
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                else:
+                    yield json.dumps(row, ensure_ascii=False) + "\n"
+            
+            if format == "csv" and buffer.getvalue():
+                yield buffer.getvalue()
+        finally:
+            export_db.close()
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"audit_logs_{datetime.now():%Y%m%d_%H%M%S}.{'csv' if format == 'csv' else 'ndjson'}"
+    return StreamingResponse(
+        generate(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -13,8 +13,10 @@ from database import get_db
 from models.user_models import User, Role, UserStatus
 from models.audit_models import AuditLog
 from auth.jwt_handler import JWTHandler, TokenData, ACCESS_TOKEN_EXPIRE_MINUTES
+from auth.token_store import token_store, TokenReuseError
 from auth.dependencies import (
     AuthDependencies, 
+    security,
     log_user_activity, 
     log_login_attempt,
     require_user_approve,
@@ -133,40 +135,41 @@ async def login(
         permissions=permissions
     )
     
-    # Create tokens
+    # Create tokens (refresh token starts a new rotation family)
+    refresh_token, family_id = token_store.issue(db, user, token_data.to_dict())
     access_token_expires = timedelta(
         minutes=ACCESS_TOKEN_EXPIRE_MINUTES * (7 if login_data.remember_me else 1)
     )
     access_token = JWTHandler.create_access_token(
-        data=token_data.to_dict(),
+        data={**token_data.to_dict(), "fid": family_id},
         expires_delta=access_token_expires
     )
-    refresh_token = JWTHandler.create_refresh_token(data=token_data.to_dict())
     
-    # Update user login info
+    # Update user login info, login attempt and audit entry in one transaction
     user.last_login = datetime.now(timezone.utc)
     user.failed_login_attempts = 0
     user.locked_until = None
-    db.commit()
     
-    # Log successful login
     log_login_attempt(
         db,
         username=login_data.username,
         ip_address=client_ip,
         user_agent=user_agent,
         success=True,
-        user_id=user.id
+        user_id=user.id,
+        commit=False
     )
     
-    # Log user activity
     log_user_activity(
         db, user, "login", "auth",
         description=f"User logged in from {client_ip}",
         user_ip=client_ip,
-        user_agent=user_agent
+        user_agent=user_agent,
+        commit=False
     )
     
+    db.commit()
+    
     # Prepare user info
     user_info = UserInfo(
         id=user.id,
@@ -204,10 +207,13 @@ async def refresh_token(
 ):
     """
     Refresh access token using refresh token
+    
+    The refresh token is rotated: the presented token is marked as used and a
+    new one is returned. Presenting a used token again revokes the whole family.
     """
     # Verify refresh token
     payload = JWTHandler.verify_token(refresh_data.refresh_token)
-    if not payload or payload.get("type") != "refresh":
+    if not payload or payload.get("type") != "refresh" or token_store.is_revoked(payload):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid refresh token"
@@ -237,10 +243,31 @@ async def refresh_token(
         permissions=permissions
     )
     
-    access_token = JWTHandler.create_access_token(data=token_data.to_dict())
+    # Rotate refresh token (tokens without a jti predate rotation and are not tracked)
+    new_refresh_token = None
+    if payload.get("jti"):
+        try:
+            new_refresh_token = token_store.rotate(db, payload, user, token_data.to_dict())
+        except TokenReuseError:
+            db.commit()
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Refresh token has already been used"
+            )
+        except LookupError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid refresh token"
+            )
+        db.commit()
+    
+    access_token = JWTHandler.create_access_token(
+        data={**token_data.to_dict(), "fid": payload.get("fid")}
+    )
     
     return RefreshTokenResponse(
         access_token=access_token,
+        refresh_token=new_refresh_token,
         token_type="bearer",
         expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60
     )
@@ -248,20 +275,30 @@ async def refresh_token(
 @router.post("/logout", response_model=LogoutResponse)
 async def logout(
     request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user: User = Depends(AuthDependencies.get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
     User logout endpoint
+    
+    Revokes the refresh token family of the current session, which also
+    invalidates access tokens issued from it.
     """
     client_ip = request.client.host if request.client else "unknown"
     
-    # Log user activity
+    payload = JWTHandler.verify_token(credentials.credentials) or {}
+    if payload.get("fid"):
+        token_store.revoke_family(db, payload["fid"], reason="logout")
+    
+    # Log user activity (committed together with the revocation)
     log_user_activity(
         db, current_user, "logout", "auth",
         description=f"User logged out from {client_ip}",
-        user_ip=client_ip
+        user_ip=client_ip,
+        commit=False
     )
+    db.commit()
     
     return LogoutResponse(message="Successfully logged out")
 
@@ -3,25 +3,48 @@ Dashboard API endpoints for Admin Panel
 Provides statistics, analytics, and overview data for the admin dashboard
 """
 
-from datetime import datetime, timezone, timedelta
+import asyncio
+import json
+import logging
+import threading
+import time
+from datetime import date, datetime, timezone, timedelta
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func, and_, or_
 
-from database import get_db
+from database import get_db, SessionLocal
+from services import login_rollup, stats_service, stat_counters, daily_rollups, price_analytics
+from services.response_cache import ResponseCache
+from services.event_bus import event_bus
+from services.health import health_monitor
+from config import settings
 from models.user_models import User, Role, UserStatus
 from models.product_models import Product, Category, ProductStatus
 from models.settings_models import WebsiteSetting
-from models.audit_models import AuditLog, SystemLog, LoginAttempt
-from auth.dependencies import require_permission
+from models.audit_models import AuditLog, SystemLog, LogLevel
+from auth.dependencies import AuthDependencies, require_permission
+from auth.jwt_handler import JWTHandler, STREAM_TICKET_EXPIRE_SECONDS
+from auth.token_store import token_store
 from schemas.dashboard_schemas import (
     DashboardOverviewResponse, UserStatsResponse, ProductStatsResponse,
     RecentActivityResponse, SystemStatsResponse, ChartDataResponse,
-    TopCategoriesResponse, RecentUsersResponse, SystemHealthResponse
+    TopCategoriesResponse, RecentUsersResponse, SystemHealthResponse,
+    PriceAnalyticsResponse, StreamTicketResponse
 )
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+logger = logging.getLogger(__name__)
+
+# Shared by every admin's dashboard: aggregates are recomputed at most once per TTL
+dashboard_cache = ResponseCache(
+    ttl=settings.DASHBOARD_CACHE_TTL_SECONDS,
+    stale_ttl=settings.DASHBOARD_CACHE_STALE_SECONDS,
+    max_entries=settings.DASHBOARD_CACHE_MAX_ENTRIES
+)
 
 # ============================================================================
 # DASHBOARD OVERVIEW
@@ -29,65 +52,52 @@ router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 @router.get("/overview", response_model=DashboardOverviewResponse)
 async def get_dashboard_overview(
-    current_user: User = Depends(require_permission("dashboard.read")),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_permission("dashboard.read"))
 ):
     """
     Get dashboard overview with key statistics
     """
-    # User statistics
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.status == UserStatus.ACTIVE.value).count()
-    pending_users = db.query(User).filter(User.status == UserStatus.PENDING.value).count()
-    
-    # Product statistics
-    total_products = db.query(Product).count()
-    active_products = db.query(Product).filter(Product.status == ProductStatus.ACTIVE.value).count()
-    out_of_stock = db.query(Product).filter(Product.status == ProductStatus.OUT_OF_STOCK.value).count()
-    
-    # Category statistics
-    total_categories = db.query(Category).count()
-    active_categories = db.query(Category).filter(Category.is_active == True).count()
+    return await dashboard_cache.get_or_compute(("overview",), _compute_overview)
+
+def _compute_overview(db: Session) -> DashboardOverviewResponse:
+    # User, product and category statistics from the maintained counters
+    counters = stat_counters.read_counters(db, [
+        "users.total", "users.status.active", "users.status.pending",
+        "products.total", "products.status.active", "products.status.out_of_stock",
+        "categories.total"
+    ])
     
     # Recent activity count (last 24 hours)
     yesterday = datetime.now(timezone.utc) - timedelta(days=1)
     recent_activities = db.query(AuditLog).filter(AuditLog.created_at >= yesterday).count()
     
-    # Recent logins (last 24 hours)
-    recent_logins = db.query(LoginAttempt).filter(
-        and_(
-            LoginAttempt.attempted_at >= yesterday,
-            LoginAttempt.success == "success"
-        )
-    ).count()
+    # Recent logins (last 24 hours, whole hours from the rollup)
+    recent_logins = login_rollup.count_attempts(db, "success", yesterday)
     
     # System health indicators
-    failed_logins_today = db.query(LoginAttempt).filter(
-        and_(
-            LoginAttempt.attempted_at >= datetime.now(timezone.utc).replace(hour=0, minute=0, second=0),
-            LoginAttempt.success == "failure"
-        )
-    ).count()
+    failed_logins_today = login_rollup.count_attempts(
+        db, "failure", datetime.now(timezone.utc).replace(hour=0, minute=0, second=0)
+    )
     
     system_errors_today = db.query(SystemLog).filter(
         and_(
             SystemLog.created_at >= datetime.now(timezone.utc).replace(hour=0, minute=0, second=0),
-            SystemLog.level == "ERROR"
+            SystemLog.level.in_((LogLevel.ERROR.value, LogLevel.CRITICAL.value))
         )
     ).count()
     
     return DashboardOverviewResponse(
         user_stats={
-            "total": total_users,
-            "active": active_users,
-            "pending": pending_users,
+            "total": counters["users.total"],
+            "active": counters["users.status.active"],
+            "pending": counters["users.status.pending"],
             "growth_rate": 0  # Calculate growth rate if needed
         },
         product_stats={
-            "total": total_products,
-            "active": active_products,
-            "out_of_stock": out_of_stock,
-            "categories": total_categories
+            "total": counters["products.total"],
+            "active": counters["products.status.active"],
+            "out_of_stock": counters["products.status.out_of_stock"],
+            "categories": counters["categories.total"]
         },
         activity_stats={
             "recent_activities": recent_activities,
@@ -96,9 +106,11 @@ async def get_dashboard_overview(
             "system_errors": system_errors_today
         },
         system_health={
-            "status": "healthy" if system_errors_today == 0 else "warning",
-            "uptime": "99.9%",  # Mock data - implement real uptime tracking
-            "last_backup": datetime.now(timezone.utc) - timedelta(hours=6)  # Mock data
+            "status": health_monitor.snapshot.get(
+                "status", "healthy" if system_errors_today == 0 else "warning"
+            ),
+            "uptime": f"{health_monitor.availability_percent}%",
+            "last_backup": None  # No backup job exists yet
         }
     )
 
@@ -109,51 +121,35 @@ async def get_dashboard_overview(
 @router.get("/users/stats", response_model=UserStatsResponse)
 async def get_user_statistics(
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
-    current_user: User = Depends(require_permission("dashboard.read")),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_permission("dashboard.read"))
 ):
     """
     Get detailed user statistics and trends
     """
+    return await dashboard_cache.get_or_compute(("users/stats", days), _compute_user_statistics, days)
+
+def _compute_user_statistics(db: Session, days: int) -> UserStatsResponse:
     start_date = datetime.now(timezone.utc) - timedelta(days=days)
     
-    # User counts by status
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.status == UserStatus.ACTIVE.value).count()
-    pending_users = db.query(User).filter(User.status == UserStatus.PENDING.value).count()
-    suspended_users = db.query(User).filter(User.status == UserStatus.SUSPENDED.value).count()
-    banned_users = db.query(User).filter(User.status == UserStatus.BANNED.value).count()
-    
-    # New registrations in period
-    new_registrations = db.query(User).filter(User.created_at >= start_date).count()
+    # User counts by status and new registrations in period
+    users = stats_service.user_counts(db, since=start_date)
     
-    # Users by role
-    role_distribution = db.query(
-        Role.display_name,
-        func.count(User.id).label('count')
-    ).join(User).group_by(Role.id, Role.display_name).all()
-    
-    # Daily registration trend
-    daily_registrations = db.query(
-        func.date(User.created_at).label('date'),
-        func.count(User.id).label('count')
-    ).filter(User.created_at >= start_date).group_by(func.date(User.created_at)).all()
+    # Daily registration trend (gap-filled from the daily rollup)
+    daily_registrations = zip(*daily_rollups.series(
+        db, "users.registered", start_date.date(), datetime.now(timezone.utc).date()
+    ))
     
     # Login activity
-    login_activity = db.query(
-        func.date(LoginAttempt.attempted_at).label('date'),
-        func.count(LoginAttempt.id).label('total_attempts'),
-        func.sum(func.case([(LoginAttempt.success == "success", 1)], else_=0)).label('successful_logins')
-    ).filter(LoginAttempt.attempted_at >= start_date).group_by(func.date(LoginAttempt.attempted_at)).all()
+    login_activity = login_rollup.daily_activity(db, start_date)
     
     return UserStatsResponse(
-        total_users=total_users,
-        active_users=active_users,
-        pending_users=pending_users,
-        suspended_users=suspended_users,
-        banned_users=banned_users,
-        new_registrations=new_registrations,
-        role_distribution={role: count for role, count in role_distribution},
+        total_users=users["total"],
+        active_users=users["active"],
+        pending_users=users["pending"],
+        suspended_users=users["suspended"],
+        banned_users=users["banned"],
+        new_registrations=users["new"],
+        role_distribution=stats_service.role_distribution(db),
         daily_registrations=[
             {"date": str(date), "count": count} for date, count in daily_registrations
         ],
@@ -174,67 +170,85 @@ async def get_user_statistics(
 @router.get("/products/stats", response_model=ProductStatsResponse)
 async def get_product_statistics(
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
-    current_user: User = Depends(require_permission("dashboard.read")),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_permission("dashboard.read"))
 ):
     """
     Get detailed product statistics and trends
     """
+    return await dashboard_cache.get_or_compute(("products/stats", days), _compute_product_statistics, days)
+
+def _compute_product_statistics(db: Session, days: int) -> ProductStatsResponse:
     start_date = datetime.now(timezone.utc) - timedelta(days=days)
     
-    # Product counts by status
-    total_products = db.query(Product).count()
-    active_products = db.query(Product).filter(Product.status == ProductStatus.ACTIVE.value).count()
-    draft_products = db.query(Product).filter(Product.status == ProductStatus.DRAFT.value).count()
-    inactive_products = db.query(Product).filter(Product.status == ProductStatus.INACTIVE.value).count()
-    out_of_stock = db.query(Product).filter(Product.status == ProductStatus.OUT_OF_STOCK.value).count()
-    
-    # Featured products
-    featured_products = db.query(Product).filter(Product.is_featured == True).count()
-    
-    # Low stock products (stock <= 5)
-    low_stock_products = db.query(Product).filter(Product.stock_quantity <= 5).count()
+    # Product counts by status/flag and new products in period
+    products = stats_service.product_counts(db, since=start_date)
     
-    # New products in period
-    new_products = db.query(Product).filter(Product.created_at >= start_date).count()
-    
-    # Products by category
-    category_distribution = db.query(
-        Category.name,
-        func.count(Product.id).label('count')
-    ).join(Product).group_by(Category.id, Category.name).all()
-    
-    # Daily product creation trend
-    daily_products = db.query(
-        func.date(Product.created_at).label('date'),
-        func.count(Product.id).label('count')
-    ).filter(Product.created_at >= start_date).group_by(func.date(Product.created_at)).all()
-    
-    # Price range analysis
-    price_ranges = db.query(
-        func.case([
-            (Product.price < 500000, "Under 500K"),
-            (Product.price < 1000000, "500K - 1M"),
-            (Product.price < 2000000, "1M - 2M"),
-            (Product.price >= 2000000, "Over 2M")
-        ]).label('price_range'),
-        func.count(Product.id).label('count')
-    ).filter(Product.price.isnot(None)).group_by('price_range').all()
+    # Daily product creation trend (gap-filled from the daily rollup)
+    daily_products = zip(*daily_rollups.series(
+        db, "products.created", start_date.date(), datetime.now(timezone.utc).date()
+    ))
     
     return ProductStatsResponse(
-        total_products=total_products,
-        active_products=active_products,
-        draft_products=draft_products,
-        inactive_products=inactive_products,
-        out_of_stock_products=out_of_stock,
-        featured_products=featured_products,
-        low_stock_products=low_stock_products,
-        new_products=new_products,
-        category_distribution={category: count for category, count in category_distribution},
+        total_products=products["total"],
+        active_products=products["active"],
+        draft_products=products["draft"],
+        inactive_products=products["inactive"],
+        out_of_stock_products=products["out_of_stock"],
+        featured_products=products["featured"],
+        low_stock_products=products["low_stock"],
+        new_products=products["new"],
+        category_distribution=stats_service.category_distribution(db),
         daily_products=[
             {"date": str(date), "count": count} for date, count in daily_products
         ],
-        price_distribution={price_range: count for price_range, count in price_ranges}
+        # Price range analysis on the effective price (sale price if set)
+        price_distribution=stats_service.price_range_counts(db)
+    )
+
+def _parse_floats(value: Optional[str], name: str) -> Optional[List[float]]:
+    if not value:
+        return None
+    try:
+        return [float(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be a comma-separated list of numbers")
+
+@router.get("/products/price-analytics", response_model=PriceAnalyticsResponse)
+def get_price_analytics(
+    price_field: str = Query("effective", pattern="^(effective|original|cost)$", description="Price to analyze"),
+    buckets: int = Query(10, ge=1, le=price_analytics.MAX_BUCKETS, description="Number of histogram buckets"),
+    edges: Optional[str] = Query(None, description="Explicit bucket edges, e.g. 0,500000,1000000,2000000"),
+    scale: str = Query("linear", pattern="^(linear|log)$", description="Spacing of generated buckets"),
+    quantiles: Optional[str] = Query(None, description="Quantiles to report, e.g. 0.1,0.5,0.9"),
+    status: Optional[ProductStatus] = Query(None, description="Only products with this status"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_permission("dashboard.read"))
+):
+    """
+    Price histogram, quantiles, inventory valuation and margin by category
+    
+    Served from a columnar catalog snapshot that is rebuilt only when the
+    catalog changes.
+    """
+    bucket_edges = _parse_floats(edges, "edges")
+    if bucket_edges is not None:
+        if len(bucket_edges) < 2 or len(bucket_edges) > price_analytics.MAX_BUCKETS + 1:
+            raise HTTPException(status_code=400, detail="edges must have between 2 and 101 values")
+        if any(b <= a for a, b in zip(bucket_edges, bucket_edges[1:])):
+            raise HTTPException(status_code=400, detail="edges must be strictly increasing")
+    
+    probabilities = _parse_floats(quantiles, "quantiles") or list(price_analytics.DEFAULT_QUANTILES)
+    if any(not 0 <= p <= 1 for p in probabilities):
+        raise HTTPException(status_code=400, detail="quantiles must be between 0 and 1")
+    
+    return price_analytics.analyze(
+        db,
+        price_field=price_field,
+        buckets=buckets,
+        edges=bucket_edges,
+        scale=scale,
+        probabilities=probabilities,
+        status=status.value if status else None
     )
 
 # ============================================================================
@@ -251,7 +265,9 @@ async def get_recent_activity(
     Get recent system activities
     """
     try:
-        activities = db.query(AuditLog).order_by(AuditLog.created_at.desc()).limit(limit).all()
+        activities = db.query(AuditLog).options(
+            joinedload(AuditLog.user)
+        ).order_by(AuditLog.created_at.desc()).limit(limit).all()
         
         activity_responses = []
         for activity in activities:
@@ -277,7 +293,7 @@ async def get_recent_activity(
         
         return activity_responses
     except Exception as e:
-        print(f"Error in get_recent_activity: {e}")
+        logger.exception("Error in get_recent_activity: %s", e)
         # Return empty list if there's an error
         return []
 
@@ -287,95 +303,71 @@ async def get_recent_activity(
 
 @router.get("/system/health", response_model=SystemHealthResponse)
 async def get_system_health(
-    current_user: User = Depends(require_permission("dashboard.read")),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_permission("dashboard.read"))
 ):
     """
     Get system health indicators
-    """
-    # Database connection test
-    try:
-        db.execute("SELECT 1")
-        database_status = "healthy"
-    except Exception:
-        database_status = "error"
     
-    # Recent errors (last 24 hours)
-    yesterday = datetime.now(timezone.utc) - timedelta(days=1)
-    recent_errors = db.query(SystemLog).filter(
-        and_(
-            SystemLog.created_at >= yesterday,
-            SystemLog.level == "ERROR"
-        )
-    ).count()
-    
-    # Failed login attempts (last hour)
-    last_hour = datetime.now(timezone.utc) - timedelta(hours=1)
-    failed_logins = db.query(LoginAttempt).filter(
-        and_(
-            LoginAttempt.attempted_at >= last_hour,
-            LoginAttempt.success == "failure"
-        )
-    ).count()
-    
-    # Determine overall status
-    if database_status == "error" or recent_errors > 10:
-        overall_status = "critical"
-    elif recent_errors > 5 or failed_logins > 20:
-        overall_status = "warning"
-    else:
-        overall_status = "healthy"
+    Served from the background health probes (services.health); only the
+    very first call after startup may wait for a probe.
+    """
+    snapshot = health_monitor.snapshot or await asyncio.to_thread(health_monitor.probe)
+    database = snapshot["database"]
     
     return SystemHealthResponse(
-        overall_status=overall_status,
-        database_status=database_status,
-        api_status="healthy",  # Mock - implement real API health check
-        storage_status="healthy",  # Mock - implement real storage check
-        recent_errors=recent_errors,
-        failed_logins=failed_logins,
-        uptime_percentage=99.9,  # Mock - implement real uptime tracking
-        last_backup=datetime.now(timezone.utc) - timedelta(hours=6),  # Mock
-        memory_usage=65.5,  # Mock - implement real memory monitoring
-        cpu_usage=23.8,  # Mock - implement real CPU monitoring
-        disk_usage=45.2  # Mock - implement real disk monitoring
+        overall_status=snapshot["status"],
+        database_status="error" if database["status"] == "critical" else database["status"],
+        api_status=snapshot["event_loop"]["status"],
+        storage_status=snapshot["storage"]["status"],
+        recent_errors=snapshot["activity"]["recent_errors"],
+        failed_logins=snapshot["activity"]["failed_logins"],
+        uptime_percentage=health_monitor.availability_percent,
+        last_backup=None,  # No backup job exists yet
+        memory_usage=snapshot["memory_usage"],
+        cpu_usage=snapshot["cpu_usage"],
+        disk_usage=snapshot["storage"].get("used_percent"),
+        database_latency_ms=database["latency_ms"],
+        event_loop_lag_ms=snapshot["event_loop"]["lag_ms"],
+        checked_at=snapshot["checked_at"],
+        details=snapshot
     )
 
 # ============================================================================
 # CHARTS AND ANALYTICS
 # ============================================================================
 
+# Longest start_date..end_date span per granularity (keeps buckets and cache keys bounded)
+MAX_CHART_RANGE_DAYS = {"day": 366, "week": 366 * 3, "month": 366 * 10}
+
 @router.get("/charts/user-growth", response_model=ChartDataResponse)
 async def get_user_growth_chart(
     days: int = Query(30, ge=7, le=365, description="Number of days to analyze"),
-    current_user: User = Depends(require_permission("dashboard.read")),
-    db: Session = Depends(get_db)
+    start_date: Optional[date] = Query(None, description="Range start (overrides days)"),
+    end_date: Optional[date] = Query(None, description="Range end, inclusive (default today)"),
+    granularity: str = Query("day", regex="^(day|week|month)$", description="Bucket size"),
+    current_user: User = Depends(require_permission("dashboard.read"))
 ):
     """
     Get user growth chart data
     """
-    start_date = datetime.now(timezone.utc) - timedelta(days=days)
-    
-    # Daily user registrations
-    daily_data = db.query(
-        func.date(User.created_at).label('date'),
-        func.count(User.id).label('count')
-    ).filter(User.created_at >= start_date).group_by(func.date(User.created_at)).all()
-    
-    # Fill missing dates with 0
-    date_range = []
-    current_date = start_date.date()
-    end_date = datetime.now(timezone.utc).date()
-    
-    while current_date <= end_date:
-        date_range.append(current_date)
-        current_date += timedelta(days=1)
-    
-    # Create data map
-    data_map = {date: count for date, count in daily_data}
-    
-    # Build chart data
-    labels = [str(date) for date in date_range]
-    values = [data_map.get(date, 0) for date in date_range]
+    end_date = end_date or datetime.now(timezone.utc).date()
+    start_date = start_date or end_date - timedelta(days=days)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    if (end_date - start_date).days > MAX_CHART_RANGE_DAYS[granularity]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range must not exceed {MAX_CHART_RANGE_DAYS[granularity]} days for granularity {granularity}"
+        )
+    return await dashboard_cache.get_or_compute(
+        ("charts/user-growth", start_date, end_date, granularity),
+        _compute_user_growth_chart, start_date, end_date, granularity
+    )
+
+def _compute_user_growth_chart(db: Session, start_date: date, end_date: date,
+                               granularity: str) -> ChartDataResponse:
+    # Registrations per bucket, gap-filled from the daily rollup
+    labels, values = daily_rollups.series(db, "users.registered", start_date, end_date, granularity)
     
     return ChartDataResponse(
         labels=labels,
@@ -392,12 +384,14 @@ async def get_user_growth_chart(
 
 @router.get("/charts/product-status", response_model=ChartDataResponse)
 async def get_product_status_chart(
-    current_user: User = Depends(require_permission("dashboard.read")),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_permission("dashboard.read"))
 ):
     """
     Get product status distribution chart data
     """
+    return await dashboard_cache.get_or_compute(("charts/product-status",), _compute_product_status_chart)
+
+def _compute_product_status_chart(db: Session) -> ChartDataResponse:
     status_data = db.query(
         Product.status,
         func.count(Product.id).label('count')
@@ -484,4 +478,123 @@ async def get_recent_users(
             last_login=user.last_login
         ))
     
-    return user_responses
\ No newline at end of file
+    return user_responses
+
+# ============================================================================
+# LIVE STREAM
+# ============================================================================
+
+# EventSource cannot send an Authorization header. Such clients first get a
+# stream ticket with their access token, then pass the ticket as ?ticket=:
+# it is what lands in access logs, and it only opens one stream within
+# STREAM_TICKET_EXPIRE_SECONDS.
+stream_security = HTTPBearer(auto_error=False)
+
+# Tickets already redeemed by this process (jti -> expiry timestamp)
+_redeemed_tickets: Dict[str, float] = {}
+_redeemed_lock = threading.Lock()
+
+@router.post("/stream/ticket", response_model=StreamTicketResponse)
+async def create_stream_ticket(
+    credentials: HTTPAuthorizationCredentials = Depends(stream_security),
+    current_user: User = Depends(require_permission("dashboard.read"))
+):
+    """
+    Single-use ticket for opening the live stream from an EventSource
+    """
+    payload = (JWTHandler.verify_token(credentials.credentials) if credentials else None) or {}
+    return StreamTicketResponse(
+        ticket=JWTHandler.create_stream_ticket(current_user.id, payload.get("fid")),
+        expires_in=STREAM_TICKET_EXPIRE_SECONDS
+    )
+
+def _redeem_stream_ticket(db: Session, ticket: Optional[str]) -> User:
+    unauthorized = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Not authenticated",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    payload = JWTHandler.verify_stream_ticket(ticket) if ticket else None
+    if payload is None or token_store.is_revoked(payload):
+        raise unauthorized
+    
+    now = time.time()
+    with _redeemed_lock:
+        for jti in [jti for jti, expires in _redeemed_tickets.items() if expires < now]:
+            del _redeemed_tickets[jti]
+        if payload["jti"] in _redeemed_tickets:
+            raise unauthorized
+        _redeemed_tickets[payload["jti"]] = payload["exp"]
+    
+    user = db.query(User).filter(User.id == payload.get("user_id")).first()
+    if user is None:
+        raise unauthorized
+    return user
+
+def _stream_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(stream_security),
+    ticket: Optional[str] = Query(None, description="Ticket from POST /dashboard/stream/ticket, for EventSource clients")
+) -> User:
+    # Own short-lived session: a request-scoped one could stay open for the
+    # whole lifetime of the stream
+    db = SessionLocal()
+    try:
+        if credentials is not None:
+            user = AuthDependencies.get_current_user(credentials, db)
+        else:
+            user = _redeem_stream_ticket(db, ticket)
+        user = AuthDependencies.get_current_active_user(user)
+        return AuthDependencies.require_permission("dashboard", "read")(user)
+    finally:
+        db.close()
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def _read_counter_snapshot() -> Dict[str, int]:
+    db = SessionLocal()
+    try:
+        return stat_counters.read_counters(db)
+    finally:
+        db.close()
+
+async def _event_stream(request: Request, queue: asyncio.Queue):
+    try:
+        # Subscribed before the snapshot is read, so no delta is missed. Deltas
+        # committed before the read are already in the snapshot: their
+        # counters.version is not newer than the snapshot's, skip them
+        snapshot = await asyncio.to_thread(_read_counter_snapshot)
+        snapshot_version = snapshot.get(stat_counters.COUNTERS_VERSION, 0)
+        yield _sse("snapshot", snapshot)
+        while not await request.is_disconnected():
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=settings.DASHBOARD_STREAM_PING_SECONDS)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": ping\n\n"
+                continue
+            if message["event"] == "counters" and (message["version"] or 0) <= snapshot_version:
+                continue
+            yield _sse(message["event"], {"ts": message["ts"], "data": message["data"]})
+    finally:
+        event_bus.unsubscribe(queue)
+
+@router.get("/stream")
+async def stream_dashboard_events(
+    request: Request,
+    current_user: User = Depends(_stream_user)
+):
+    """
+    Server-Sent Events stream of live dashboard changes
+    
+    Events:
+        snapshot: all counters when the stream opens
+        counters: counter deltas of each committed transaction
+        activity: new audit log entries once written
+    """
+    queue = event_bus.subscribe()
+    return StreamingResponse(
+        _event_stream(request, queue),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import or_, and_, func
 
 from database import get_db
+from services import stats_service
 from models.product_models import Product, Category, ProductImage, ProductStatus
 from models.user_models import User
 from auth.dependencies import (
@@ -488,30 +489,17 @@ async def get_product_stats(
     """
     Get product statistics for dashboard
     """
-    # Get product counts by status
-    total_products = db.query(Product).count()
-    active_products = db.query(Product).filter(Product.status == ProductStatus.ACTIVE.value).count()
-    draft_products = db.query(Product).filter(Product.status == ProductStatus.DRAFT.value).count()
-    out_of_stock = db.query(Product).filter(Product.status == ProductStatus.OUT_OF_STOCK.value).count()
-    featured_products = db.query(Product).filter(Product.is_featured == True).count()
-    
-    # Get low stock products (stock <= 5)
-    low_stock_products = db.query(Product).filter(Product.stock_quantity <= 5).count()
-    
-    # Get products by category
-    category_stats = db.query(
-        Category.name,
-        func.count(Product.id).label('count')
-    ).join(Product).group_by(Category.id, Category.name).all()
+    # Get product counts by status and flags in one query
+    products = stats_service.product_counts(db)
     
     return ProductStatsResponse(
-        total_products=total_products,
-        active_products=active_products,
-        draft_products=draft_products,
-        out_of_stock_products=out_of_stock,
-        featured_products=featured_products,
-        low_stock_products=low_stock_products,
-        category_distribution={category: count for category, count in category_stats}
+        total_products=products["total"],
+        active_products=products["active"],
+        draft_products=products["draft"],
+        out_of_stock_products=products["out_of_stock"],
+        featured_products=products["featured"],
+        low_stock_products=products["low_stock"],
+        category_distribution=stats_service.category_distribution(db)
     )
 
 # ============================================================================
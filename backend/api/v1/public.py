@@ -5,24 +5,89 @@ No authentication required
 
 from datetime import datetime, timezone
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import or_, and_, func
 
+from config import settings
 from database import get_db
-from models.product_models import Product, Category, ProductImage, ProductStatus
+from models.product_models import Product, Category, ProductImage, ProductStatus, ImageType
+from services import public_bootstrap
 from schemas.product_schemas import (
-    ProductResponse, ProductListResponse,
+    ProductResponse, ProductListResponse, ProductImageResponse,
     CategoryResponse, CategoryListResponse,
     ApiResponse
 )
 
 router = APIRouter(prefix="/public", tags=["Public API"])
 
+# ============================================================================
+# BOOTSTRAP
+# ============================================================================
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as required for If-None-Match
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() == "gzip":
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+@router.get("/bootstrap")
+def get_public_bootstrap(
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    Everything the website needs on first load in one request: public
+    settings, contact buttons, SEO defaults, appearance and the category menu
+    
+    The payload is precomputed per settings/catalog version and served with
+    a strong ETag (304 on If-None-Match) and gzip when accepted. The gzip and
+    identity bodies are different representations, so each has its own ETag.
+    """
+    payload = public_bootstrap.get_payload(db)
+    gzipped = _accepts_gzip(request.headers.get("accept-encoding"))
+    etag = payload.gzip_etag if gzipped else payload.etag
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.PUBLIC_BOOTSTRAP_MAX_AGE_SECONDS}",
+        "Vary": "Accept-Encoding",
+    }
+    
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=payload.gzipped, media_type="application/json", headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
 # ============================================================================
 # PUBLIC PRODUCT ENDPOINTS
 # ============================================================================
 
+def _main_image_fields(product: Product) -> dict:
+    """
+    Main image URL plus its intrinsic size and inline placeholder, so cards
+    can reserve the right box and paint a preview before the image loads
+    """
+    image = product.main_image
+    if image is None:
+        return {"main_image_url": None}
+    return {
+        "main_image_url": image.file_url,
+        "main_image_width": image.width,
+        "main_image_height": image.height,
+        "main_image_placeholder": image.placeholder,
+    }
+
 @router.get("/products/", response_model=ProductListResponse)
 async def get_public_products(
     page: int = Query(1, ge=1, description="Page number"),
@@ -64,16 +129,12 @@ async def get_public_products(
     
     # Apply pagination
     offset = (page - 1) * limit
-    products = query.offset(offset).limit(limit).all()
+    # Images in one query for the whole page instead of one per card
+    products = query.options(selectinload(Product.images)).offset(offset).limit(limit).all()
     
     # Convert to response format
     product_responses = []
     for product in products:
-        # Get main image
-        main_image_url = None
-        if product.main_image:
-            main_image_url = product.main_image.file_url
-        
         product_response = ProductResponse(
             id=product.id,
             name=product.name,
@@ -92,7 +153,7 @@ async def get_public_products(
             stock_quantity=product.stock_quantity,
             rating_average=float(product.rating_average) if product.rating_average else 0.0,
             rating_count=product.rating_count,
-            main_image_url=main_image_url,
+            **_main_image_fields(product),
             created_at=product.created_at,
             updated_at=product.updated_at
         )
@@ -125,10 +186,20 @@ async def get_public_product(
             detail="Product not found"
         )
     
-    # Get main image
-    main_image_url = None
-    if product.main_image:
-        main_image_url = product.main_image.file_url
+    images = [
+        ProductImageResponse(
+            id=image.id,
+            image_url=image.file_url,
+            alt_text=image.alt_text,
+            is_main=image.image_type == ImageType.MAIN.value,
+            sort_order=image.sort_order,
+            width=image.width,
+            height=image.height,
+            placeholder=image.placeholder
+        )
+        for image in sorted(product.images, key=lambda image: (image.sort_order, image.id))
+        if image.is_active
+    ]
     
     product_response = ProductResponse(
         id=product.id,
@@ -148,7 +219,9 @@ async def get_public_product(
         stock_quantity=product.stock_quantity,
         rating_average=float(product.rating_average) if product.rating_average else 0.0,
         rating_count=product.rating_count,
-        main_image_url=main_image_url,
+        **_main_image_fields(product),
+        images=images,
+        image_count=len(images),
         created_at=product.created_at,
         updated_at=product.updated_at
     )
@@ -4,14 +4,15 @@ Handles website settings, contact info, SEO settings, and appearance settings
 """
 
 from datetime import datetime, timezone
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import update
 
 from database import get_db
 from models.settings_models import WebsiteSetting, ContactSetting, SeoSetting, AppearanceSetting
 from models.user_models import User
+from services.settings_cache import settings_cache, record_change
 from auth.dependencies import (
     AuthDependencies, 
     log_user_activity,
@@ -40,34 +41,14 @@ async def get_website_settings(
     """
     Get website settings, optionally filtered by group
     """
-    query = db.query(WebsiteSetting).filter(WebsiteSetting.is_active == True)
+    # Active settings, already ordered by group, sort order and key
+    snapshot = settings_cache.get(db)
     
-    if group:
-        query = query.filter(WebsiteSetting.group == group)
-    
-    settings = query.order_by(WebsiteSetting.group, WebsiteSetting.sort_order, WebsiteSetting.key).all()
-    
-    setting_responses = []
-    for setting in settings:
-        setting_responses.append(WebsiteSettingResponse(
-            id=setting.id,
-            key=setting.key,
-            value=setting.value,
-            default_value=setting.default_value,
-            group=setting.group,
-            type=setting.type,
-            label=setting.label,
-            description=setting.description,
-            placeholder=setting.placeholder,
-            is_required=setting.is_required,
-            validation_rules=setting.validation_rules,
-            options=setting.options,
-            sort_order=setting.sort_order,
-            is_active=setting.is_active,
-            is_system=setting.is_system,
-            created_at=setting.created_at,
-            updated_at=setting.updated_at
-        ))
+    setting_responses = [
+        WebsiteSettingResponse.model_validate(dict(row))
+        for row in snapshot.website.values()
+        if not group or row["group"] == group
+    ]
     
     # Group settings by group
     grouped_settings = {}
@@ -81,6 +62,87 @@ async def get_website_settings(
         grouped_settings=grouped_settings
     )
 
+def _bulk_update(db: Session, column, settings_data: Dict[str, str],
+                 user_id: int) -> Tuple[Dict[str, str], Dict[str, Any], Dict[str, Any]]:
+    """
+    Set column for many settings by key in a constant number of queries
+    
+    One SELECT ... WHERE key IN (...) finds the targets, then one
+    executemany UPDATE by primary key writes the changed ones.
+    
+    Returns:
+        Tuple of (result per key, old values, new values) where a result
+        is "updated", "unchanged" or "not_found"
+    """
+    rows = db.query(WebsiteSetting.id, WebsiteSetting.key, column).filter(
+        WebsiteSetting.key.in_(list(settings_data))
+    ).all() if settings_data else []
+    existing = {key: (setting_id, old) for setting_id, key, old in rows}
+    
+    results = {}
+    old_values = {}
+    new_values = {}
+    params = []
+    now = datetime.now(timezone.utc)
+    for key, value in settings_data.items():
+        if key not in existing:
+            results[key] = "not_found"
+            continue
+        setting_id, old = existing[key]
+        if old == value:
+            results[key] = "unchanged"
+            continue
+        results[key] = "updated"
+        old_values[key] = old
+        new_values[key] = value
+        params.append({"id": setting_id, column.key: value, "updated_at": now, "updated_by": user_id})
+    
+    if params:
+        db.execute(update(WebsiteSetting), params)
+        # Bulk UPDATE by primary key does not flush, so bump the version here
+        record_change(db)
+    return results, old_values, new_values
+
+@router.put("/website/bulk", response_model=ApiResponse)
+async def update_multiple_settings(
+    request: Request,
+    settings_data: Dict[str, str],
+    current_user: User = Depends(require_permission("settings.update")),
+    db: Session = Depends(get_db)
+):
+    """
+    Update multiple website settings at once
+    
+    Declared before /website/{setting_key} so "bulk" is not taken as a key.
+    Returns a result per submitted key: updated, unchanged or not_found.
+    """
+    results, old_values, new_values = _bulk_update(db, WebsiteSetting.value, settings_data, current_user.id)
+    updated_settings = list(new_values)
+    
+    if all(result == "not_found" for result in results.values()):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No valid settings found to update"
+        )
+    
+    db.commit()
+    
+    # Log activity
+    client_ip = request.client.host if request.client else "unknown"
+    log_user_activity(
+        db, current_user, "update", "settings", "bulk_update",
+        description=f"Updated {len(updated_settings)} settings",
+        user_ip=client_ip,
+        old_values=old_values,
+        new_values=new_values
+    )
+    
+    return ApiResponse(
+        success=True,
+        message=f"Successfully updated {len(updated_settings)} settings",
+        data={"updated_settings": updated_settings, "results": results}
+    )
+
 @router.get("/website/{setting_key}", response_model=WebsiteSettingResponse)
 async def get_website_setting(
     setting_key: str,
@@ -90,6 +152,11 @@ async def get_website_setting(
     """
     Get specific website setting by key
     """
+    row = settings_cache.get(db).website.get(setting_key)
+    if row is not None:
+        return WebsiteSettingResponse.model_validate(dict(row))
+    
+    # Inactive settings are not in the snapshot
     setting = db.query(WebsiteSetting).filter(WebsiteSetting.key == setting_key).first()
     if not setting:
         raise HTTPException(
@@ -176,54 +243,6 @@ async def update_website_setting(
         updated_at=setting.updated_at
     )
 
-@router.put("/website/bulk", response_model=ApiResponse)
-async def update_multiple_settings(
-    request: Request,
-    settings_data: Dict[str, str],
-    current_user: User = Depends(require_permission("settings.update")),
-    db: Session = Depends(get_db)
-):
-    """
-    Update multiple website settings at once
-    """
-    updated_settings = []
-    old_values = {}
-    new_values = {}
-    
-    for key, value in settings_data.items():
-        setting = db.query(WebsiteSetting).filter(WebsiteSetting.key == key).first()
-        if setting:
-            old_values[key] = setting.value
-            setting.value = value
-            setting.updated_at = datetime.now(timezone.utc)
-            setting.updated_by = current_user.id
-            updated_settings.append(key)
-            new_values[key] = value
-    
-    if not updated_settings:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="No valid settings found to update"
-        )
-    
-    db.commit()
-    
-    # Log activity
-    client_ip = request.client.host if request.client else "unknown"
-    log_user_activity(
-        db, current_user, "update", "settings", "bulk_update",
-        description=f"Updated {len(updated_settings)} settings",
-        user_ip=client_ip,
-        old_values=old_values,
-        new_values=new_values
-    )
-    
-    return ApiResponse(
-        success=True,
-        message=f"Successfully updated {len(updated_settings)} settings",
-        data={"updated_settings": updated_settings}
-    )
-
 # ============================================================================
 # CONTACT SETTINGS ENDPOINTS
 # ============================================================================
@@ -553,14 +572,11 @@ async def get_settings_groups(
     """
     Get all settings groups with counts
     """
-    # Get website settings grouped
-    website_groups = db.query(
-        WebsiteSetting.group,
-        func.count(WebsiteSetting.id).label('count')
-    ).filter(WebsiteSetting.is_active == True).group_by(WebsiteSetting.group).all()
+    snapshot = settings_cache.get(db)
     
+    # Get website settings grouped
     groups = []
-    for group, count in website_groups:
+    for group, count in sorted(snapshot.group_counts().items()):
         groups.append(SettingsGroupResponse(
             name=group,
             display_name=group.replace('_', ' ').title(),
@@ -570,7 +586,7 @@ async def get_settings_groups(
         ))
     
     # Add other setting types
-    contact_count = db.query(ContactSetting).filter(ContactSetting.is_active == True).count()
+    contact_count = len(snapshot.contact)
     if contact_count > 0:
         groups.append(SettingsGroupResponse(
             name="contact",
@@ -580,7 +596,7 @@ async def get_settings_groups(
             type="contact"
         ))
     
-    seo_count = db.query(SeoSetting).filter(SeoSetting.is_active == True).count()
+    seo_count = len(snapshot.seo)
     if seo_count > 0:
         groups.append(SettingsGroupResponse(
             name="seo",
@@ -590,7 +606,7 @@ async def get_settings_groups(
             type="seo"
         ))
     
-    appearance_count = db.query(AppearanceSetting).filter(AppearanceSetting.is_active == True).count()
+    appearance_count = len(snapshot.appearance)
     if appearance_count > 0:
         groups.append(SettingsGroupResponse(
             name="appearance",
@@ -659,22 +675,15 @@ async def save_current_settings_as_default(
 ):
     """
     Save current website settings as default values
+    
+    Returns a result per submitted key: updated, unchanged or not_found.
     """
-    updated_settings = []
-    old_defaults = {}
-    new_defaults = {}
+    results, old_defaults, new_defaults = _bulk_update(
+        db, WebsiteSetting.default_value, settings_data, current_user.id
+    )
+    updated_settings = list(new_defaults)
     
-    for key, value in settings_data.items():
-        setting = db.query(WebsiteSetting).filter(WebsiteSetting.key == key).first()
-        if setting:
-            old_defaults[key] = setting.default_value
-            setting.default_value = value
-            setting.updated_at = datetime.now(timezone.utc)
-            setting.updated_by = current_user.id
-            updated_settings.append(key)
-            new_defaults[key] = value
-    
-    if not updated_settings:
+    if all(result == "not_found" for result in results.values()):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No valid settings found to save as default"
@@ -695,5 +704,5 @@ async def save_current_settings_as_default(
     return ApiResponse(
         success=True,
         message=f"Successfully saved {len(updated_settings)} settings as default values",
-        data={"updated_settings": updated_settings}
+        data={"updated_settings": updated_settings, "results": results}
     )
\ No newline at end of file
@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import or_, and_, func
 
 from database import get_db
+from services import stats_service
 from models.user_models import User, Role, Permission, UserStatus
 from auth.dependencies import (
     AuthDependencies, 
@@ -433,33 +434,18 @@ async def get_user_stats(
     """
     Get user statistics for dashboard
     """
-    # Get user counts by status
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.status == UserStatus.ACTIVE.value).count()
-    pending_users = db.query(User).filter(User.status == UserStatus.PENDING.value).count()
-    suspended_users = db.query(User).filter(User.status == UserStatus.SUSPENDED.value).count()
-    banned_users = db.query(User).filter(User.status == UserStatus.BANNED.value).count()
-    
-    # Get recent registrations (last 30 days)
+    # Get user counts by status and recent registrations (last 30 days) in one query
     thirty_days_ago = datetime.now(timezone.utc) - timedelta(days=30)
-    recent_registrations = db.query(User).filter(
-        User.created_at >= thirty_days_ago
-    ).count()
-    
-    # Get users by role
-    role_stats = db.query(
-        Role.display_name,
-        func.count(User.id).label('count')
-    ).join(User).group_by(Role.id, Role.display_name).all()
+    users = stats_service.user_counts(db, since=thirty_days_ago)
     
     return UserStatsResponse(
-        total_users=total_users,
-        active_users=active_users,
-        pending_users=pending_users,
-        suspended_users=suspended_users,
-        banned_users=banned_users,
-        recent_registrations=recent_registrations,
-        role_distribution={role: count for role, count in role_stats}
+        total_users=users["total"],
+        active_users=users["active"],
+        pending_users=users["pending"],
+        suspended_users=users["suspended"],
+        banned_users=users["banned"],
+        recent_registrations=users["new"],
+        role_distribution=stats_service.role_distribution(db)
     )
 
 # ============================================================================
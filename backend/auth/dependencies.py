@@ -3,6 +3,7 @@ FastAPI Dependencies for Authentication and Authorization
 Handles JWT token validation, user authentication, and permission checking
 """
 
+from datetime import datetime, timezone
 from typing import Optional, List
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -12,6 +13,11 @@ from database import get_db
 from models.user_models import User, UserStatus
 from models.audit_models import AuditLog, LoginAttempt
 from auth.jwt_handler import JWTHandler, TokenData
+from auth.token_store import token_store
+from config import settings
+from services.audit_writer import audit_writer
+from middleware.request_timing import current_request, defer_row
+from services import login_rollup
 
 # Security scheme
 security = HTTPBearer()
@@ -52,6 +58,10 @@ class AuthDependencies:
         if payload.get("type") != "access":
             raise credentials_exception
         
+        # Check revocation (in-memory, no database query)
+        if token_store.is_revoked(payload):
+            raise credentials_exception
+        
         # Get user ID from payload
         user_id: int = payload.get("user_id")
         if user_id is None:
@@ -200,6 +210,8 @@ class AuthDependencies:
             payload = JWTHandler.verify_token(credentials.credentials)
             if payload is None or payload.get("type") != "access":
                 return None
+            if token_store.is_revoked(payload):
+                return None
             
             user_id = payload.get("user_id")
             if user_id is None:
@@ -310,11 +322,19 @@ def log_user_activity(
     description: Optional[str] = None,
     old_values: Optional[dict] = None,
     new_values: Optional[dict] = None,
+    commit: bool = True,
     **kwargs
 ):
     """
     Log user activity to audit log
     
+    With commit=True the entry is handed to the buffered audit writer and
+    written in the next batch; it is written synchronously when the writer
+    is not running or AUDIT_LOG_MODE is "sync". Inside a request it is held
+    until the response is sent so it can carry the request timing (see
+    middleware.request_timing). With commit=False the entry is always added
+    to the caller's session so it shares its transaction.
+    
     Args:
         db: Database session
         user: User performing the action
@@ -324,11 +344,38 @@ def log_user_activity(
         description: Description of the action
         old_values: Previous values (for updates)
         new_values: New values (for creates/updates)
+        commit: Commit immediately; pass False to let the caller write the
+            entry in the same transaction as its own changes
         **kwargs: Additional log data
     """
+    if commit and settings.AUDIT_LOG_MODE != "sync":
+        row = AuditLog.build_row(
+            user_id=user.id,
+            username=user.username,
+            action=action,
+            resource=resource,
+            resource_id=resource_id,
+            description=description,
+            old_values=old_values,
+            new_values=new_values,
+            **kwargs
+        )
+        if audit_writer.running and defer_row(AuditLog.__table__, row):
+            return
+        if audit_writer.submit(AuditLog.__table__, row):
+            return
+    
+    # Written with the caller's transaction, before the response exists:
+    # only the request line is known here
+    ctx = current_request()
+    if ctx is not None:
+        kwargs.setdefault("method", ctx.method)
+        kwargs.setdefault("endpoint", ctx.endpoint)
+    
     AuditLog.log_action(
         db,
         user_id=user.id,
+        username=user.username,
         action=action,
         resource=resource,
         resource_id=resource_id,
@@ -337,7 +384,8 @@ def log_user_activity(
         new_values=new_values,
         **kwargs
     )
-    db.commit()
+    if commit:
+        db.commit()
 
 def log_login_attempt(
     db: Session,
@@ -347,7 +395,8 @@ def log_login_attempt(
     user_agent: Optional[str] = None,
     success: bool = False,
     failure_reason: Optional[str] = None,
-    user_id: Optional[int] = None
+    user_id: Optional[int] = None,
+    commit: bool = True
 ):
     """
     Log login attempt
@@ -361,15 +410,23 @@ def log_login_attempt(
         success: Whether login was successful
         failure_reason: Reason for failure if unsuccessful
         user_id: User ID if successful
+        commit: Commit immediately; pass False to batch with other writes
     """
+    attempted_at = datetime.now(timezone.utc)
+    result = "success" if success else "failure"
     login_attempt = LoginAttempt(
         username=username,
         email=email,
         ip_address=ip_address,
         user_agent=user_agent,
-        success="success" if success else "failure",
+        success=result,
         failure_reason=failure_reason,
-        user_id=user_id
+        user_id=user_id,
+        attempted_at=attempted_at
     )
     db.add(login_attempt)
-    db.commit()
\ No newline at end of file
+    
+    # Hourly rollup for the security dashboard, in the same transaction
+    login_rollup.record_attempt(db, ip_address, result, attempted_at)
+    if commit:
+        db.commit()
\ No newline at end of file
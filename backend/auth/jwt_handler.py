@@ -4,6 +4,7 @@ Handles JWT token creation, validation, and refresh
 """
 
 import os
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
 from jose import JWTError, jwt
@@ -14,6 +15,7 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-super-secret-key-change-in-production
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
+STREAM_TICKET_EXPIRE_SECONDS = 30
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -157,6 +159,54 @@ class JWTHandler:
         except JWTError:
             return None
 
+    @staticmethod
+    def create_stream_ticket(user_id: int, family_id: Optional[str] = None) -> str:
+        """
+        Create a short-lived ticket for opening an event stream
+        
+        EventSource cannot send headers, so the ticket travels in the query
+        string (and ends up in access logs). It can only open streams and
+        expires after STREAM_TICKET_EXPIRE_SECONDS.
+        
+        Args:
+            user_id: Ticket owner
+            family_id: Token family of the access token it was issued for
+            
+        Returns:
+            Stream ticket
+        """
+        now = datetime.now(timezone.utc)
+        to_encode = {
+            "user_id": user_id,
+            "fid": family_id,
+            "jti": uuid.uuid4().hex,
+            "exp": now + timedelta(seconds=STREAM_TICKET_EXPIRE_SECONDS),
+            "iat": now,
+            "type": "stream_ticket"
+        }
+        
+        encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+        return encoded_jwt
+    
+    @staticmethod
+    def verify_stream_ticket(ticket: str) -> Optional[Dict[str, Any]]:
+        """
+        Verify a stream ticket
+        
+        Args:
+            ticket: Stream ticket
+            
+        Returns:
+            Decoded payload if the ticket is valid, None otherwise
+        """
+        try:
+            payload = jwt.decode(ticket, SECRET_KEY, algorithms=[ALGORITHM])
+            if payload.get("type") != "stream_ticket":
+                return None
+            return payload
+        except JWTError:
+            return None
+
 class TokenData:
     """Token data structure"""
     
@@ -0,0 +1,224 @@
+"""
+Refresh Token Store for Admin Panel Authentication
+Handles refresh token rotation (jti tracking) and revocation checks
+
+Every refresh token gets a row in refresh_tokens. Tokens issued from the
+same login share a family_id, which access tokens also carry as "fid".
+Revoking a family (logout, or reuse of an already-rotated refresh token)
+blocks every token of that login.
+
+Revocation checks are served from an in-memory set. Each revocation bumps
+the version counter in token_revocation_state (one atomic UPDATE on the row
+seeded by create_tables); other workers compare that counter at most once
+per sync interval and reload the set when it changed, so checking a token
+never costs a database query on the request path. The revoking worker adds
+the family to its own set once the transaction commits.
+"""
+
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models.user_models import RefreshToken, TokenRevocationState, User
+from auth.jwt_handler import JWTHandler, REFRESH_TOKEN_EXPIRE_DAYS
+
+# How often a worker checks the shared revocation version (seconds)
+REVOCATION_SYNC_INTERVAL = 5.0
+
+# Session.info key holding families revoked in the open transaction until it commits
+_REVOKED_KEY = "revoked_families"
+
+class TokenReuseError(Exception):
+    """Raised when an already-rotated refresh token is presented again"""
+
+class RefreshTokenStore:
+    """Refresh token rotation and in-memory revocation checks"""
+
+    def __init__(self, sync_interval: float = REVOCATION_SYNC_INTERVAL):
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._revoked_families: Set[str] = set()
+        self._version: Optional[int] = None
+        self._last_sync = 0.0
+
+    # ------------------------------------------------------------------
+    # Issuing and rotation
+    # ------------------------------------------------------------------
+
+    def issue(
+        self,
+        db: Session,
+        user: User,
+        claims: Dict[str, Any],
+        family_id: Optional[str] = None,
+        parent_jti: Optional[str] = None
+    ) -> Tuple[str, str]:
+        """
+        Create a refresh token and stage its row in the session
+
+        Args:
+            db: Database session (caller commits)
+            user: Token owner
+            claims: Base JWT claims (TokenData.to_dict())
+            family_id: Existing family when rotating, None for a new login
+            parent_jti: jti of the token being rotated
+
+        Returns:
+            Tuple of (encoded refresh token, family_id)
+        """
+        jti = uuid.uuid4().hex
+        family_id = family_id or uuid.uuid4().hex
+
+        token = JWTHandler.create_refresh_token(
+            data={**claims, "jti": jti, "fid": family_id}
+        )
+        db.add(RefreshToken(
+            jti=jti,
+            family_id=family_id,
+            parent_jti=parent_jti,
+            user_id=user.id,
+            expires_at=datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+        ))
+        return token, family_id
+
+    def rotate(self, db: Session, payload: Dict[str, Any], user: User, claims: Dict[str, Any]) -> str:
+        """
+        Exchange a refresh token for a new one in the same family
+
+        Args:
+            db: Database session (caller commits)
+            payload: Decoded refresh token payload
+            user: Token owner
+            claims: Base JWT claims for the new token
+
+        Returns:
+            New encoded refresh token
+
+        Raises:
+            TokenReuseError: If the token was already rotated (family is revoked)
+            LookupError: If the token is unknown or revoked
+        """
+        record = db.query(RefreshToken).filter(RefreshToken.jti == payload.get("jti")).first()
+        if record is None or record.user_id != user.id or record.revoked_at is not None:
+            raise LookupError("Unknown or revoked refresh token")
+
+        # Claim the token in one UPDATE: of two concurrent refreshes with the
+        # same token only one can flip used_at, the other sees rowcount 0
+        claimed = db.query(RefreshToken).filter(
+            RefreshToken.jti == record.jti,
+            RefreshToken.used_at.is_(None)
+        ).update({"used_at": datetime.now(timezone.utc)}, synchronize_session=False)
+        if claimed != 1:
+            # A rotated token came back: assume it was stolen and kill the family
+            self.revoke_family(db, record.family_id, reason="reuse_detected")
+            raise TokenReuseError(record.family_id)
+
+        token, _ = self.issue(db, user, claims, family_id=record.family_id, parent_jti=record.jti)
+        return token
+
+    # ------------------------------------------------------------------
+    # Revocation
+    # ------------------------------------------------------------------
+
+    def revoke_family(self, db: Session, family_id: str, reason: str = "logout") -> int:
+        """
+        Revoke every token in a family and bump the revocation version
+
+        Args:
+            db: Database session (caller commits)
+            family_id: Family to revoke
+            reason: Stored in revoked_reason
+
+        Returns:
+            Number of refresh token rows revoked
+        """
+        revoked = db.query(RefreshToken).filter(
+            RefreshToken.family_id == family_id,
+            RefreshToken.revoked_at.is_(None)
+        ).update(
+            {"revoked_at": datetime.now(timezone.utc), "revoked_reason": reason},
+            synchronize_session=False
+        )
+
+        # Incremented in the database, so concurrent revocations never write the same version
+        db.execute(
+            update(TokenRevocationState)
+            .where(TokenRevocationState.id == 1)
+            .values(version=TokenRevocationState.version + 1)
+        )
+
+        # Visible to this worker once committed; others pick it up on their next sync
+        db.info.setdefault(_REVOKED_KEY, set()).add(family_id)
+        return revoked
+
+    def mark_revoked(self, family_ids: Set[str]):
+        """Add committed revocations to this worker's set"""
+        with self._lock:
+            self._revoked_families |= family_ids
+
+    def is_revoked(self, payload: Dict[str, Any]) -> bool:
+        """
+        Check whether a decoded token belongs to a revoked family
+
+        Tokens issued before rotation was introduced carry no fid and are
+        never considered revoked.
+        """
+        family_id = payload.get("fid")
+        if not family_id:
+            return False
+        self._maybe_sync()
+        return family_id in self._revoked_families
+
+    def _maybe_sync(self):
+        """Reload the revoked set if the shared version moved (rate limited)"""
+        now = time.monotonic()
+        if now - self._last_sync < self.sync_interval:
+            return
+        with self._lock:
+            if now - self._last_sync < self.sync_interval:
+                return
+            self._last_sync = now
+            try:
+                self.sync()
+            except Exception:
+                # Keep serving from the current set; retry on the next interval
+                pass
+
+    def sync(self, force: bool = False):
+        """Compare the version counter and reload revoked families if needed"""
+        db = SessionLocal()
+        try:
+            version = db.query(TokenRevocationState.version).filter(
+                TokenRevocationState.id == 1
+            ).scalar() or 0
+            if not force and version == self._version:
+                return
+
+            # Families only matter until their last refresh token expires
+            rows = db.query(RefreshToken.family_id).filter(
+                RefreshToken.revoked_at.isnot(None),
+                RefreshToken.expires_at > datetime.now(timezone.utc)
+            ).distinct().all()
+            self._revoked_families = {family_id for (family_id,) in rows}
+            self._version = version
+        finally:
+            db.close()
+
+# Shared store instance
+token_store = RefreshTokenStore()
+
+@event.listens_for(Session, "after_commit")
+def _apply_revocations(session: Session):
+    family_ids = session.info.pop(_REVOKED_KEY, None)
+    if family_ids:
+        token_store.mark_revoked(family_ids)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_revocations(session: Session):
+    session.info.pop(_REVOKED_KEY, None)
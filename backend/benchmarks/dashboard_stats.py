@@ -0,0 +1,148 @@
+"""
+Dashboard statistics benchmark
+Đo thời gian đếm số liệu dashboard trên bảng sản phẩm / người dùng lớn
+
+Builds a SQLite fixture with --rows products and --rows / 10 users (reused
+when --fixture already exists) and compares the former one-COUNT-per-filter
+queries with the single-pass SUM(CASE ...) queries in services.stats_service.
+
+Usage:
+    python benchmarks/dashboard_stats.py
+    python benchmarks/dashboard_stats.py --rows 100000 --repeat 5
+    python benchmarks/dashboard_stats.py --fixture /tmp/stats-1m.db
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _build_fixture(rows: int):
+    from database import Base, engine
+    from models.user_models import User, Role
+    from models.product_models import Category, Product, ProductStatus
+    from models.user_models import UserStatus
+
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+    statuses = [s.value for s in ProductStatus]
+    user_statuses = [s.value for s in UserStatus]
+
+    with engine.begin() as conn:
+        conn.execute(Role.__table__.insert(), [{"name": "bench", "display_name": "Bench", "is_active": True}])
+        conn.execute(Category.__table__.insert(), [
+            {"name": f"Category {i}", "slug": f"category-{i}", "is_active": i % 5 != 0, "sort_order": i}
+            for i in range(1, 21)
+        ])
+
+    batch = 50000
+    for start in range(0, rows, batch):
+        with engine.begin() as conn:
+            conn.execute(Product.__table__.insert(), [
+                {
+                    "name": f"Product {i}",
+                    "slug": f"product-{i}",
+                    "category_id": rng.randint(1, 20),
+                    "original_price": rng.randint(50, 5000) * 1000,
+                    "sale_price": rng.randint(40, 4000) * 1000 if rng.random() < 0.3 else None,
+                    "stock_quantity": rng.randint(0, 200),
+                    "status": rng.choice(statuses),
+                    "is_featured": rng.random() < 0.1,
+                    "created_at": now - timedelta(minutes=rng.randint(0, 525600)),
+                }
+                for i in range(start, min(start + batch, rows))
+            ])
+        print(f"  products: {min(start + batch, rows)}/{rows}", end="\r")
+    print()
+
+    users = max(rows // 10, 1)
+    for start in range(0, users, batch):
+        with engine.begin() as conn:
+            conn.execute(User.__table__.insert(), [
+                {
+                    "username": f"user{i}",
+                    "email": f"user{i}@example.com",
+                    "hashed_password": "x",
+                    "role_id": 1,
+                    "status": rng.choice(user_statuses),
+                    "created_at": now - timedelta(minutes=rng.randint(0, 525600)),
+                }
+                for i in range(start, min(start + batch, users))
+            ])
+
+
+def _legacy_counts(db, since):
+    """The per-filter COUNT queries the endpoints used to run"""
+    from models.user_models import User, UserStatus
+    from models.product_models import Category, Product, ProductStatus
+
+    db.query(Product).count()
+    for status in ProductStatus:
+        db.query(Product).filter(Product.status == status.value).count()
+    db.query(Product).filter(Product.is_featured == True).count()
+    db.query(Product).filter(Product.stock_quantity <= 5).count()
+    db.query(Product).filter(Product.created_at >= since).count()
+    db.query(User).count()
+    for status in UserStatus:
+        db.query(User).filter(User.status == status.value).count()
+    db.query(User).filter(User.created_at >= since).count()
+    db.query(Category).count()
+    db.query(Category).filter(Category.is_active == True).count()
+
+
+def _single_pass_counts(db, since):
+    from services import stats_service
+
+    stats_service.product_counts(db, since=since)
+    stats_service.user_counts(db, since=since)
+    stats_service.category_counts(db)
+
+
+def _time(label, func, db, since, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(db, since)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(f"{label:<14} best {timings[0] * 1000:8.1f} ms   median {timings[len(timings) // 2] * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard statistics queries")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Products in the fixture")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--fixture", default=None, help="SQLite file to build or reuse")
+    args = parser.parse_args()
+
+    fixture = args.fixture or os.path.join(tempfile.mkdtemp(prefix="stats-bench-"), "stats.db")
+    exists = os.path.exists(fixture)
+    os.environ["DATABASE_URL"] = f"sqlite:///{fixture}"
+    sys.path.insert(0, BACKEND_DIR)
+
+    if not exists:
+        print(f"Building fixture {fixture} ({args.rows} products)...")
+        _build_fixture(args.rows)
+
+    from database import SessionLocal
+
+    since = datetime.now(timezone.utc) - timedelta(days=30)
+    db = SessionLocal()
+    try:
+        _time("per-filter", _legacy_counts, db, since, args.repeat)
+        _time("single-pass", _single_pass_counts, db, since, args.repeat)
+    finally:
+        db.close()
+        if args.fixture is None:
+            os.remove(fixture)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Image upload latency benchmark
+Đo độ trễ API trong khi nhiều ảnh đang được upload và resize đồng thời
+
+Runs the API with uvicorn against a throw-away copy of the SQLite database,
+uploads a large synthetic JPEG as the main image of several products at
+once and keeps polling /health meanwhile. The /health latency shows how
+long other requests wait behind image processing. Each mode
+(IMAGE_PROCESSING_MODE=inline, then pool) gets its own server.
+
+Usage:
+    python benchmarks/image_upload_latency.py
+    python benchmarks/image_upload_latency.py --uploads 24 --concurrency 8 --mode pool
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+from PIL import Image
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CATEGORY = "benchmark-uploads"
+FIRST_PRODUCT_ID = 900000
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _sample_jpeg(width: int, height: int) -> bytes:
+    # Gradient plus noise: compresses like a photo, not like a flat color
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    pixels = np.stack([x + 0 * y, y + 0 * x, (x + y) / 2], axis=-1)
+    pixels += rng.normal(0, 12, pixels.shape)
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def _percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000
+
+
+async def _wait_until_up(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(f"{base_url}/health")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError("API server did not start in time")
+
+
+async def _run(base_url: str, image: bytes, total: int, concurrency: int, username: str, password: str):
+    semaphore = asyncio.Semaphore(concurrency)
+    upload_latencies = []
+    probe_latencies = []
+    failures = 0
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        response = await client.post("/api/v1/auth/login", json={"username": username, "password": password})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        # Warm up the worker processes so pool start-up is not measured
+        await client.post(
+            f"/api/admin/products/{FIRST_PRODUCT_ID}/images/upload", headers=headers,
+            data={"category": CATEGORY, "image_type": "main"},
+            files={"file": ("warmup.jpg", image, "image/jpeg")}
+        )
+
+        async def upload(index: int):
+            nonlocal failures
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    f"/api/admin/products/{FIRST_PRODUCT_ID + index}/images/upload", headers=headers,
+                    data={"category": CATEGORY, "image_type": "main"},
+                    files={"file": ("bench.jpg", image, "image/jpeg")}
+                )
+                upload_latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failures += 1
+
+        async def probe():
+            async with httpx.AsyncClient(base_url=base_url, timeout=120) as probe_client:
+                while not done.is_set():
+                    started = time.perf_counter()
+                    await probe_client.get("/health")
+                    probe_latencies.append(time.perf_counter() - started)
+                    await asyncio.sleep(0.02)
+
+        prober = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(upload(index) for index in range(total)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await prober
+
+    print(f"uploads:          {total} (concurrency {concurrency}, failures {failures})")
+    print(f"throughput:       {total / elapsed:.1f} uploads/s")
+    print(f"upload p50:       {_percentile(upload_latencies, 0.5):.1f} ms")
+    print(f"/health p50:      {_percentile(probe_latencies, 0.5):.1f} ms")
+    print(f"/health p99:      {_percentile(probe_latencies, 0.99):.1f} ms")
+    print(f"/health max:      {max(probe_latencies) * 1000:.1f} ms ({len(probe_latencies)} probes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API latency during concurrent image uploads")
+    parser.add_argument("--uploads", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--width", type=int, default=3000)
+    parser.add_argument("--height", type=int, default=2000)
+    parser.add_argument("--mode", choices=["inline", "pool", "both"], default="both")
+    parser.add_argument("--database", default=os.path.join(BACKEND_DIR, "admin_panel.db"),
+                        help="SQLite database to copy for the run")
+    parser.add_argument("--username", default="Hpt")
+    parser.add_argument("--password", default="HptPttn7686")
+    args = parser.parse_args()
+
+    image = _sample_jpeg(args.width, args.height)
+    print(f"image: {args.width}x{args.height} JPEG, {len(image) / 1024:.0f} KB")
+
+    workdir = tempfile.mkdtemp(prefix="image-bench-")
+    db_copy = os.path.join(workdir, "bench.db")
+    shutil.copy(args.database, db_copy)
+
+    modes = ["inline", "pool"] if args.mode == "both" else [args.mode]
+    try:
+        for mode in modes:
+            port = _free_port()
+            env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_copy}", IMAGE_PROCESSING_MODE=mode)
+            server = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL
+            )
+            base_url = f"http://127.0.0.1:{port}"
+            try:
+                print(f"\n== IMAGE_PROCESSING_MODE={mode}")
+                asyncio.run(_wait_until_up(base_url))
+                asyncio.run(_run(base_url, image, args.uploads, args.concurrency, args.username, args.password))
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        shutil.rmtree(os.path.join(BACKEND_DIR, "static", "images", "products", CATEGORY), ignore_errors=True)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Login throughput benchmark
+Đo số lượt đăng nhập/giây khi nhiều client đăng nhập đồng thời
+
+Runs the API with uvicorn against a throw-away copy of the SQLite database
+and fires concurrent /api/v1/auth/login requests at it.
+
+Usage:
+    python benchmarks/login_throughput.py
+    python benchmarks/login_throughput.py --requests 200 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_until_up(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(f"{base_url}/health")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError("API server did not start in time")
+
+
+async def _run(base_url: str, total: int, concurrency: int, username: str, password: str):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        async def one():
+            nonlocal failures
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/api/v1/auth/login",
+                    json={"username": username, "password": password}
+                )
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"requests:    {total} (concurrency {concurrency}, failures {failures})")
+    print(f"throughput:  {total / elapsed:.1f} logins/s")
+    print(f"latency p50: {latencies[len(latencies) // 2] * 1000:.1f} ms")
+    print(f"latency p95: {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent logins")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--database", default=os.path.join(BACKEND_DIR, "admin_panel.db"),
+                        help="SQLite database to copy for the run")
+    parser.add_argument("--username", default="Hpt")
+    parser.add_argument("--password", default="HptPttn7686")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="login-bench-")
+    db_copy = os.path.join(workdir, "bench.db")
+    shutil.copy(args.database, db_copy)
+
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_copy}")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        asyncio.run(_wait_until_up(base_url))
+        asyncio.run(_run(base_url, args.requests, args.concurrency, args.username, args.password))
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
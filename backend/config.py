@@ -5,9 +5,12 @@ Quản lý cấu hình cho Backend API
 
 import os
 import json
-from typing import List, Optional
+import logging
+from typing import List, Optional, Tuple
 from pydantic_settings import BaseSettings
 
+logger = logging.getLogger(__name__)
+
 class Settings(BaseSettings):
     """
     Application settings loaded from environment variables
@@ -34,6 +37,65 @@ class Settings(BaseSettings):
     MAX_FILE_SIZE: int = 10485760  # 10MB
     ALLOWED_EXTENSIONS: str = '["jpg","jpeg","png","gif","webp"]'  # JSON string format
     
+    # Audit log writer
+    AUDIT_LOG_MODE: str = "async"  # async (buffered background writer) or sync
+    AUDIT_FLUSH_INTERVAL_MS: int = 500
+    AUDIT_BATCH_SIZE: int = 100
+    AUDIT_QUEUE_SIZE: int = 10000
+    
+    # System logs: WARNING and above are written to system_logs, repeats collapsed per window
+    SYSTEM_LOG_LEVEL: str = "WARNING"
+    SYSTEM_LOG_DEDUPE_SECONDS: int = 60
+    SYSTEM_LOG_FLUSH_INTERVAL_MS: int = 1000
+    
+    # Dashboard stat counters: how often they are recomputed to correct drift
+    STAT_COUNTER_RECONCILE_MINUTES: int = 15
+    
+    # Dashboard response cache: fresh for TTL, then served stale while recomputing
+    DASHBOARD_CACHE_TTL_SECONDS: int = 15
+    DASHBOARD_CACHE_STALE_SECONDS: int = 60
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 256
+    
+    # Live dashboard stream: keep-alive comment interval for idle connections
+    DASHBOARD_STREAM_PING_SECONDS: int = 15
+    
+    # System health: probes run in the background, endpoints serve the last result
+    HEALTH_PROBE_INTERVAL_SECONDS: int = 15
+    
+    # Settings cache: how often a worker checks the shared settings version
+    SETTINGS_VERSION_CHECK_SECONDS: float = 1.0
+    
+    # Public bootstrap payload: browser cache lifetime before revalidating with the ETag
+    PUBLIC_BOOTSTRAP_MAX_AGE_SECONDS: int = 60
+    
+    # Image processing: resizing runs in a process pool, bounded by pending jobs
+    IMAGE_PROCESSING_MODE: str = "pool"  # pool (worker processes) or inline
+    IMAGE_WORKERS: int = 2
+    IMAGE_WORKER_MAX_TASKS: int = 200
+    IMAGE_MAX_PENDING_JOBS: int = 16
+    IMAGE_JOB_TTL_SECONDS: int = 600
+    # Uploads above this many pixels (width x height) are rejected before decoding
+    IMAGE_MAX_PIXELS: int = 40_000_000
+    # Content-addressed image blobs; unreferenced blobs older than the minimum age are deleted
+    IMAGE_BLOB_DIR: str = "static/images/blobs"
+    IMAGE_BLOB_GC_INTERVAL_HOURS: int = 24
+    IMAGE_BLOB_GC_MIN_AGE_SECONDS: int = 3600
+    # On-demand variants (/static/img/{w}x{h}/...): allowed sizes and LRU disk cache budget
+    IMAGE_VARIANT_SIZES: str = '["150x150","300x225","300x300","600x450","800x600","1200x900"]'  # JSON string format
+    IMAGE_VARIANT_QUALITY: int = 82
+    IMAGE_VARIANT_CACHE_DIR: str = "cache/image_variants"
+    IMAGE_VARIANT_CACHE_BYTES: int = 536870912  # 512MB
+    IMAGE_VARIANT_MAX_AGE_SECONDS: int = 86400
+    
+    # Request timing: fraction of non-audited requests stored in request_latency_samples
+    REQUEST_SAMPLE_RATE: float = 0.05
+    
+    # Log retention (audit_logs, system_logs, login_attempts, request_latency_samples)
+    LOG_RETENTION_DAYS: int = 90
+    LOG_RETENTION_BATCH_SIZE: int = 1000
+    LOG_RETENTION_INTERVAL_HOURS: int = 24
+    LOG_ARCHIVE_DIR: str = "archives/logs"
+    
     # Admin settings
     ADMIN_EMAIL: str = "admin@minhha.com"
     ADMIN_PASSWORD: str = "admin123"
@@ -56,6 +118,15 @@ class Settings(BaseSettings):
         except:
             return ["*"]
     
+    @property
+    def image_variant_sizes_list(self) -> List[Tuple[int, int]]:
+        """Parse allowed on-demand image sizes ("WxH") from JSON string"""
+        try:
+            sizes = json.loads(self.IMAGE_VARIANT_SIZES)
+            return [tuple(int(part) for part in size.split("x")) for size in sizes]
+        except:
+            return [(300, 225), (600, 450)]
+    
     @property
     def allowed_extensions_list(self) -> List[str]:
         """Parse allowed extensions from JSON string"""
@@ -112,7 +183,7 @@ def get_cors_origins() -> List[str]:
             ])
             
     except Exception as e:
-        print(f"⚠️  Could not auto-detect local IPs: {e}")
+        logger.warning("Could not auto-detect local IPs: %s", e)
     
     # 3. OPENHANDS ENVIRONMENT - Auto-detect from environment
     try:
@@ -136,7 +207,7 @@ def get_cors_origins() -> List[str]:
                     ])
                 print(f"🌐 OpenHands environment detected: {unique_id}")
     except Exception as e:
-        print(f"⚠️  OpenHands detection failed: {e}")
+        logger.warning("OpenHands detection failed: %s", e, exc_info=True)
     
     # 4. PRODUCTION ONLY - Specific domains
     if settings.ENVIRONMENT == "production":
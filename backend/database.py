@@ -3,23 +3,43 @@ Database configuration and session management for Admin Panel
 """
 
 import os
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import create_engine, event, MetaData, inspect, text
+from sqlalchemy.dialects import mysql
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import QueuePool, StaticPool
 
 # Database URL from environment variable or default to SQLite
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./admin_panel.db")
 
+# Seconds a SQLite connection waits for another connection's write lock
+SQLITE_BUSY_TIMEOUT_SECONDS = 30
+
 # Create engine
 if DATABASE_URL.startswith("sqlite"):
     # SQLite specific configuration
+    if ":memory:" in DATABASE_URL or DATABASE_URL.rstrip("/") == "sqlite:":
+        # An in-memory database only exists on its one connection
+        pool_options = {"poolclass": StaticPool}
+    else:
+        # Every session and background writer (audit writer, system log
+        # handler, scheduler jobs, health probes) gets its own connection,
+        # so one transaction's commit or rollback never touches another's
+        pool_options = {"poolclass": QueuePool, "pool_size": 10, "max_overflow": 20}
     engine = create_engine(
         DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-        echo=False  # Set to True for SQL debugging
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_SECONDS},
+        echo=False,  # Set to True for SQL debugging
+        **pool_options
     )
+    
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL: readers keep working while one connection writes
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
 else:
     # PostgreSQL/MySQL configuration
     engine = create_engine(
@@ -48,20 +68,93 @@ def get_db():
     finally:
         db.close()
 
+class MySQLUpsert(mysql.Insert):
+    """
+    MySQL INSERT with the ON CONFLICT API of the SQLite / PostgreSQL inserts
+    
+    MySQL finds conflicts on any unique key by itself, so index_elements is
+    accepted and ignored.
+    """
+    inherit_cache = True
+    
+    @property
+    def excluded(self):
+        return self.inserted
+    
+    def on_conflict_do_update(self, index_elements=None, set_=None):
+        return self.on_duplicate_key_update(set_)
+    
+    def on_conflict_do_nothing(self, index_elements=None):
+        # INSERT IGNORE reports rowcount 0 for a skipped row like ON CONFLICT
+        # DO NOTHING; ON DUPLICATE KEY UPDATE would count matched rows
+        return self.prefix_with("IGNORE")
+
+def upsert_insert(table):
+    """
+    INSERT construct supporting on_conflict_do_update / on_conflict_do_nothing
+    
+    SQLite and PostgreSQL expose the same ON CONFLICT API through their own
+    dialect insert(); MySQL gets MySQLUpsert, which maps it onto
+    ON DUPLICATE KEY UPDATE and INSERT IGNORE.
+    """
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif engine.dialect.name in ("mysql", "mariadb"):
+        return MySQLUpsert(table)
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {engine.dialect.name}")
+    return insert(table)
+
 def create_tables():
     """
     Create all tables in the database
     """
     # Import all models to ensure they are registered
-    from models.user_models import User, Role, Permission, RolePermission
+    from models.user_models import User, Role, Permission, RolePermission, RefreshToken, TokenRevocationState
     from models.product_models import Category, Product, ProductImage
     from models.settings_models import WebsiteSetting, ContactSetting, SeoSetting, AppearanceSetting
-    from models.audit_models import AuditLog, SystemLog, LoginAttempt, DataExport
+    from models.audit_models import AuditLog, SystemLog, LoginAttempt, DataExport, RequestLatencySample, LoginAttemptHourly, LoginAttemptHourlyIp
+    from models.stats_models import StatCounter, DailyRollup
     
     # Create all tables
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    
+    # Single row whose version auth.token_store bumps with an atomic UPDATE
+    with engine.begin() as connection:
+        connection.execute(
+            upsert_insert(TokenRevocationState.__table__)
+            .values(id=1, version=0)
+            .on_conflict_do_nothing(index_elements=["id"])
+        )
     print("✅ Database tables created successfully!")
 
+def add_missing_columns():
+    """
+    Add model columns missing from existing tables
+    
+    create_all() only creates whole tables, so a column added to an existing
+    model is added here with ALTER TABLE ... ADD COLUMN. Only nullable
+    columns can be added this way; anything else needs a real migration.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable:
+                    print(f"⚠️ Column {table.name}.{column.name} is NOT NULL, add it with a migration")
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                print(f"✅ Added column {table.name}.{column.name}")
+
 def drop_tables():
     """
     Drop all tables in the database (use with caution!)
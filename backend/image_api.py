@@ -1,66 +1,113 @@
 """
 API endpoints cho quản lý ảnh sản phẩm
-Thêm vào main.py
 """
 
-from fastapi import UploadFile, File, Form, HTTPException
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from auth.dependencies import require_permission
+from database import get_db
 from image_manager import image_manager
+from models.product_models import Product
+from models.user_models import User
+from services.image_processing import image_processor, ImageQueueFull
 
-# Thêm các endpoints này vào main.py
+router = APIRouter(tags=["Product Images"])
 
-@app.post("/api/admin/products/{product_id}/images/upload")
+def _get_product(db: Session, product_id: int) -> Product:
+    product = db.query(Product).filter(Product.id == product_id).first()
+    if not product:
+        raise HTTPException(status_code=404, detail="Không tìm thấy sản phẩm")
+    return product
+
+@router.post("/api/admin/products/{product_id}/images/upload")
 async def upload_product_image(
     product_id: int,
     category: str = Form(...),
     image_type: str = Form(...),  # main, thumb, gallery
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    wait: bool = Query(True, description="Chờ resize xong (False: trả về job_id để theo dõi)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_permission("products.update"))
 ):
     """Upload ảnh sản phẩm"""
+    # Truy vấn đồng bộ chạy trong threadpool, event loop chỉ chờ
+    await asyncio.to_thread(_get_product, db, product_id)
     try:
         result = await image_manager.upload_product_image(
             product_id=product_id,
             category=category,
             image_type=image_type,
-            file=file
+            file=file,
+            wait=wait,
+            db=db,
+            uploaded_by=current_user.id
         )
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.delete("/api/admin/products/{product_id}/images/{image_type}")
-async def delete_product_image(
+@router.get("/api/admin/images/jobs/{job_id}")
+async def get_image_job(
+    job_id: str,
+    current_user: User = Depends(require_permission("products.read"))
+):
+    """Trạng thái job resize ảnh: queued, running, done, failed"""
+    job = image_processor.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Không tìm thấy job")
+    return job
+
+@router.delete("/api/admin/products/{product_id}/images/{image_type}")
+def delete_product_image(
     product_id: int,
     category: str,
-    image_type: str  # main, thumb, gallery, all
+    image_type: str,  # main, thumb, gallery, all
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_permission("products.update"))
 ):
     """Xóa ảnh sản phẩm"""
     try:
         success = image_manager.delete_product_image(
             product_id=product_id,
             category=category,
-            image_type=image_type
+            image_type=image_type,
+            db=db
         )
         if success:
             return {"success": True, "message": "Đã xóa ảnh thành công"}
         else:
             return {"success": False, "message": "Không tìm thấy ảnh để xóa"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/admin/products/{product_id}/images")
-async def get_product_images(product_id: int, category: str):
-    """Lấy danh sách ảnh của sản phẩm"""
+@router.get("/api/admin/products/{product_id}/images")
+def get_product_images(
+    product_id: int,
+    category: Optional[str] = None,  # không còn dùng, giữ cho client cũ
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_permission("products.read"))
+):
+    """Lấy danh sách ảnh của sản phẩm (từ bảng product_images)"""
+    _get_product(db, product_id)
     try:
-        images = image_manager.get_product_images(
-            product_id=product_id,
-            category=category
-        )
-        return images
+        return image_manager.get_product_images(db, product_id)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/admin/migrate-images")
-async def migrate_existing_images():
+@router.post("/api/admin/migrate-images")
+async def migrate_existing_images(
+    current_user: User = Depends(require_permission("products.update"))
+):
     """Di chuyển ảnh cũ sang cấu trúc mới"""
     try:
         image_manager.migrate_existing_images()
@@ -68,23 +115,39 @@ async def migrate_existing_images():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/api/admin/images/reconcile")
+async def reconcile_product_images(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_permission("products.update"))
+):
+    """Đồng bộ bảng product_images với file ảnh trên đĩa"""
+    try:
+        return await image_manager.reconcile_product_images(db)
+    except ImageQueueFull:
+        raise HTTPException(status_code=503, detail="Hệ thống đang xử lý nhiều ảnh, vui lòng thử lại sau")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 # API để lấy ảnh sản phẩm (cho frontend)
-@app.get("/api/products/{product_id}/images")
-async def get_product_images_public(product_id: int, category: str):
+@router.get("/api/products/{product_id}/images")
+def get_product_images_public(
+    product_id: int,
+    category: Optional[str] = None,  # không còn dùng, giữ cho client cũ
+    db: Session = Depends(get_db)
+):
     """API public để lấy ảnh sản phẩm"""
     try:
-        images = image_manager.get_product_images(
-            product_id=product_id,
-            category=category
-        )
-        
+        images = image_manager.get_product_images(db, product_id)
+
         # Nếu không có ảnh, trả về ảnh mặc định
         if not images['main']:
             images['main'] = "/static/images/system/no-image.jpg"
-        
+
         if not images['thumb']:
             images['thumb'] = "/static/images/system/no-image.jpg"
-            
+
         return images
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,14 +1,77 @@
 """
 Hệ thống quản lý ảnh sản phẩm
 """
+import asyncio
+import hashlib
 import os
+import re
 import shutil
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from fastapi import UploadFile, HTTPException
-from PIL import Image
+from PIL import ExifTags, Image
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session
 import uuid
 from pathlib import Path
 
+from config import settings
+from database import SessionLocal
+from models.product_models import Product, ProductImage, ImageType
+from services.blob_store import blob_store, variant_key
+from services.image_processing import image_processor, ImageQueueFull
+from services.image_worker import render_variants, render_placeholder, fingerprint_images
+
+# Kích thước tạo thêm cho ảnh main
+MAIN_IMAGE_SIZES = {
+    'thumb': (300, 225),
+    'medium': (600, 450)
+}
+
+# Slug danh mục hợp lệ (chặn ../ trong đường dẫn)
+CATEGORY_PATTERN = re.compile(r"^[a-z0-9-]+$")
+
+# Upload được ghi ra đĩa theo từng chunk, bộ nhớ mỗi upload không vượt quá chunk này
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Đuôi file ảnh được chấp nhận
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+# Định dạng nhận diện từ magic bytes -> (đuôi file lưu, mime type)
+IMAGE_FORMATS = {
+    "JPEG": (".jpg", "image/jpeg"),
+    "PNG": (".png", "image/png"),
+    "WEBP": (".webp", "image/webp"),
+}
+
+# EXIF Orientation xoay ảnh 90° / 270°: ảnh hiển thị có rộng và cao đổi chỗ
+ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+
+# image_type khi upload -> ProductImage.image_type
+ROW_TYPES = {
+    'main': ImageType.MAIN.value,
+    'thumb': ImageType.THUMBNAIL.value,
+    'gallery': ImageType.GALLERY.value
+}
+
+# Tên file ảnh sản phẩm: <product_id>_main.jpg, <product_id>_thumb.png, <product_id>_gallery_<n>.webp
+PRODUCT_FILE_PATTERN = re.compile(r"^(\d+)_(main|thumb|gallery_(\d+))(\.[a-z]+)$")
+
+# Số file mỗi lần gửi sang process pool khi quét đồng bộ
+RECONCILE_BATCH_SIZE = 32
+
+# Cột metadata được đồng bộ từ file khi quét
+METADATA_FIELDS = ("file_name", "file_url", "file_size", "width", "height", "mime_type", "variants")
+
+def detect_image_format(head: bytes) -> Optional[str]:
+    """Định dạng ảnh theo magic bytes ở đầu file (None nếu không hỗ trợ)"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "JPEG"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "PNG"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "WEBP"
+    return None
+
 class ImageManager:
     def __init__(self, base_path: str = "static"):
         self.base_path = Path(base_path)
@@ -41,65 +104,170 @@ class ImageManager:
     def validate_image(self, file: UploadFile) -> bool:
         """Validate file ảnh"""
         # Kiểm tra extension
-        allowed_extensions = {'.jpg', '.jpeg', '.png', '.webp'}
         file_ext = Path(file.filename).suffix.lower()
         
-        if file_ext not in allowed_extensions:
+        if file_ext not in IMAGE_EXTENSIONS:
             raise HTTPException(status_code=400, detail="Chỉ chấp nhận file: jpg, jpeg, png, webp")
         
-        # Kiểm tra kích thước file (max 5MB)
-        if file.size > 5 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="File không được vượt quá 5MB")
+        # Kiểm tra kích thước khai báo (có thể None, giới hạn thật được kiểm tra khi ghi file)
+        if file.size is not None and file.size > settings.MAX_FILE_SIZE:
+            raise HTTPException(status_code=413, detail=self._size_limit_message())
         
         return True
     
-    def resize_image(self, image_path: Path, sizes: dict) -> dict:
-        """Resize ảnh theo các kích thước khác nhau"""
-        results = {}
+    def _size_limit_message(self) -> str:
+        return f"File không được vượt quá {settings.MAX_FILE_SIZE // (1024 * 1024)}MB"
+    
+    async def _stream_to_temp(self, file: UploadFile) -> Tuple[Path, int, str]:
+        """
+        Ghi upload ra thư mục tạm theo từng chunk UPLOAD_CHUNK_SIZE
+        
+        Dừng ngay khi vượt MAX_FILE_SIZE và tính SHA-256 trong lúc ghi.
+        Trả về (đường dẫn file tạm, số byte, sha256 hex).
+        """
+        temp_path = self.uploads_path / f"{uuid.uuid4()}.upload"
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(temp_path, "wb") as buffer:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > settings.MAX_FILE_SIZE:
+                        raise HTTPException(status_code=413, detail=self._size_limit_message())
+                    digest.update(chunk)
+                    buffer.write(chunk)
+            if size == 0:
+                raise HTTPException(status_code=400, detail="File rỗng")
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+        return temp_path, size, digest.hexdigest()
+    
+    def probe_image(self, path: Path) -> Tuple[str, int, int]:
+        """
+        Kiểm tra định dạng bằng magic bytes và đọc kích thước từ header ảnh
+        
+        Không giải mã dữ liệu ảnh; ảnh vượt IMAGE_MAX_PIXELS bị từ chối
+        (chống decompression bomb). Trả về (định dạng, rộng, cao) theo hướng
+        hiển thị, tức là sau khi xoay theo EXIF Orientation như trình duyệt
+        và worker resize (exif_transpose).
+        """
+        with open(path, "rb") as f:
+            image_format = detect_image_format(f.read(16))
+        if image_format is None:
+            raise HTTPException(status_code=400, detail="Nội dung file không phải ảnh jpg, png hoặc webp")
         
         try:
-            with Image.open(image_path) as img:
-                # Convert sang RGB nếu cần
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    img = img.convert('RGB')
-                
-                for size_name, (width, height) in sizes.items():
-                    # Resize giữ tỷ lệ
-                    img_resized = img.copy()
-                    img_resized.thumbnail((width, height), Image.Resampling.LANCZOS)
-                    
-                    # Tạo tên file mới
-                    base_name = image_path.stem
-                    extension = image_path.suffix
-                    new_filename = f"{base_name}_{size_name}{extension}"
-                    new_path = image_path.parent / new_filename
-                    
-                    # Lưu ảnh đã resize
-                    img_resized.save(new_path, quality=85, optimize=True)
-                    results[size_name] = new_path
-                    
+            # Image.open chỉ đọc header, dữ liệu ảnh chưa được giải mã
+            with Image.open(path, formats=[image_format]) as img:
+                width, height = img.size
+                if img.getexif().get(ExifTags.Base.Orientation) in ROTATED_ORIENTATIONS:
+                    width, height = height, width
+        except Image.DecompressionBombError:
+            raise HTTPException(status_code=400, detail="Ảnh có kích thước quá lớn")
+        except Exception:
+            raise HTTPException(status_code=400, detail="File ảnh bị hỏng hoặc không đọc được")
+        
+        if width * height > settings.IMAGE_MAX_PIXELS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Ảnh {width}x{height} vượt quá {settings.IMAGE_MAX_PIXELS // 1_000_000} megapixel"
+            )
+        return image_format, width, height
+    
+    def resize_image(self, image_path: Path, sizes: dict) -> dict:
+        """Resize ảnh theo các kích thước khác nhau (đồng bộ, dùng cho script)"""
+        try:
+            variants = render_variants(str(image_path), sizes)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Lỗi xử lý ảnh: {str(e)}")
         
-        return results
+        return {name: Path(variants[name]["path"]) for name in sizes}
+    
+    def _remove_replaced_files(self, file_path: Path):
+        """
+        Xóa file cùng tên nhưng khác đuôi (ảnh main / thumb cũ hoặc bản resize của nó)
+        
+        Đuôi file theo định dạng thật của ảnh, nên upload PNG thay cho JPEG
+        tạo 1_main.png bên cạnh 1_main.jpg; bản cũ phải bỏ đi để không còn
+        giữ blob và không bị lần quét đồng bộ nhận nhầm. Bản resize cũ chỉ
+        bị xóa khi bản mới được gắn (_link_variants), nên dòng ProductImage
+        vẫn dùng được trong lúc job resize chạy nền.
+        """
+        for extension in IMAGE_EXTENSIONS:
+            if extension != file_path.suffix:
+                file_path.with_suffix(extension).unlink(missing_ok=True)
+    
+    def _link_variants(self, file_path: Path, sha256: str, rendered: dict) -> dict:
+        """
+        Gắn các bản resize (blob theo hash + kích thước) vào tên file của sản phẩm
+        
+        rendered là kết quả từ worker cho các bản vừa tạo; bản đã có sẵn
+        trong blob store chỉ đọc kích thước từ header.
+        """
+        result = {"sizes_created": {}, "variants": {}, "variants_reused": []}
+        for name, box in MAIN_IMAGE_SIZES.items():
+            blob = blob_store.variant_path(sha256, box, file_path.suffix)
+            product_path = file_path.with_name(f"{file_path.stem}_{name}{file_path.suffix}")
+            blob_store.link(blob, product_path)
+            self._remove_replaced_files(product_path)
+            
+            info = rendered.get(variant_key(box))
+            if info is None:
+                with Image.open(blob) as img:
+                    info = {"width": img.width, "height": img.height, "bytes": blob.stat().st_size}
+                result["variants_reused"].append(name)
+            
+            relative = product_path.relative_to(self.base_path)
+            result["sizes_created"][name] = str(relative)
+            result["variants"][name] = {
+                "url": f"/static/{relative.as_posix()}",
+                "width": info["width"],
+                "height": info["height"],
+                "bytes": info["bytes"]
+            }
+        return result
     
     async def upload_product_image(
         self, 
         product_id: int, 
         category: str,
         image_type: str,
-        file: UploadFile
+        file: UploadFile,
+        wait: bool = True,
+        db: Optional[Session] = None,
+        uploaded_by: Optional[int] = None
     ) -> dict:
-        """Upload ảnh sản phẩm"""
+        """
+        Upload ảnh sản phẩm
+        
+        Nội dung được lưu một lần trong blob store theo SHA-256, file của
+        sản phẩm là hard link tới blob. Ảnh main được resize trong process
+        pool (chỉ các kích thước chưa có cho hash này). wait=True chờ kết quả,
+        wait=False trả về job_id ngay để theo dõi qua image_processor.get_job().
+        Có db thì file được ghi vào bảng product_images (variants được bổ
+        sung khi job chạy nền xong).
+        """
         
         # Validate
         self.validate_image(file)
         
+        if not CATEGORY_PATTERN.match(category):
+            raise HTTPException(status_code=400, detail="category không hợp lệ")
+        
         if image_type not in ['main', 'thumb', 'gallery']:
             raise HTTPException(status_code=400, detail="image_type phải là: main, thumb, gallery")
         
+        # Ghi file tạm, sau đó xác định định dạng thật từ nội dung file
+        temp_path, file_size, sha256 = await self._stream_to_temp(file)
+        try:
+            image_format, width, height = self.probe_image(temp_path)
+        except HTTPException:
+            temp_path.unlink(missing_ok=True)
+            raise
+        file_extension, mime_type = IMAGE_FORMATS[image_format]
+        
         # Tạo tên file
-        file_extension = Path(file.filename).suffix.lower()
         if image_type == 'gallery':
             # Đếm số ảnh gallery hiện có
             gallery_count = len(list((self.products_path / category).glob(f"{product_id}_gallery_*{file_extension}")))
@@ -109,43 +277,99 @@ class ImageManager:
         
         # Đường dẫn lưu file
         category_path = self.products_path / category
+        category_path.mkdir(parents=True, exist_ok=True)
         file_path = category_path / filename
         
+        reserved = linked = replaced = False
         try:
-            # Lưu file tạm
-            temp_path = self.uploads_path / f"{uuid.uuid4()}{file_extension}"
-            with open(temp_path, "wb") as buffer:
-                content = await file.read()
-                buffer.write(content)
+            # Lưu vào blob store (trùng hash thì dùng lại blob cũ)
+            blob_path, is_new_blob = blob_store.put(temp_path, sha256, file_extension)
             
-            # Di chuyển file đến vị trí cuối cùng
-            shutil.move(str(temp_path), str(file_path))
-            
-            # Tạo các kích thước khác nhau nếu là ảnh main
-            sizes_created = {}
-            if image_type == 'main':
-                sizes = {
-                    'thumb': (300, 225),
-                    'medium': (600, 450)
-                }
-                sizes_created = self.resize_image(file_path, sizes)
-            
-            return {
+            result = {
                 "success": True,
                 "filename": filename,
                 "path": str(file_path.relative_to(self.base_path)),
                 "url": f"/static/images/products/{category}/{filename}",
-                "sizes_created": {k: str(v.relative_to(self.base_path)) for k, v in sizes_created.items()}
+                "file_size": file_size,
+                "sha256": sha256,
+                "mime_type": mime_type,
+                "width": width,
+                "height": height,
+                "deduplicated": not is_new_blob,
+                "sizes_created": {}
             }
             
+            # Việc của process pool chạy trên blob trước khi đụng tới file của sản phẩm:
+            # hàng đợi đầy thì ảnh hiện tại của sản phẩm vẫn còn nguyên
+            rendered, missing = {}, {}
+            if image_type == 'main':
+                # Các kích thước ảnh main chưa có cho hash này
+                missing = {
+                    variant_key(box): box for box in MAIN_IMAGE_SIZES.values()
+                    if not blob_store.reuse(blob_store.variant_path(sha256, box, file_extension))
+                }
+            if missing and not wait:
+                # Giữ chỗ trong hàng đợi, job được gửi sau khi file đã được gắn
+                image_processor.reserve()
+                reserved = True
+            else:
+                if missing:
+                    rendered = await image_processor.process(blob_path, missing)
+                result["placeholder"] = rendered.get("placeholder") or await self._placeholder(db, sha256, blob_path)
+            
+            # Tạo tên file của sản phẩm, thay file cũ nếu có
+            replaced = file_path.exists()
+            if image_type != 'gallery':
+                self._remove_replaced_files(file_path)
+            blob_store.link(blob_path, file_path)
+            linked = True
+            
+            if image_type == 'main' and not reserved:
+                result.update(await asyncio.to_thread(self._link_variants, file_path, sha256, rendered))
+            
+            # Dòng được commit trước khi gửi job, job chạy nền ghi variants vào đúng dòng này
+            if db is not None:
+                result["image_id"] = await asyncio.to_thread(
+                    self._record_upload, db, product_id, image_type, file_path, result, uploaded_by, reserved
+                )
+            
+            if reserved:
+                finalize = lambda rendered: {
+                    **self._link_variants(file_path, sha256, rendered),
+                    "placeholder": rendered.get("placeholder")
+                }
+                background = finalize
+                if db is not None:
+                    image_id = result["image_id"]
+                    background = lambda rendered: self._save_variants(image_id, sha256, finalize(rendered))
+                result["job_id"] = image_processor.submit(blob_path, missing, finalize=background, reserved=True)
+                reserved = False
+            
+            return result
+            
+        except ImageQueueFull:
+            # Xảy ra trước khi file của sản phẩm bị thay, ảnh cũ vẫn dùng được
+            raise HTTPException(status_code=503, detail="Hệ thống đang xử lý nhiều ảnh, vui lòng thử lại sau")
         except Exception as e:
-            # Cleanup nếu có lỗi
-            if file_path.exists():
-                file_path.unlink()
+            # Cleanup nếu có lỗi; file đã thay ảnh cũ thì giữ lại, xóa đi sẽ mất cả hai
+            temp_path.unlink(missing_ok=True)
+            if linked and not replaced:
+                file_path.unlink(missing_ok=True)
             raise HTTPException(status_code=500, detail=f"Lỗi upload file: {str(e)}")
+        finally:
+            if reserved:
+                image_processor.release()
     
-    def delete_product_image(self, product_id: int, category: str, image_type: str) -> bool:
-        """Xóa ảnh sản phẩm"""
+    def delete_product_image(
+        self,
+        product_id: int,
+        category: str,
+        image_type: str,
+        db: Optional[Session] = None
+    ) -> bool:
+        """Xóa ảnh sản phẩm (và các dòng ProductImage tương ứng nếu có db)"""
+        if not CATEGORY_PATTERN.match(category):
+            raise HTTPException(status_code=400, detail="category không hợp lệ")
         category_path = self.products_path / category
         
         if image_type == 'all':
@@ -157,42 +381,293 @@ class ImageManager:
         deleted_files = []
         for file_path in category_path.glob(pattern):
             file_path.unlink()
-            deleted_files.append(str(file_path))
+            deleted_files.append(file_path.as_posix())
+        
+        if db is not None and deleted_files:
+            db.query(ProductImage).filter(
+                ProductImage.product_id == product_id,
+                ProductImage.file_path.in_(deleted_files)
+            ).delete(synchronize_session=False)
+            db.commit()
         
         return len(deleted_files) > 0
     
-    def get_product_images(self, product_id: int, category: str) -> dict:
-        """Lấy danh sách ảnh của sản phẩm"""
-        category_path = self.products_path / category
+    def _record_upload(self, db: Session, product_id: int, image_type: str, file_path: Path,
+                       result: dict, uploaded_by: Optional[int], pending: bool = False) -> int:
+        """
+        Ghi / cập nhật dòng ProductImage cho file vừa upload (main và thumb chỉ có một dòng)
+        
+        pending=True khi job resize chạy nền sẽ ghi variants và placeholder:
+        giá trị đang có của dòng được giữ tới lúc đó. Truy vấn đồng bộ: gọi
+        qua asyncio.to_thread từ code async. Trả về id của dòng.
+        """
+        row_type = ROW_TYPES[image_type]
+        row = None
+        if image_type != 'gallery':
+            row = db.query(ProductImage).filter(
+                ProductImage.product_id == product_id,
+                ProductImage.image_type == row_type
+            ).order_by(ProductImage.id).first()
+        if row is None:
+            gallery_count = db.query(func.count(ProductImage.id)).filter(
+                ProductImage.product_id == product_id,
+                ProductImage.image_type == ImageType.GALLERY.value
+            ).scalar()
+            row = ProductImage(
+                product_id=product_id,
+                image_type=row_type,
+                sort_order=gallery_count + 1 if image_type == 'gallery' else 0
+            )
+            db.add(row)
+        
+        row.file_name = file_path.name
+        row.file_path = file_path.as_posix()
+        row.file_url = result["url"]
+        row.file_size = result["file_size"]
+        row.width = result["width"]
+        row.height = result["height"]
+        row.mime_type = result["mime_type"]
+        row.sha256 = result["sha256"]
+        if not pending:
+            row.variants = result.get("variants") or None
+            row.placeholder = result.get("placeholder")
+        row.is_active = True
+        row.uploaded_by = uploaded_by
+        db.commit()
+        return row.id
+    
+    def _known_placeholder(self, db: Session, sha256: str) -> Optional[str]:
+        known = db.query(ProductImage.placeholder).filter(
+            ProductImage.sha256 == sha256,
+            ProductImage.placeholder.isnot(None)
+        ).first()
+        return known.placeholder if known else None
+    
+    async def _placeholder(self, db: Optional[Session], sha256: str, blob_path: Path) -> str:
+        """Placeholder của ảnh: dùng lại của ảnh cùng hash nếu đã có, không thì tạo trong process pool"""
+        if db is not None:
+            known = await asyncio.to_thread(self._known_placeholder, db, sha256)
+            if known:
+                return known
+        return await image_processor.run(render_placeholder, str(blob_path))
+    
+    def _save_variants(self, image_id: int, sha256: str, result: dict) -> dict:
+        """
+        Ghi variants và placeholder vào ProductImage khi job resize chạy nền xong
+        
+        Dòng đã được thay bằng ảnh khác trong lúc job chạy thì giữ nguyên.
+        """
+        db = SessionLocal()
+        try:
+            db.query(ProductImage).filter(ProductImage.id == image_id, ProductImage.sha256 == sha256).update(
+                {"variants": result["variants"], "placeholder": result["placeholder"]},
+                synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+        return result
+    
+    def get_product_images(self, db: Session, product_id: int) -> dict:
+        """Lấy danh sách ảnh của sản phẩm từ bảng product_images"""
+        rows = db.query(ProductImage).filter(
+            ProductImage.product_id == product_id,
+            ProductImage.is_active == True
+        ).order_by(ProductImage.sort_order, ProductImage.id).all()
         
         images = {
             'main': None,
             'thumb': None,
-            'gallery': []
+            'gallery': [],
+            'images': []
         }
         
-        # Tìm ảnh main
-        for ext in ['.jpg', '.jpeg', '.png', '.webp']:
-            main_path = category_path / f"{product_id}_main{ext}"
-            if main_path.exists():
-                images['main'] = f"/static/images/products/{category}/{main_path.name}"
-                break
+        for row in rows:
+            if row.image_type == ImageType.MAIN.value and images['main'] is None:
+                images['main'] = row.file_url
+                thumb_variant = (row.variants or {}).get('thumb')
+                if thumb_variant and images['thumb'] is None:
+                    images['thumb'] = thumb_variant['url']
+            elif row.image_type == ImageType.THUMBNAIL.value:
+                # Ảnh thumb upload riêng được ưu tiên hơn bản resize từ ảnh main
+                images['thumb'] = row.file_url
+            elif row.image_type == ImageType.GALLERY.value:
+                images['gallery'].append(row.file_url)
+            
+            images['images'].append({
+                "id": row.id,
+                "image_type": row.image_type,
+                "url": row.file_url,
+                "width": row.width,
+                "height": row.height,
+                "file_size": row.file_size,
+                "mime_type": row.mime_type,
+                "variants": row.variants or {},
+                "placeholder": row.placeholder,
+                "alt_text": row.alt_text,
+                "sort_order": row.sort_order
+            })
         
-        # Tìm ảnh thumb
-        for ext in ['.jpg', '.jpeg', '.png', '.webp']:
-            thumb_path = category_path / f"{product_id}_thumb{ext}"
-            if thumb_path.exists():
-                images['thumb'] = f"/static/images/products/{category}/{thumb_path.name}"
-                break
+        return images
+    
+    def _file_metadata(self, path: Path) -> Optional[dict]:
+        """Metadata của một file ảnh sản phẩm trên đĩa (None nếu không đọc được)"""
+        try:
+            image_format, width, height = self.probe_image(path)
+        except HTTPException:
+            return None
+        relative = path.relative_to(self.base_path).as_posix()
+        variants = {}
+        if "_main" in path.stem:
+            for name in MAIN_IMAGE_SIZES:
+                variant = path.with_name(f"{path.stem}_{name}{path.suffix}")
+                if variant.exists():
+                    with Image.open(variant) as img:
+                        variants[name] = {
+                            "url": f"/static/{variant.relative_to(self.base_path).as_posix()}",
+                            "width": img.width,
+                            "height": img.height,
+                            "bytes": variant.stat().st_size
+                        }
+        return {
+            "file_name": path.name,
+            "file_url": f"/static/{relative}",
+            "file_size": path.stat().st_size,
+            "width": width,
+            "height": height,
+            "mime_type": IMAGE_FORMATS[image_format][1],
+            "variants": variants or None
+        }
+    
+    def _plan_reconcile(self, db: Session) -> dict:
+        """Quét file và so với bảng product_images (chỉ đọc header ảnh, chưa hash)"""
+        product_ids = {product_id for (product_id,) in db.query(Product.id)}
+        rows = db.query(ProductImage).all()
+        by_path = {row.file_path: row for row in rows}
+        by_type = {}
+        for row in sorted(rows, key=lambda row: row.id, reverse=True):
+            if row.image_type != ImageType.GALLERY.value:
+                by_type[(row.product_id, row.image_type)] = row
+        
+        prefix = self.products_path.as_posix() + "/"
+        plan = {"inserts": [], "updates": [], "scanned": 0, "skipped": 0}
+        found, taken = set(), set()
+        for path in sorted(self.products_path.glob("*/*")):
+            match = PRODUCT_FILE_PATTERN.match(path.name)
+            if not match or match.group(4) not in IMAGE_EXTENSIONS or int(match.group(1)) not in product_ids:
+                continue
+            plan["scanned"] += 1
+            product_id, kind, gallery_number = int(match.group(1)), match.group(2), match.group(3)
+            image_type = ROW_TYPES['gallery' if gallery_number else kind]
+            key = path.as_posix()
+            
+            row = by_path.get(key)
+            if row is None and image_type != ImageType.GALLERY.value:
+                row = by_type.get((product_id, image_type))
+                if (product_id, image_type) in taken or (row is not None and Path(row.file_path).is_file()):
+                    # Dòng main / thumb của sản phẩm đang trỏ tới một file khác còn
+                    # tồn tại: file này là bản cũ còn sót, không chuyển dòng qua lại
+                    plan["skipped"] += 1
+                    continue
+                taken.add((product_id, image_type))
+            
+            metadata = self._file_metadata(path)
+            if metadata is None:
+                plan["skipped"] += 1
+                continue
+            found.add(key)
+            
+            if row is None:
+                plan["inserts"].append((path, {
+                    "product_id": product_id,
+                    "image_type": image_type,
+                    "file_path": key,
+                    "sort_order": int(gallery_number) if gallery_number else 0,
+                    "is_active": True,
+                    **metadata
+                }))
+            elif (row.file_path != key or row.placeholder is None
+                  or any(getattr(row, field) != metadata[field] for field in METADATA_FIELDS)):
+                plan["updates"].append((path, {"id": row.id, "file_path": key, **metadata}))
+        
+        moved = {row["id"] for _, row in plan["updates"]}
+        plan["stale_ids"] = [
+            row.id for row in rows
+            if row.file_path.startswith(prefix) and row.file_path not in found and row.id not in moved
+        ]
+        return plan
+    
+    async def _fingerprint(self, paths: List[Path]) -> List[Optional[dict]]:
+        """SHA-256 + placeholder của các file, tính theo lô trong process pool"""
+        batches = [
+            [str(path) for path in paths[start:start + RECONCILE_BATCH_SIZE]]
+            for start in range(0, len(paths), RECONCILE_BATCH_SIZE)
+        ]
+        results = []
+        # Mỗi đợt tối đa bằng số worker, phần còn lại của hàng đợi để dành cho upload
+        wave_size = max(1, image_processor.workers)
+        for start in range(0, len(batches), wave_size):
+            wave = batches[start:start + wave_size]
+            for batch_result in await asyncio.gather(*(image_processor.run(fingerprint_images, batch) for batch in wave)):
+                results.extend(batch_result)
+        return results
+    
+    def _apply_reconcile(self, db: Session, inserts: List[dict], updates: List[dict], stale_ids: List[int]):
+        if inserts:
+            db.execute(insert(ProductImage), inserts)
+        if updates:
+            db.execute(update(ProductImage), updates)
+        if stale_ids:
+            db.query(ProductImage).filter(ProductImage.id.in_(stale_ids)).delete(synchronize_session=False)
+        db.commit()
+    
+    async def reconcile_product_images(self, db: Session) -> dict:
+        """
+        Đồng bộ bảng product_images với các file trong static/images/products
         
-        # Tìm ảnh gallery
-        gallery_files = list(category_path.glob(f"{product_id}_gallery_*"))
-        gallery_files.sort()  # Sắp xếp theo tên
+        - File chưa có dòng: thêm mới (main / thumb cập nhật dòng sẵn có của
+          sản phẩm khi file của dòng đó không còn, kể cả dòng trỏ tới ảnh cũ
+          ngoài thư mục products)
+        - Dòng có metadata khác file hoặc chưa có placeholder: cập nhật
+        - Dòng trỏ tới file trong thư mục products đã bị xóa: xóa dòng
+        Quét và ghi DB chạy trong threadpool; hash và placeholder của các dòng
+        cần thêm / sửa được tính theo lô trong process pool. Thêm / sửa / xóa
+        đều chạy theo lô (executemany). Chạy lại ngay sau đó không đổi gì.
+        """
+        plan = await asyncio.to_thread(self._plan_reconcile, db)
+        pending = plan["inserts"] + plan["updates"]
+        fingerprints = await self._fingerprint([path for path, _ in pending])
         
-        for gallery_file in gallery_files:
-            images['gallery'].append(f"/static/images/products/{category}/{gallery_file.name}")
+        ready = {"inserts": [], "updates": []}
+        skipped = plan["skipped"]
+        for kind in ready:
+            for (path, row), fingerprint in zip(plan[kind], fingerprints[:len(plan[kind])]):
+                if fingerprint is None:
+                    # Bị xóa hoặc hỏng giữa lúc quét và lúc hash
+                    skipped += 1
+                else:
+                    ready[kind].append({**row, **fingerprint})
+            fingerprints = fingerprints[len(plan[kind]):]
+        await asyncio.to_thread(self._apply_reconcile, db, ready["inserts"], ready["updates"], plan["stale_ids"])
         
-        return images
+        result = {
+            "scanned": plan["scanned"],
+            "inserted": len(ready["inserts"]),
+            "updated": len(ready["updates"]),
+            "removed": len(plan["stale_ids"]),
+            "skipped": skipped
+        }
+        print(f"✅ Đồng bộ ảnh sản phẩm: {result}")
+        return result
+    
+    def deduplicate_product_images(self) -> int:
+        """Thay các file ảnh sản phẩm bằng hard link tới blob theo nội dung"""
+        adopted = 0
+        for path in self.products_path.glob("*/*"):
+            if path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS:
+                if blob_store.adopt(path) is not None:
+                    adopted += 1
+        return adopted
     
     def migrate_existing_images(self):
         """Di chuyển ảnh hiện tại sang cấu trúc mới"""
@@ -210,6 +685,10 @@ class ImageManager:
                 shutil.copy2(old_path, backup_path)
         
         print("✅ Đã backup ảnh cũ vào thư mục system/")
+        
+        # Chuyển ảnh sản phẩm đang có vào blob store, các bản trùng nhau dùng chung một blob
+        adopted = self.deduplicate_product_images()
+        print(f"✅ Đã chuyển {adopted} ảnh sản phẩm vào blob store")
         print("💡 Bây giờ bạn có thể upload ảnh mới cho từng sản phẩm")
 
 
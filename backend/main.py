@@ -4,10 +4,11 @@ Entry point for the backend API server
 """
 
 import os
+import asyncio
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 from typing import List, Optional
@@ -20,9 +21,22 @@ from api.v1.products import router as products_router
 from api.v1.settings import router as settings_router
 from api.v1.dashboard import router as dashboard_router
 from api.v1.public import router as public_router
+from api.v1.audit import router as audit_router
 
 # Import database
 from database import create_tables
+from services.audit_writer import audit_writer
+from services.scheduler import scheduler
+from services.log_retention import run_retention
+from services import login_rollup, stat_counters, daily_rollups, activity_feed  # noqa: F401 (installs live feed hooks)
+from services.health import health_monitor
+from services.image_processing import image_processor
+from services.blob_store import collect_garbage as blob_store_gc
+from services.system_log_handler import install_system_logging, start_system_logging, stop_system_logging
+
+# Route logging through the non-blocking queue before anything logs;
+# records wait there until the listener starts in lifespan
+install_system_logging()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -36,10 +50,63 @@ async def lifespan(app: FastAPI):
     create_tables()
     print("✅ Database tables initialized")
     
+    # Backfill the login rollup on first start after it was introduced
+    login_rollup.ensure_rollup()
+    
+    # Bring dashboard counters in line with writes made while we were down
+    stat_counters.reconcile()
+    daily_rollups.ensure_rollups()
+    
+    # Start writing queued log records (console + system_logs)
+    start_system_logging()
+    
+    # Start buffered audit log writer
+    if settings.AUDIT_LOG_MODE != "sync":
+        audit_writer.start()
+    
+    # Start periodic jobs
+    scheduler.add_job(
+        "log_retention", run_retention,
+        interval_seconds=settings.LOG_RETENTION_INTERVAL_HOURS * 3600,
+        initial_delay=60
+    )
+    scheduler.add_job(
+        "login_rollup_prune", login_rollup.prune_ip_rows,
+        interval_seconds=3600,
+        initial_delay=300
+    )
+    scheduler.add_job(
+        "stat_counter_reconcile", stat_counters.reconcile,
+        interval_seconds=settings.STAT_COUNTER_RECONCILE_MINUTES * 60,
+        initial_delay=settings.STAT_COUNTER_RECONCILE_MINUTES * 60
+    )
+    scheduler.add_job(
+        "daily_rollup_rebuild", daily_rollups.rebuild,
+        interval_seconds=24 * 3600,
+        initial_delay=24 * 3600
+    )
+    scheduler.add_job(
+        "image_blob_gc", blob_store_gc,
+        interval_seconds=settings.IMAGE_BLOB_GC_INTERVAL_HOURS * 3600,
+        initial_delay=600
+    )
+    health_monitor.attach_loop(asyncio.get_running_loop())
+    scheduler.add_job(
+        "health_probe", health_monitor.probe,
+        interval_seconds=settings.HEALTH_PROBE_INTERVAL_SECONDS
+    )
+    scheduler.start()
+    
     yield
     
     # Shutdown
     print("🛑 Shutting down Admin Panel API Server...")
+    await scheduler.stop()
+    image_processor.shutdown()
+    
+    # Flush queued audit log entries
+    audit_writer.stop()
+    stop_system_logging()
 
 app = FastAPI(
     title="Admin Panel API - Cửa Hàng Minh Hà", 
@@ -53,6 +120,7 @@ app = FastAPI(
 # Import config
 from config import get_cors_origins, settings
 from middleware.dynamic_cors import DynamicCORSMiddleware
+from middleware.request_timing import RequestTimingMiddleware
 
 # Cấu hình CORS - HOÀN TOÀN DYNAMIC
 cors_origins = get_cors_origins()
@@ -90,6 +158,9 @@ if settings.ENVIRONMENT == "production":
         allowed_hosts=production_hosts
     )
 
+# Request timing - added last so it wraps every other middleware
+app.add_middleware(RequestTimingMiddleware)
+
 # Global exception handler
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
@@ -121,18 +192,35 @@ async def general_exception_handler(request: Request, exc: Exception):
         }
     )
 
-# Health check endpoint
+# Health check endpoints (served from the background probe snapshot)
 @app.get("/health")
 async def health_check():
     """
     Health check endpoint
     """
     return {
-        "status": "healthy",
+        "status": health_monitor.snapshot.get("status", "unknown"),
         "service": "Admin Panel API",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "checked_at": health_monitor.snapshot.get("checked_at")
     }
 
+@app.get("/health/live")
+async def liveness_check():
+    """
+    Liveness: the process serves requests and background probes still run
+    """
+    result = health_monitor.liveness()
+    return JSONResponse(status_code=200 if result["status"] == "healthy" else 503, content=result)
+
+@app.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness: the database is reachable and static storage has free space
+    """
+    result = health_monitor.readiness()
+    return JSONResponse(status_code=200 if result["status"] == "healthy" else 503, content=result)
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -154,12 +242,21 @@ app.include_router(users_router, prefix="/api/v1")
 app.include_router(products_router, prefix="/api/v1")
 app.include_router(settings_router, prefix="/api/v1")
 app.include_router(dashboard_router, prefix="/api/v1")
+app.include_router(audit_router, prefix="/api/v1")
 app.include_router(public_router, prefix="/api/v1")  # Public API for frontend
 
+# Product image upload / management
+from image_api import router as image_router
+app.include_router(image_router)
+
 # Include proxy router for CORS bypass
 from routes.proxy import router as proxy_router
 app.include_router(proxy_router)
 
+# Resized images and WebP/AVIF negotiation; must be registered before the /static mount
+from routes.image_variants import router as image_variants_router
+app.include_router(image_variants_router)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -970,30 +1067,6 @@ async def search_products(q: str):
     results = [p for p in sample_products if q.lower() in p["title"].lower()]
     return {"query": q, "results": results, "total": len(results)}
 
-@app.get("/static/images/{image_name}")
-async def get_image(image_name: str):
-    """Serve hình ảnh sản phẩm"""
-    image_path = f"static/images/{image_name}"
-    if os.path.exists(image_path):
-        return FileResponse(image_path)
-    else:
-        # Trả về hình ảnh mặc định nếu không tìm thấy
-        default_path = "static/images/product1.jpg"
-        if os.path.exists(default_path):
-            return FileResponse(default_path)
-        else:
-            raise HTTPException(status_code=404, detail="Image not found")
-
-# Additional middleware for request logging (optional)
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """
-    Log all requests (optional middleware)
-    """
-    # You can add request logging here
-    response = await call_next(request)
-    return response
-
 if __name__ == "__main__":
     import uvicorn
     
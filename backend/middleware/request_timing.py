@@ -0,0 +1,143 @@
+"""
+Request Timing Middleware
+Đo thời gian xử lý từng request và gắn vào audit log
+
+A pure ASGI middleware (no BaseHTTPMiddleware task hop) that times every
+HTTP request and keeps a RequestContext in a context variable for its
+duration. Audit entries written during the request through the buffered
+writer are held on that context and, once the response has been sent, are
+stamped with method, endpoint (the route template), response_status and
+duration_ms before being queued.
+
+Requests that produced no audit entry are sampled at REQUEST_SAMPLE_RATE
+into request_latency_samples, so slow endpoints can be found without
+logging every request.
+"""
+
+import random
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Table
+
+from config import settings
+from database import engine
+from models.audit_models import RequestLatencySample
+from services.audit_writer import audit_writer
+
+class RequestContext:
+    """Per-request timing state shared with code running inside the request"""
+    
+    def __init__(self, scope: Dict[str, Any]):
+        self.scope = scope
+        self.method = scope.get("method")
+        self.started = time.perf_counter()
+        self.status_code: Optional[int] = None
+        self.pending_rows: List[Tuple[Table, Dict[str, Any]]] = []
+    
+    @property
+    def endpoint(self) -> Optional[str]:
+        """Route template once routing has happened, None for unmatched paths"""
+        route = self.scope.get("route")
+        return getattr(route, "path", None)
+    
+    @property
+    def client_ip(self) -> Optional[str]:
+        client = self.scope.get("client")
+        return client[0] if client else None
+    
+    @property
+    def user_agent(self) -> Optional[str]:
+        for name, value in self.scope.get("headers", []):
+            if name == b"user-agent":
+                return value.decode("latin-1")[:500]
+        return None
+    
+    def elapsed_ms(self) -> int:
+        return int((time.perf_counter() - self.started) * 1000)
+
+_current_request: ContextVar[Optional[RequestContext]] = ContextVar("current_request", default=None)
+
+def current_request() -> Optional[RequestContext]:
+    """The RequestContext of the request being handled, if any"""
+    return _current_request.get()
+
+def defer_row(table: Table, row: Dict[str, Any]) -> bool:
+    """
+    Hold an audit row until the current request finishes
+    
+    Returns:
+        False outside a request; the caller should submit the row itself
+    """
+    ctx = _current_request.get()
+    if ctx is None:
+        return False
+    ctx.pending_rows.append((table, row))
+    return True
+
+class RequestTimingMiddleware:
+    """Times HTTP requests and stamps audit rows written while handling them"""
+    
+    def __init__(self, app, sample_rate: Optional[float] = None):
+        self.app = app
+        self.sample_rate = settings.REQUEST_SAMPLE_RATE if sample_rate is None else sample_rate
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        ctx = RequestContext(scope)
+        token = _current_request.set(ctx)
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                ctx.status_code = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            # Let the server turn it into a 500, but still record the timing
+            ctx.status_code = ctx.status_code or 500
+            raise
+        finally:
+            _current_request.reset(token)
+            self._finish(ctx)
+    
+    def _finish(self, ctx: RequestContext):
+        duration_ms = ctx.elapsed_ms()
+        
+        if ctx.pending_rows:
+            for table, row in ctx.pending_rows:
+                row["method"] = row.get("method") or ctx.method
+                row["endpoint"] = row.get("endpoint") or ctx.endpoint or ctx.scope.get("path")
+                row["response_status"] = row.get("response_status") or ctx.status_code
+                row["duration_ms"] = duration_ms
+                row["user_ip"] = row.get("user_ip") or ctx.client_ip
+                row["user_agent"] = row.get("user_agent") or ctx.user_agent
+            self._submit(ctx.pending_rows)
+            return
+        
+        if ctx.endpoint and self.sample_rate > 0 and random.random() < self.sample_rate:
+            self._submit([(RequestLatencySample.__table__, {
+                "method": ctx.method,
+                "endpoint": ctx.endpoint,
+                "response_status": ctx.status_code,
+                "duration_ms": duration_ms,
+                "created_at": datetime.now(timezone.utc),
+            })])
+    
+    def _submit(self, rows: List[Tuple[Table, Dict[str, Any]]]):
+        """Queue rows on the audit writer, writing directly if it refuses them"""
+        leftover = [(table, row) for table, row in rows if not audit_writer.submit(table, row)]
+        if not leftover:
+            return
+        try:
+            with engine.begin() as conn:
+                for table, row in leftover:
+                    conn.execute(table.insert(), row)
+        except Exception as e:
+            print(f"❌ Failed to write {len(leftover)} request timing rows: {e}")
@@ -1,12 +1,15 @@
 # Admin Panel Database Models
-from .user_models import User, Role, Permission, RolePermission
+from .user_models import User, Role, Permission, RolePermission, RefreshToken, TokenRevocationState
 from .product_models import Category, Product, ProductImage
 from .settings_models import WebsiteSetting, ContactSetting
-from .audit_models import AuditLog
+from .audit_models import AuditLog, RequestLatencySample, LoginAttemptHourly, LoginAttemptHourlyIp
+from .stats_models import StatCounter, DailyRollup
 
 __all__ = [
     "User", "Role", "Permission", "RolePermission",
+    "RefreshToken", "TokenRevocationState",
     "Category", "Product", "ProductImage", 
     "WebsiteSetting", "ContactSetting",
-    "AuditLog"
+    "AuditLog", "RequestLatencySample", "LoginAttemptHourly", "LoginAttemptHourlyIp",
+    "StatCounter", "DailyRollup"
 ]
\ No newline at end of file
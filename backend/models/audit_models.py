@@ -6,6 +6,7 @@ Tracks all changes and activities for security and compliance
 from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
 import enum
 
 # Import Base from database module
@@ -93,18 +94,56 @@ class AuditLog(Base):
         """
         Convenience method to create audit log entries
         """
-        log_entry = cls(
+        log_entry = cls(**cls.build_row(
             user_id=user_id,
             action=action,
             resource=resource,
-            resource_id=str(resource_id) if resource_id else None,
+            resource_id=resource_id,
             description=description,
             old_values=old_values,
             new_values=new_values,
             **kwargs
-        )
+        ))
         session.add(log_entry)
         return log_entry
+    
+    @classmethod
+    def build_row(cls, user_id=None, action=None, resource=None,
+                  resource_id=None, description=None, old_values=None,
+                  new_values=None, **kwargs):
+        """
+        Build a plain row dict for bulk inserts (see services.audit_writer)
+        
+        Keys that are not columns are kept under tags instead of being dropped.
+        Every column except the primary key is present (None or the column
+        default when not given): an executemany takes its column list from
+        the first row, so rows of one batch must all have the same keys.
+        """
+        columns = cls.__table__.columns.keys()
+        row = {
+            column.name: column.default.arg if column.default is not None and column.default.is_scalar else None
+            for column in cls.__table__.columns if not column.primary_key
+        }
+        row.update({
+            "user_id": user_id,
+            "action": action,
+            "resource": resource,
+            "resource_id": str(resource_id) if resource_id else None,
+            "description": description,
+            "old_values": old_values,
+            "new_values": new_values,
+            "level": LogLevel.INFO.value,
+            "created_at": datetime.now(timezone.utc),
+        })
+        extra = {}
+        for key, value in kwargs.items():
+            if key in columns:
+                row[key] = value
+            else:
+                extra[key] = value
+        if extra:
+            row["tags"] = {**(row.get("tags") or {}), **extra}
+        return row
 
 class SystemLog(Base):
     """
@@ -179,6 +218,42 @@ class LoginAttempt(Base):
     # Relationships
     user = relationship("User")
 
+class LoginAttemptHourly(Base):
+    """
+    Login Attempt Rollup - Attempts per hour and result, kept up to date by
+    log_login_attempt (see services.login_rollup)
+    """
+    __tablename__ = "login_attempt_hourly"
+    
+    bucket = Column(DateTime(timezone=True), primary_key=True)  # Start of the hour (UTC)
+    success = Column(String(10), primary_key=True)  # success, failure
+    attempts = Column(Integer, nullable=False, default=0)
+    distinct_ips = Column(Integer, nullable=False, default=0)
+
+class LoginAttemptHourlyIp(Base):
+    """
+    IPs already counted in login_attempt_hourly.distinct_ips for recent buckets
+    """
+    __tablename__ = "login_attempt_hourly_ips"
+    
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    success = Column(String(10), primary_key=True)
+    ip_address = Column(String(45), primary_key=True)
+
+class RequestLatencySample(Base):
+    """
+    Request Latency Samples - Sampled timing of requests that wrote no audit entry
+    (see middleware.request_timing)
+    """
+    __tablename__ = "request_latency_samples"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    method = Column(String(10), nullable=False)
+    endpoint = Column(String(255), nullable=False, index=True)  # Route template, e.g. /api/v1/products/{product_id}
+    response_status = Column(Integer, nullable=True)
+    duration_ms = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
 class DataExport(Base):
     """
     Data Export table - Tracks data exports for compliance
@@ -182,6 +182,9 @@ class ProductImage(Base):
     width = Column(Integer, nullable=True)
     height = Column(Integer, nullable=True)
     mime_type = Column(String(100), nullable=True)
+    sha256 = Column(String(64), nullable=True)  # content hash (blob store key)
+    variants = Column(JSON, nullable=True)  # {"thumb": {"url", "width", "height", "bytes"}, ...}
+    placeholder = Column(Text, nullable=True)  # tiny base64 JPEG data URI shown while loading
     
     # Display settings
     alt_text = Column(String(255), nullable=True)
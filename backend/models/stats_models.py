@@ -0,0 +1,35 @@
+"""
+Statistics Models for Admin Panel
+Precomputed counters for the dashboard
+"""
+
+from sqlalchemy import Column, Integer, String, Date, DateTime
+from sqlalchemy.sql import func
+
+# Import Base from database module
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database import Base
+
+class StatCounter(Base):
+    """
+    Stat Counters table - Named counters kept in step with every write
+    (see services.stat_counters)
+    """
+    __tablename__ = "stat_counters"
+    
+    name = Column(String(100), primary_key=True)  # e.g. products.total, users.status.active
+    value = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class DailyRollup(Base):
+    """
+    Daily Rollups table - Per-day event counts for chart series
+    (see services.daily_rollups)
+    """
+    __tablename__ = "daily_rollups"
+    
+    metric = Column(String(50), primary_key=True)  # users.registered, products.created
+    day = Column(Date, primary_key=True)  # UTC day
+    value = Column(Integer, nullable=False, default=0)
@@ -148,4 +148,40 @@ class RolePermission(Base):
     # Relationships
     role = relationship("Role")
     permission = relationship("Permission")
-    granter = relationship("User")
\ No newline at end of file
+    granter = relationship("User")
+
+class RefreshToken(Base):
+    """
+    Refresh Tokens table - One row per issued refresh token (jti)
+    Tokens issued from the same login share a family_id; each refresh rotates
+    the token and marks the previous one as used.
+    """
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String(64), unique=True, nullable=False, index=True)
+    family_id = Column(String(64), nullable=False, index=True)
+    parent_jti = Column(String(64), nullable=True)  # Token this one replaced
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    
+    # Lifecycle
+    issued_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    used_at = Column(DateTime(timezone=True), nullable=True)  # Rotated away
+    revoked_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    revoked_reason = Column(String(50), nullable=True)  # logout, reuse_detected
+    
+    # Relationships
+    user = relationship("User")
+
+class TokenRevocationState(Base):
+    """
+    Single-row table holding the revocation version counter
+    Bumped on every revocation so each worker can tell when its in-memory
+    revocation set is out of date.
+    """
+    __tablename__ = "token_revocation_state"
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
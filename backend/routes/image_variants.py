@@ -0,0 +1,154 @@
+"""
+🖼️ Image Variant Routes - Ảnh resize theo yêu cầu và chọn định dạng theo Accept
+
+GET /static/img/{w}x{h}/{path} serves static/{path} resized to one of the
+IMAGE_VARIANT_SIZES. GET /static/images/{path} serves the image itself.
+Both routes are registered before the /static mount so they take
+precedence over plain static files.
+
+When the Accept header names WebP or AVIF (services.image_formats), those
+encodings are rendered too and the smallest of the acceptable files is
+sent, with Vary: Accept. Everything is rendered in the image process pool
+the first time it is asked for and kept in the LRU disk cache
+(services.variant_cache). If an alternate cannot be rendered (queue full,
+encoder error) the original format is served instead.
+"""
+import asyncio
+import hashlib
+import mimetypes
+from pathlib import Path
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import FileResponse
+
+from config import settings
+from image_manager import IMAGE_EXTENSIONS
+from services.image_formats import ImageFormat, acceptable_formats
+from services.image_processing import image_processor, ImageQueueFull
+from services.image_worker import render_variant
+from services.variant_cache import variant_cache
+
+router = APIRouter(tags=["Images"])
+
+STATIC_ROOT = Path("static").resolve()
+
+def _parse_size(size: str) -> tuple:
+    width, _, height = size.partition("x")
+    try:
+        box = (int(width), int(height))
+    except ValueError:
+        box = None
+    if box not in settings.image_variant_sizes_list:
+        raise HTTPException(status_code=404, detail=f"Kích thước {size} không được hỗ trợ")
+    return box
+
+def _resolve_source(image_path: str, base: Path = STATIC_ROOT) -> Path:
+    source = (base / image_path).resolve()
+    if STATIC_ROOT not in source.parents or not source.is_file():
+        raise HTTPException(status_code=404, detail="Không tìm thấy ảnh")
+    return source
+
+class _Renderer:
+    """Cached renders of one source with fixed resize parameters"""
+
+    def __init__(self, source: Path, box: Optional[Tuple[int, int]], fit: str, quality: int):
+        stat = source.stat()
+        # Hard links to the same blob share an inode, so they share renders too
+        self.identity = f"{stat.st_dev}:{stat.st_ino}:{stat.st_mtime_ns}:{stat.st_size}|{box}|{fit}|{quality}"
+        self.source = source
+        self.box = box
+        self.fit = fit
+        self.quality = quality
+
+    async def render(self, fmt: Optional[ImageFormat] = None) -> Path:
+        extension = fmt.extension if fmt else self.source.suffix.lower()
+        key = hashlib.sha256(f"{self.identity}|{extension}".encode()).hexdigest()[:40] + extension
+        return await variant_cache.get(
+            key,
+            lambda destination: image_processor.run(
+                render_variant, str(self.source), str(destination),
+                self.box, self.fit, self.quality, fmt.name if fmt else None
+            )
+        )
+
+async def _smallest(request: Request, renderer: _Renderer, base: Path) -> Tuple[Path, str]:
+    """base or the smallest alternate format the client accepts"""
+    formats = [
+        fmt for fmt in acceptable_formats(request.headers.get("accept"))
+        if fmt.extension != base.suffix.lower()
+    ]
+    # Sized before the alternates are rendered: adding them to the cache
+    # can evict base (and one alternate can evict another)
+    best, media_type = base, mimetypes.guess_type(base.name)[0]
+    try:
+        best_size = base.stat().st_size
+    except FileNotFoundError:
+        best_size = None
+    results = await asyncio.gather(*(renderer.render(fmt) for fmt in formats), return_exceptions=True)
+    for fmt, result in zip(formats, results):
+        if isinstance(result, Exception):
+            print(f"⚠️ {fmt.name} for {renderer.source.name} not available: {result}")
+            continue
+        try:
+            size = result.stat().st_size
+        except FileNotFoundError:
+            continue
+        if best_size is None or size < best_size:
+            best, media_type, best_size = result, fmt.media_type, size
+    if best == base and not base.exists():
+        # Evicted in the meantime: render it again (puts it back in the cache)
+        best = await renderer.render()
+    return best, media_type
+
+def _file_response(request: Request, path: Path, media_type: str, headers: dict) -> Response:
+    # Cached renders get a new mtime on every hit, so tag them by cache key instead
+    if path.parent == variant_cache.root:
+        headers = {**headers, "ETag": f'"{path.stem}"'}
+    response = FileResponse(path, media_type=media_type, headers=headers, stat_result=path.stat())
+    if_none_match = request.headers.get("if-none-match", "")
+    if response.headers["etag"] in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={
+            **headers, "ETag": response.headers["etag"]
+        })
+    return response
+
+@router.api_route("/static/img/{size}/{image_path:path}", methods=["GET", "HEAD"])
+async def get_image_variant(
+    request: Request,
+    size: str,
+    image_path: str,
+    fit: str = Query("contain", regex="^(contain|cover)$", description="contain: giữ tỷ lệ, cover: cắt cho vừa khung"),
+    quality: int = Query(settings.IMAGE_VARIANT_QUALITY, ge=30, le=95)
+):
+    """
+    Ảnh static/{image_path} resize về {w}x{h}, dạng WebP/AVIF nếu trình duyệt hỗ trợ và nhỏ hơn
+    """
+    box = _parse_size(size)
+    source = _resolve_source(image_path)
+    if source.suffix.lower() not in IMAGE_EXTENSIONS:
+        raise HTTPException(status_code=404, detail="Không tìm thấy ảnh")
+
+    renderer = _Renderer(source, box, fit, quality)
+    try:
+        base = await renderer.render()
+    except ImageQueueFull:
+        raise HTTPException(status_code=503, detail="Hệ thống đang xử lý nhiều ảnh", headers={"Retry-After": "1"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Lỗi xử lý ảnh: {str(e)}")
+
+    path, media_type = await _smallest(request, renderer, base)
+    return _file_response(request, path, media_type, {
+        "Cache-Control": f"public, max-age={settings.IMAGE_VARIANT_MAX_AGE_SECONDS}",
+        "Vary": "Accept",
+    })
+
+@router.api_route("/static/images/{image_path:path}", methods=["GET", "HEAD"])
+async def get_image(request: Request, image_path: str):
+    """Serve hình ảnh (WebP/AVIF nếu trình duyệt hỗ trợ và nhỏ hơn)"""
+    source = _resolve_source(image_path, STATIC_ROOT / "images")
+    if source.suffix.lower() not in IMAGE_EXTENSIONS:
+        return _file_response(request, source, mimetypes.guess_type(source.name)[0], {})
+
+    path, media_type = await _smallest(request, _Renderer(source, None, "contain", settings.IMAGE_VARIANT_QUALITY), source)
+    return _file_response(request, path, media_type, {"Vary": "Accept"})
@@ -0,0 +1,36 @@
+"""
+Audit Log Schemas for Admin Panel
+Pydantic models for browsing and exporting audit log entries
+"""
+
+from datetime import datetime
+from typing import List, Optional, Any
+from pydantic import BaseModel, Field
+
+class AuditLogResponse(BaseModel):
+    id: int
+    user_id: Optional[int] = None
+    username: Optional[str] = None
+    action: str
+    resource: str
+    resource_id: Optional[str] = None
+    description: Optional[str] = None
+    old_values: Optional[Any] = None
+    new_values: Optional[Any] = None
+    user_ip: Optional[str] = None
+    user_agent: Optional[str] = None
+    method: Optional[str] = None
+    endpoint: Optional[str] = None
+    response_status: Optional[int] = None
+    duration_ms: Optional[int] = None
+    level: Optional[str] = None
+    success: Optional[str] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class AuditLogListResponse(BaseModel):
+    items: List[AuditLogResponse]
+    limit: int
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to fetch the next page")
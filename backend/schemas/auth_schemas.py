@@ -28,6 +28,7 @@ class RefreshTokenRequest(BaseModel):
 class RefreshTokenResponse(BaseModel):
     """Refresh token response schema"""
     access_token: str = Field(..., description="New JWT access token")
+    refresh_token: Optional[str] = Field(None, description="Rotated JWT refresh token")
     token_type: str = Field(default="bearer", description="Token type")
     expires_in: int = Field(..., description="Token expiration time in seconds")
 
@@ -32,7 +32,7 @@ class ActivityStatsOverview(BaseModel):
 class SystemHealthOverview(BaseModel):
     status: str
     uptime: str
-    last_backup: datetime
+    last_backup: Optional[datetime] = None
 
 class DashboardOverviewResponse(BaseModel):
     user_stats: UserStatsOverview
@@ -85,6 +85,43 @@ class ProductStatsResponse(BaseModel):
     daily_products: List[DailyProduct]
     price_distribution: Dict[str, int]
 
+class PriceBucket(BaseModel):
+    label: str
+    lower: float
+    upper: float
+    count: int
+
+class InventoryValuation(BaseModel):
+    stock_units: int
+    cost_value: float
+    retail_value: float
+    retail_value_with_cost: float
+    products_without_cost: int
+
+class CategoryMargin(BaseModel):
+    category_id: int
+    category: str
+    products: int
+    stock_units: int
+    cost_value: float
+    retail_value: float
+    margin: float
+    margin_percent: Optional[float] = None
+
+class PriceAnalyticsResponse(BaseModel):
+    catalog_version: int
+    price_field: str
+    products: int
+    priced_products: int
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    mean_price: Optional[float] = None
+    out_of_range: int
+    histogram: List[PriceBucket]
+    quantiles: Dict[str, Optional[float]]
+    valuation: InventoryValuation
+    margin_by_category: List[CategoryMargin]
+
 # ============================================================================
 # ACTIVITY SCHEMAS
 # ============================================================================
@@ -116,10 +153,14 @@ class SystemHealthResponse(BaseModel):
     recent_errors: int
     failed_logins: int
     uptime_percentage: float
-    last_backup: datetime
-    memory_usage: float
-    cpu_usage: float
-    disk_usage: float
+    last_backup: Optional[datetime] = None
+    memory_usage: Optional[float] = None
+    cpu_usage: Optional[float] = None
+    disk_usage: Optional[float] = None
+    database_latency_ms: Optional[float] = None
+    event_loop_lag_ms: Optional[float] = None
+    checked_at: Optional[datetime] = None
+    details: Dict[str, Any] = {}
 
 # ============================================================================
 # CHART DATA SCHEMAS
@@ -170,4 +211,12 @@ class SystemStatsResponse(BaseModel):
     api_calls_today: int
     average_response_time: float
     active_sessions: int
-    cache_hit_rate: float
\ No newline at end of file
+    cache_hit_rate: float
+
+# ============================================================================
+# LIVE STREAM SCHEMAS
+# ============================================================================
+
+class StreamTicketResponse(BaseModel):
+    ticket: str
+    expires_in: int  # seconds
@@ -85,6 +85,9 @@ class ProductImageResponse(BaseModel):
     alt_text: Optional[str] = None
     is_main: bool
     sort_order: int
+    width: Optional[int] = None
+    height: Optional[int] = None
+    placeholder: Optional[str] = None  # base64 data URI to paint until the image loads
 
 class ProductResponse(ProductBase):
     id: int
@@ -106,6 +109,9 @@ class ProductResponse(ProductBase):
     rating_average: float = 0.0
     rating_count: int = 0
     main_image_url: Optional[str] = None
+    main_image_width: Optional[int] = None
+    main_image_height: Optional[int] = None
+    main_image_placeholder: Optional[str] = None
     category: Optional[CategoryInfo] = None
     main_image: Optional[str] = None
     images: Optional[List[ProductImageResponse]] = []
@@ -0,0 +1 @@
+# Background services (writers, caches, scheduled jobs) for the Admin Panel API
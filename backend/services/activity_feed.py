@@ -0,0 +1,63 @@
+"""
+Live Activity Feed
+Đẩy các bản ghi audit log mới lên event bus cho dashboard trực tiếp
+
+Audit entries reach the database two ways: in batches from the buffered
+audit writer, or in the caller's own transaction (commit=False, sync mode).
+Both are published as "activity" events once they are committed.
+Importing this module installs the hooks.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from sqlalchemy import Table, event
+from sqlalchemy.orm import Session
+
+from models.audit_models import AuditLog
+from services.audit_writer import audit_writer
+from services.event_bus import event_bus
+
+ACTIVITY_FIELDS = (
+    "id", "user_id", "username", "action", "resource", "resource_id",
+    "description", "endpoint", "response_status", "duration_ms", "created_at"
+)
+
+# Session.info key holding entries of the open transaction until it commits
+_PENDING_KEY = "activity_feed_entries"
+
+def _serialize(values: Dict[str, Any]) -> Dict[str, Any]:
+    data = {}
+    for field in ACTIVITY_FIELDS:
+        value = values.get(field)
+        data[field] = value.isoformat() if isinstance(value, datetime) else value
+    if data["created_at"] is None:
+        # Server default not yet loaded on the flushed object
+        data["created_at"] = datetime.now(timezone.utc).isoformat()
+    return data
+
+def _on_rows_written(table: Table, rows: List[Dict[str, Any]]):
+    if table is AuditLog.__table__:
+        for row in rows:
+            event_bus.publish("activity", _serialize(row))
+
+audit_writer.add_listener(_on_rows_written)
+
+@event.listens_for(Session, "after_flush")
+def _collect_entries(session: Session, flush_context):
+    entries = [obj for obj in session.new if isinstance(obj, AuditLog)]
+    if entries:
+        # Read from __dict__: attributes such as server defaults are not
+        # loaded yet and must not trigger SQL here
+        session.info.setdefault(_PENDING_KEY, []).extend(
+            _serialize(obj.__dict__) for obj in entries
+        )
+
+@event.listens_for(Session, "after_commit")
+def _publish_entries(session: Session):
+    for data in session.info.pop(_PENDING_KEY, []):
+        event_bus.publish("activity", data)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_entries(session: Session):
+    session.info.pop(_PENDING_KEY, None)
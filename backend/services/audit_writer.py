@@ -0,0 +1,143 @@
+"""
+Buffered Audit Log Writer
+Ghi audit log theo lô ở background thay vì commit trong từng request
+
+Requests enqueue rows; a background thread batch-inserts them every
+AUDIT_FLUSH_INTERVAL_MS milliseconds or as soon as AUDIT_BATCH_SIZE rows are
+waiting, using one executemany INSERT per table inside a single transaction.
+The writer is started and drained by the application lifespan. When it is
+not running (scripts, tests, AUDIT_LOG_MODE=sync) submit() returns False and
+callers write synchronously instead.
+"""
+
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import Table
+
+from config import settings
+from database import engine
+
+class BufferedWriter:
+    """Queue-backed batch writer for append-only tables"""
+    
+    def __init__(self, flush_interval_ms: int = 500, batch_size: int = 100, max_queue_size: int = 10000):
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Tuple[Table, Dict[str, Any]]]" = queue.Queue(maxsize=max_queue_size)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self._listeners: List[Callable[[Table, List[Dict[str, Any]]], None]] = []
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self):
+        """Start the background flush thread"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 10.0):
+        """Stop the thread after writing everything still queued"""
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+    
+    def add_listener(self, callback: Callable[[Table, List[Dict[str, Any]]], None]):
+        """Call callback(table, rows) on the writer thread after each committed batch"""
+        self._listeners.append(callback)
+    
+    def qsize(self) -> int:
+        return self._queue.qsize()
+    
+    def submit(self, table: Table, row: Dict[str, Any]) -> bool:
+        """
+        Enqueue a row for the next batch
+        
+        Returns:
+            False if the writer is not running or the queue is full; the
+            caller should then write the row itself
+        """
+        if not self.running:
+            return False
+        try:
+            self._queue.put_nowait((table, row))
+            return True
+        except queue.Full:
+            return False
+    
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+    
+    def _collect(self) -> List[Tuple[Table, Dict[str, Any]]]:
+        """Wait for the first row, then gather until batch size or interval"""
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval))
+        except queue.Empty:
+            return batch
+        
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                # On shutdown take whatever is left without waiting
+                try:
+                    while len(batch) < self.batch_size:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    pass
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+    
+    def _flush(self, batch: List[Tuple[Table, Dict[str, Any]]]):
+        """Insert a batch with one executemany per table and row shape in one transaction"""
+        rows_by_table = defaultdict(list)
+        rows_by_shape = defaultdict(list)
+        for table, row in batch:
+            rows_by_table[table].append(row)
+            # executemany takes its column list from the first row, so rows
+            # with other keys would lose values or fail the whole batch
+            rows_by_shape[(table, frozenset(row))].append(row)
+        
+        try:
+            with engine.begin() as conn:
+                for (table, _), rows in rows_by_shape.items():
+                    conn.execute(table.insert(), rows)
+            self.rows_written += len(batch)
+        except Exception as e:
+            self.rows_dropped += len(batch)
+            print(f"❌ Audit writer failed to write {len(batch)} rows: {e}")
+            return
+        
+        for callback in self._listeners:
+            for table, rows in rows_by_table.items():
+                try:
+                    callback(table, rows)
+                except Exception as e:
+                    print(f"❌ Audit writer listener failed: {e}")
+
+# Shared writer instance (started by main.lifespan)
+audit_writer = BufferedWriter(
+    flush_interval_ms=settings.AUDIT_FLUSH_INTERVAL_MS,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    max_queue_size=settings.AUDIT_QUEUE_SIZE
+)
@@ -0,0 +1,170 @@
+"""
+Image Blob Store
+Lưu ảnh theo nội dung (SHA-256): mỗi ảnh giống nhau chỉ lưu và resize một lần
+
+Layout under IMAGE_BLOB_DIR (static/images/blobs):
+
+    ab/cd/abcd…ef.jpg            original upload, named by its SHA-256
+    ab/cd/abcd…ef_300x225.jpg    variant fitted into 300x225
+
+Two levels of two-hex-digit shards keep every directory small. Variants
+are keyed by source hash plus box size, so an identical upload reuses the
+resized files instead of sending them through the process pool again.
+
+Per-product files (static/images/products/<category>/<id>_main.jpg, …)
+are hard links to blobs. Existing URLs keep working and the link count is
+the reference count: a blob whose st_nlink is 1 is only held by the store.
+collect_garbage() removes those once they are older than
+IMAGE_BLOB_GC_MIN_AGE_SECONDS (so a blob is never removed between put()
+and link()). An existing blob that is about to be linked again is pinned
+with a <blob>.pin marker file instead of touching the blob: product files
+share its inode, and a new mtime would change their ETags and the
+variant cache keys. On filesystems without hard links, link() falls back to a
+copy; the product file is then independent and GC can still drop the blob.
+"""
+
+import hashlib
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from config import settings
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Marker next to a blob that reuse() handed out: GC keeps the blob while it is fresh
+PIN_SUFFIX = ".pin"
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def variant_key(box: Tuple[int, int]) -> str:
+    return f"{box[0]}x{box[1]}"
+
+class BlobStore:
+    """Content-addressed files with hard-linked per-product names"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _shard(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / sha256[2:4]
+
+    def blob_path(self, sha256: str, extension: str) -> Path:
+        return self._shard(sha256) / f"{sha256}{extension}"
+
+    def variant_path(self, sha256: str, box: Tuple[int, int], extension: str) -> Path:
+        return self._shard(sha256) / f"{sha256}_{variant_key(box)}{extension}"
+
+    def put(self, source: Path, sha256: str, extension: str) -> Tuple[Path, bool]:
+        """
+        Move source into the store under its hash
+
+        When the blob already exists source is deleted instead.
+
+        Returns:
+            (blob path, True if the blob was new)
+        """
+        path = self.blob_path(sha256, extension)
+        if self.reuse(path):
+            source.unlink(missing_ok=True)
+            return path, False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Same filesystem as the upload temp dir, so this is an atomic rename
+        os.replace(source, path)
+        return path, True
+
+    def reuse(self, path: Path) -> bool:
+        """
+        True if the blob exists; pins it so GC leaves it alone until the
+        caller has linked it
+        """
+        if not path.exists():
+            return False
+        path.with_name(path.name + PIN_SUFFIX).touch()
+        return path.exists()
+
+    def link(self, blob: Path, destination: Path):
+        """Point destination at blob, replacing whatever was there"""
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        temp = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            os.link(blob, temp)
+        except OSError:
+            shutil.copy2(blob, temp)
+        os.replace(temp, destination)
+
+    def adopt(self, path: Path) -> Optional[Path]:
+        """
+        Move an existing file into the store and leave a hard link in its place
+
+        Returns the blob path, or None when path is already a link to a blob
+        or the store cannot link to it.
+        """
+        if path.stat().st_nlink > 1:
+            return None
+        sha256 = file_sha256(path)
+        blob = self.blob_path(sha256, path.suffix.lower())
+        if not blob.exists():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(path, blob)
+        try:
+            self.link(blob, path)
+        except OSError:
+            return None
+        return blob
+
+    def _pinned(self, path: Path, cutoff: float) -> bool:
+        try:
+            return path.with_name(path.name + PIN_SUFFIX).stat().st_mtime > cutoff
+        except FileNotFoundError:
+            return False
+
+    def collect_garbage(self, min_age_seconds: Optional[float] = None) -> Dict[str, int]:
+        """Delete blobs and leftover temp files nothing links to any more"""
+        min_age = settings.IMAGE_BLOB_GC_MIN_AGE_SECONDS if min_age_seconds is None else min_age_seconds
+        cutoff = time.time() - min_age
+        removed = kept = freed = 0
+        if not self.root.exists():
+            return {"removed": 0, "kept": 0, "bytes_freed": 0}
+
+        for path in self.root.glob("*/*/*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.name.endswith(PIN_SUFFIX):
+                if stat.st_mtime <= cutoff:
+                    path.unlink(missing_ok=True)
+                continue
+            if stat.st_nlink > 1 or stat.st_mtime > cutoff or self._pinned(path, cutoff):
+                kept += 1
+                continue
+            path.unlink(missing_ok=True)
+            removed += 1
+            freed += stat.st_size
+
+        # Drop shard directories left empty
+        for shard in sorted(self.root.glob("*/*"), reverse=True) + sorted(self.root.glob("*")):
+            try:
+                shard.rmdir()
+            except OSError:
+                pass
+
+        if removed:
+            print(f"🧹 Image blob GC: removed {removed} blobs ({freed // 1024} KB)")
+        return {"removed": removed, "kept": kept, "bytes_freed": freed}
+
+# Shared store instance
+blob_store = BlobStore(settings.IMAGE_BLOB_DIR)
+
+def collect_garbage() -> Dict[str, int]:
+    """Scheduler entry point"""
+    return blob_store.collect_garbage()
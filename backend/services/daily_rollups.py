@@ -0,0 +1,175 @@
+"""
+Daily Rollups
+Số liệu theo ngày cho biểu đồ dashboard, không quét bảng gốc mỗi request
+
+daily_rollups holds one row per (metric, UTC day):
+
+    users.registered   users created that day
+    products.created   products created that day
+
+A before_flush listener adjusts the current day's row in the same
+transaction as each insert (and the creation day's row on hard deletes).
+rebuild() recomputes the rows from the base tables; it runs once when the
+table is empty and then daily to correct drift from writes that bypass the
+ORM.
+
+series() turns the rows of any date range into a gap-filled series at
+day, week (Monday start) or month granularity. The date spine and the
+bucketing are NumPy datetime64 operations, so the cost depends on the
+range length, not on the number of base rows.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, upsert_insert
+from models.user_models import User
+from models.product_models import Product
+from models.stats_models import DailyRollup
+
+# Metric name -> (model, creation timestamp column)
+METRICS = {
+    "users.registered": (User, User.created_at),
+    "products.created": (Product, Product.created_at),
+}
+_METRIC_BY_MODEL = {model: metric for metric, (model, _) in METRICS.items()}
+
+GRANULARITIES = ("day", "week", "month")
+
+def _utc_day(value: Optional[datetime]) -> date:
+    if value is None:
+        return datetime.now(timezone.utc).date()
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+def _apply(connection, deltas: Dict[Tuple[str, date], int]):
+    table = DailyRollup.__table__
+    for (metric, day), delta in sorted(deltas.items()):
+        stmt = upsert_insert(table).values(metric=metric, day=day, value=delta)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=["metric", "day"],
+            set_={"value": table.c.value + stmt.excluded.value}
+        ))
+
+@event.listens_for(Session, "before_flush")
+def _count_creations(session: Session, flush_context, instances):
+    deltas: Dict[Tuple[str, date], int] = defaultdict(int)
+    for obj in session.new:
+        metric = _METRIC_BY_MODEL.get(type(obj))
+        if metric:
+            deltas[(metric, _utc_day(obj.created_at))] += 1
+    for obj in session.deleted:
+        metric = _METRIC_BY_MODEL.get(type(obj))
+        if metric:
+            deltas[(metric, _utc_day(obj.created_at))] -= 1
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if deltas:
+        _apply(session.connection(), deltas)
+
+def rebuild(metric: Optional[str] = None) -> Dict[str, int]:
+    """
+    Recompute rollup rows from the base tables
+
+    Args:
+        metric: One of METRICS, or None for all
+
+    Returns:
+        Number of days written per metric
+    """
+    metrics = [metric] if metric else list(METRICS)
+    written = {}
+    db = SessionLocal()
+    try:
+        for name in metrics:
+            _, column = METRICS[name]
+            day = func.date(column)
+            rows = db.query(day, func.count()).filter(column.isnot(None)).group_by(day).all()
+            db.execute(delete(DailyRollup).where(DailyRollup.metric == name))
+            if rows:
+                db.execute(DailyRollup.__table__.insert(), [
+                    # SQLite returns date() as text, PostgreSQL as a date
+                    {"metric": name, "day": date.fromisoformat(str(d)), "value": count}
+                    for d, count in rows
+                ])
+            written[name] = len(rows)
+        db.commit()
+        return written
+    finally:
+        db.close()
+
+def ensure_rollups() -> Dict[str, int]:
+    """Backfill metrics that have no rollup rows yet"""
+    db = SessionLocal()
+    try:
+        missing = [
+            name for name in METRICS
+            if db.execute(select(DailyRollup.day).where(DailyRollup.metric == name).limit(1)).first() is None
+        ]
+    finally:
+        db.close()
+    written = {}
+    for name in missing:
+        written.update(rebuild(name))
+    return written
+
+def _bucket_starts(days: np.ndarray, granularity: str) -> np.ndarray:
+    """Map datetime64[D] days to the first day of their bucket"""
+    if granularity == "week":
+        # 1970-01-01 was a Thursday: shift so Monday is weekday 0
+        weekday = (days.astype(np.int64) + 3) % 7
+        return days - weekday.astype("timedelta64[D]")
+    if granularity == "month":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    return days
+
+def series(db: Session, metric: str, start: date, end: date,
+           granularity: str = "day") -> Tuple[List[str], List[int]]:
+    """
+    Gap-filled series for [start, end] (inclusive, UTC days)
+
+    Args:
+        db: Database session
+        metric: One of METRICS
+        start: First day
+        end: Last day
+        granularity: day, week (Monday start) or month
+
+    Returns:
+        Tuple of (labels, values). Labels are ISO dates for day/week
+        (the week's Monday) and YYYY-MM for month. Partial first and last
+        buckets only count days inside the range.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity: {granularity}")
+    if end < start:
+        return [], []
+
+    rows = db.query(DailyRollup.day, DailyRollup.value).filter(
+        DailyRollup.metric == metric,
+        DailyRollup.day >= start,
+        DailyRollup.day <= end
+    ).all()
+
+    spine = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+    daily = np.zeros(len(spine), dtype=np.int64)
+    if rows:
+        days, values = zip(*rows)
+        offsets = (np.array(days, dtype="datetime64[D]") - spine[0]).astype(np.int64)
+        np.add.at(daily, offsets, np.array(values, dtype=np.int64))
+
+    if granularity == "day":
+        return np.datetime_as_string(spine).tolist(), daily.tolist()
+
+    buckets, index = np.unique(_bucket_starts(spine, granularity), return_inverse=True)
+    totals = np.bincount(index, weights=daily, minlength=len(buckets)).astype(np.int64)
+    if granularity == "month":
+        labels = np.datetime_as_string(buckets.astype("datetime64[M]")).tolist()
+    else:
+        labels = np.datetime_as_string(buckets).tolist()
+    return labels, totals.tolist()
@@ -0,0 +1,74 @@
+"""
+In-process Event Bus
+Phát sự kiện (thay đổi bộ đếm, hoạt động mới) tới các kết nối dashboard
+
+Publishers are ordinary code on any thread: request handlers, session
+commit hooks, the audit writer thread. Subscribers are asyncio queues owned
+by streaming responses. publish() hands each event to the subscriber's
+event loop with call_soon_threadsafe, so it never blocks and is safe from
+any thread. Each subscriber queue is bounded; a slow client loses its
+oldest events rather than holding memory.
+"""
+
+import asyncio
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+class EventBus:
+    """Fan-out of small JSON-able events to asyncio subscribers"""
+
+    def __init__(self, max_queue_size: int = 100):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a queue on the running event loop (call from a coroutine)"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def publish(self, event: str, data: Any, version: Optional[int] = None):
+        """
+        Send an event to every subscriber
+
+        Args:
+            event: Event name (counters, activity, ...)
+            data: JSON-serializable payload
+            version: Optional stamp subscribers can compare with a snapshot
+        """
+        if not self._subscribers:
+            return
+        message = {
+            "event": event,
+            "data": data,
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "version": version,
+        }
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, message)
+            except RuntimeError:
+                # Loop already closed: the subscriber is gone
+                self.unsubscribe(queue)
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, message: Dict[str, Any]):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+# Shared bus instance
+event_bus = EventBus()
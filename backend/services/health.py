@@ -0,0 +1,301 @@
+"""
+System Health Monitor
+Kiểm tra sức khỏe hệ thống định kỳ trong nền, endpoint chỉ đọc kết quả cache
+
+probe() runs as a scheduler job every HEALTH_PROBE_INTERVAL_SECONDS and
+stores one snapshot:
+
+    database    SELECT 1 round-trip latency
+    pool        connections checked out / overflow (QueuePool only)
+    wal         SQLite journal mode, database and -wal file sizes (a WAL
+                that keeps growing means checkpoints cannot complete)
+    storage     free disk space under static/
+    event_loop  delay before the event loop runs a callback scheduled from
+                the probe thread
+    queues      audit writer, system log and image job queue depths
+    activity    errors logged in the last 24 hours, failed logins in the
+                last hour
+
+Health endpoints only read the snapshot, so checks cost nothing per call
+and a burst of load balancer probes never touches the database.
+
+Liveness means the process is serving requests and the probe job is still
+running. Readiness additionally requires the last probe to have reached
+the database and found enough free disk.
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from config import settings
+from database import engine, SessionLocal
+from models.audit_models import SystemLog, LogLevel
+from services import login_rollup
+from services.audit_writer import audit_writer
+from services.image_processing import image_processor
+from services.system_log_handler import queue_depth as system_log_queue_depth
+
+logger = logging.getLogger(__name__)
+
+STORAGE_DIR = "static"
+
+# (warning, critical) thresholds
+DB_LATENCY_MS = (250.0, 2000.0)
+LOOP_LAG_MS = (100.0, 1000.0)
+DISK_FREE_PERCENT = (10.0, 5.0)
+QUEUE_FILL_PERCENT = (50.0, 90.0)
+RECENT_ERRORS = (5, 10)
+FAILED_LOGINS = (20, None)
+WAL_BYTES = (64 * 1024 * 1024, 512 * 1024 * 1024)
+
+# Status order, worst last
+STATUSES = ("healthy", "warning", "critical")
+
+def _grade(value: Optional[float], thresholds, lower_is_worse: bool = False) -> str:
+    if value is None:
+        return "healthy"
+    warning, critical = thresholds
+    if lower_is_worse:
+        if critical is not None and value < critical:
+            return "critical"
+        return "warning" if value < warning else "healthy"
+    if critical is not None and value > critical:
+        return "critical"
+    return "warning" if value > warning else "healthy"
+
+def _worst(*statuses: str) -> str:
+    return max(statuses, key=STATUSES.index)
+
+def _sqlite_path() -> Optional[str]:
+    if engine.dialect.name != "sqlite":
+        return None
+    path = engine.url.database
+    if not path or path == ":memory:":
+        return None
+    return path
+
+def _memory_usage() -> Optional[float]:
+    """System memory in use, percent (Linux /proc/meminfo)"""
+    try:
+        info = {}
+        with open("/proc/meminfo") as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                info[key] = int(value.split()[0])
+        return round((1 - info["MemAvailable"] / info["MemTotal"]) * 100, 1)
+    except (OSError, KeyError, ValueError, ZeroDivisionError):
+        return None
+
+def _cpu_usage() -> Optional[float]:
+    """One-minute load average as a percent of the CPU count"""
+    try:
+        return round(os.getloadavg()[0] / (os.cpu_count() or 1) * 100, 1)
+    except (AttributeError, OSError):
+        return None
+
+class HealthMonitor:
+    """Runs the probes and keeps the latest snapshot"""
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.started_at = time.monotonic()
+        self.snapshot: Dict[str, Any] = {}
+        self.checked_at: Optional[float] = None
+        self.probes = 0
+        self.database_failures = 0
+        self._loop = None
+
+    def attach_loop(self, loop):
+        """Event loop whose scheduling lag is measured (call from lifespan)"""
+        self._loop = loop
+
+    # ------------------------------------------------------------------
+    # Probes
+    # ------------------------------------------------------------------
+
+    def _probe_database(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            latency = (time.perf_counter() - started) * 1000
+            return {"status": _grade(latency, DB_LATENCY_MS), "latency_ms": round(latency, 2)}
+        except Exception as e:
+            return {"status": "critical", "latency_ms": None, "error": str(e)}
+
+    def _probe_pool(self) -> Dict[str, Any]:
+        pool = engine.pool
+        stats = {"class": type(pool).__name__}
+        # StaticPool (in-memory SQLite) has one shared connection and no counters
+        for name in ("size", "checkedout", "overflow", "checkedin"):
+            method = getattr(pool, name, None)
+            if callable(method):
+                stats[name] = method()
+        return stats
+
+    def _probe_wal(self) -> Dict[str, Any]:
+        path = _sqlite_path()
+        if path is None:
+            return {}
+        try:
+            with engine.connect() as conn:
+                journal_mode = conn.execute(text("PRAGMA journal_mode")).scalar()
+        except Exception as e:
+            return {"status": "warning", "error": str(e)}
+        stats = {"journal_mode": journal_mode}
+        for key, suffix in (("database_bytes", ""), ("wal_bytes", "-wal")):
+            try:
+                stats[key] = os.path.getsize(path + suffix)
+            except OSError:
+                stats[key] = 0
+        # database.py turns WAL on for every connection; anything else means it failed
+        stats["status"] = _grade(stats["wal_bytes"], WAL_BYTES) if journal_mode == "wal" else "warning"
+        return stats
+
+    def _probe_storage(self) -> Dict[str, Any]:
+        try:
+            usage = shutil.disk_usage(STORAGE_DIR)
+        except OSError as e:
+            return {"status": "critical", "error": str(e)}
+        free_percent = usage.free / usage.total * 100 if usage.total else 0.0
+        return {
+            "status": _grade(free_percent, DISK_FREE_PERCENT, lower_is_worse=True),
+            "free_bytes": usage.free,
+            "total_bytes": usage.total,
+            "used_percent": round(100 - free_percent, 1),
+        }
+
+    def _probe_event_loop(self) -> Dict[str, Any]:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return {"status": "healthy", "lag_ms": None}
+        ran = threading.Event()
+        started = time.perf_counter()
+        try:
+            loop.call_soon_threadsafe(ran.set)
+        except RuntimeError:
+            return {"status": "healthy", "lag_ms": None}
+        timeout = LOOP_LAG_MS[1] / 1000 * 5
+        lag = (time.perf_counter() - started) * 1000 if ran.wait(timeout) else timeout * 1000
+        return {"status": _grade(lag, LOOP_LAG_MS), "lag_ms": round(lag, 2)}
+
+    def _probe_queues(self) -> Dict[str, Any]:
+        audit_depth = audit_writer.qsize()
+        fill = audit_depth / settings.AUDIT_QUEUE_SIZE * 100 if settings.AUDIT_QUEUE_SIZE else 0.0
+        return {
+            "status": _grade(fill, QUEUE_FILL_PERCENT),
+            "audit_writer": audit_depth,
+            "audit_writer_running": audit_writer.running,
+            "audit_rows_dropped": audit_writer.rows_dropped,
+            "system_log": system_log_queue_depth(),
+            "image_jobs": image_processor.pending,
+        }
+
+    def _probe_activity(self) -> Dict[str, Any]:
+        db = SessionLocal()
+        try:
+            now = datetime.now(timezone.utc)
+            recent_errors = db.query(SystemLog).filter(
+                SystemLog.created_at >= now - timedelta(days=1),
+                SystemLog.level.in_((LogLevel.ERROR.value, LogLevel.CRITICAL.value))
+            ).count()
+            failed_logins = login_rollup.count_attempts(db, "failure", now - timedelta(hours=1))
+        finally:
+            db.close()
+        return {
+            "status": _worst(_grade(recent_errors, RECENT_ERRORS), _grade(failed_logins, FAILED_LOGINS)),
+            "recent_errors": recent_errors,
+            "failed_logins": failed_logins,
+        }
+
+    def probe(self) -> Dict[str, Any]:
+        """Run every probe and replace the snapshot (scheduler job)"""
+        database = self._probe_database()
+        if database["status"] == "critical":
+            activity = {"status": "healthy", "recent_errors": 0, "failed_logins": 0}
+        else:
+            try:
+                activity = self._probe_activity()
+            except Exception as e:
+                activity = {"status": "warning", "recent_errors": 0, "failed_logins": 0, "error": str(e)}
+
+        snapshot = {
+            "database": database,
+            "pool": self._probe_pool(),
+            "wal": self._probe_wal(),
+            "storage": self._probe_storage(),
+            "event_loop": self._probe_event_loop(),
+            "queues": self._probe_queues(),
+            "activity": activity,
+            "memory_usage": _memory_usage(),
+            "cpu_usage": _cpu_usage(),
+        }
+        snapshot["status"] = _worst(*(
+            part["status"] for part in snapshot.values()
+            if isinstance(part, dict) and "status" in part
+        ))
+
+        self.probes += 1
+        if database["status"] == "critical":
+            self.database_failures += 1
+        snapshot["checked_at"] = datetime.now(timezone.utc).isoformat()
+        self.snapshot = snapshot
+        self.checked_at = time.monotonic()
+        if snapshot["status"] != "healthy":
+            logger.warning("System health is %s", snapshot["status"])
+        return snapshot
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    @property
+    def uptime_seconds(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def availability_percent(self) -> float:
+        """Share of probes since start that reached the database"""
+        if not self.probes:
+            return 100.0
+        return round((self.probes - self.database_failures) / self.probes * 100, 2)
+
+    def is_stale(self) -> bool:
+        """No probe for three intervals: the probe job is stuck or stopped"""
+        if self.checked_at is None:
+            return self.uptime_seconds > self.interval_seconds * 3
+        return time.monotonic() - self.checked_at > self.interval_seconds * 3
+
+    def liveness(self) -> Dict[str, Any]:
+        return {
+            "status": "critical" if self.is_stale() else "healthy",
+            "uptime_seconds": round(self.uptime_seconds),
+            "checked_at": self.snapshot.get("checked_at"),
+        }
+
+    def readiness(self) -> Dict[str, Any]:
+        snapshot = self.snapshot
+        if not snapshot:
+            reasons = ["no probe has run yet"]
+        else:
+            reasons = [
+                name for name in ("database", "storage")
+                if snapshot[name]["status"] == "critical"
+            ]
+            if self.is_stale():
+                reasons.append("health probes are stale")
+        return {
+            "status": "critical" if reasons else "healthy",
+            "reasons": reasons,
+            "checked_at": snapshot.get("checked_at"),
+        }
+
+# Shared monitor instance (probe job registered by main.lifespan)
+health_monitor = HealthMonitor(settings.HEALTH_PROBE_INTERVAL_SECONDS)
@@ -0,0 +1,45 @@
+"""
+Image Formats
+Định dạng ảnh thay thế (AVIF, WebP) và chọn định dạng theo header Accept
+
+Only formats the installed Pillow can encode are offered. A client gets an
+alternate format only when its Accept header names it explicitly:
+wildcards such as image/* or */* are sent by browsers that cannot decode
+WebP or AVIF too, so they never count.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from PIL import features
+
+@dataclass(frozen=True)
+class ImageFormat:
+    name: str        # Pillow format name
+    media_type: str
+    extension: str
+
+AVIF = ImageFormat("AVIF", "image/avif", ".avif")
+WEBP = ImageFormat("WEBP", "image/webp", ".webp")
+
+# Preferred first; AVIF only when Pillow was built with an AVIF encoder
+ALTERNATE_FORMATS: Tuple[ImageFormat, ...] = tuple(
+    fmt for fmt in (AVIF, WEBP) if features.check(fmt.name.lower())
+)
+
+def acceptable_formats(accept: Optional[str]) -> List[ImageFormat]:
+    """Alternate formats the Accept header explicitly allows (q > 0)"""
+    accepted = set()
+    for part in (accept or "").split(","):
+        media_range, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(media_range.lower())
+    return [fmt for fmt in ALTERNATE_FORMATS if fmt.media_type in accepted]
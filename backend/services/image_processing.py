@@ -0,0 +1,198 @@
+"""
+Image Processing Pool
+Xử lý ảnh (giải mã, thu nhỏ, mã hóa) trong process pool để không chặn event loop
+
+Resizing with LANCZOS and saving with optimize=True holds the CPU (and the
+GIL) for hundreds of milliseconds per image. Run inline in an async
+endpoint it freezes every other request for that long. The work is sent to
+a ProcessPoolExecutor instead, running services.image_worker.render_variants:
+
+- IMAGE_WORKERS processes, started lazily with the spawn method (forking a
+  process that already runs the scheduler and writer threads is unsafe).
+  Each process is replaced after IMAGE_WORKER_MAX_TASKS jobs.
+- At most IMAGE_MAX_PENDING_JOBS jobs are queued or running. Past that,
+  callers get ImageQueueFull instead of an ever-growing backlog.
+- process() is awaitable and returns the variants (run() does the same for
+  any other image_worker function). submit() returns a job id at once;
+  get_job() reports queued / running / done / failed until
+  IMAGE_JOB_TTL_SECONDS after the job finished. reserve() takes a queue
+  slot up front, so a caller can fail with ImageQueueFull before it
+  changes anything and hand the slot to submit(reserved=True) later.
+
+IMAGE_PROCESSING_MODE=inline runs render_variants in the event loop like
+before (for scripts and for comparing latency in
+benchmarks/image_upload_latency.py).
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config import settings
+from services.image_worker import render_variants
+
+Sizes = Dict[str, Tuple[int, int]]
+
+class ImageQueueFull(Exception):
+    """Raised when IMAGE_MAX_PENDING_JOBS jobs are already waiting"""
+
+class ImageProcessor:
+    """Bounded process pool for image variants, plus status of background jobs"""
+
+    def __init__(self, workers: int, max_pending: int, job_ttl: int, mode: str = "pool"):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.job_ttl = job_ttl
+        self.mode = mode
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        # Keeps background job tasks alive until they finish
+        self._tasks = set()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=get_context("spawn"),
+                    max_tasks_per_child=settings.IMAGE_WORKER_MAX_TASKS,
+                )
+            return self._executor
+
+    def reserve(self):
+        """Take one of the IMAGE_MAX_PENDING_JOBS slots (release() gives it back)"""
+        if self.pending >= self.max_pending:
+            raise ImageQueueFull(f"{self.pending} image jobs already pending")
+        self.pending += 1
+
+    def release(self):
+        self.pending -= 1
+
+    def _start(self, func: Callable, *args) -> Future:
+        if self.mode == "inline":
+            future: Future = Future()
+            try:
+                future.set_result(func(*args))
+            except Exception as exc:
+                future.set_exception(exc)
+            return future
+        try:
+            return self._get_executor().submit(func, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool once
+            with self._lock:
+                self._executor = None
+            return self._get_executor().submit(func, *args)
+
+    async def run(self, func: Callable, *args) -> Any:
+        """
+        Run a top-level services.image_worker function in the pool and wait
+
+        Counts against IMAGE_MAX_PENDING_JOBS like every other job.
+        """
+        self.reserve()
+        try:
+            return await asyncio.wrap_future(self._start(func, *args))
+        finally:
+            self.release()
+
+    async def process(self, source: Path, sizes: Sizes) -> Dict[str, dict]:
+        """Render all variants of source and wait for the result"""
+        return await self.run(render_variants, str(source), sizes)
+
+    def submit(
+        self,
+        source: Path,
+        sizes: Sizes,
+        finalize: Optional[Callable[[Dict[str, dict]], Any]] = None,
+        reserved: bool = False
+    ) -> str:
+        """
+        Queue a background job and return its id (call from the event loop)
+
+        finalize, when given, turns the raw worker output into the job result.
+        It runs in a worker thread, so it may block (file or database work).
+        reserved=True uses a slot the caller already took with reserve().
+        """
+        self._prune()
+        if not reserved:
+            self.reserve()
+        job_id = uuid.uuid4().hex
+        future = self._start(render_variants, str(source), sizes)
+        self._jobs[job_id] = {
+            "job_id": job_id,
+            "future": future,
+            "status": "queued",
+            "created_at": datetime.now(timezone.utc),
+            "finished_at": None,
+            "finished": None,
+            "result": None,
+            "error": None,
+        }
+        task = asyncio.ensure_future(self._finish(job_id, future, finalize))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job_id
+
+    async def _finish(self, job_id: str, future: Future, finalize):
+        job = self._jobs[job_id]
+        try:
+            raw = await asyncio.wrap_future(future)
+            # finalize links files and may write to the database: keep it off the event loop
+            job["result"] = await asyncio.to_thread(finalize, raw) if finalize else raw
+            job["status"] = "done"
+        except Exception as exc:
+            job["status"] = "failed"
+            job["error"] = str(exc) or exc.__class__.__name__
+            print(f"❌ Image job {job_id} failed: {job['error']}")
+        finally:
+            self.release()
+            job["finished_at"] = datetime.now(timezone.utc)
+            job["finished"] = time.monotonic()
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Public view of a job, or None when unknown or expired"""
+        self._prune()
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        status = job["status"]
+        if status == "queued" and job["future"].running():
+            status = "running"
+        return {
+            "job_id": job_id,
+            "status": status,
+            "created_at": job["created_at"],
+            "finished_at": job["finished_at"],
+            "result": job["result"],
+            "error": job["error"],
+        }
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.job_ttl
+        for job_id in [key for key, job in self._jobs.items() if job["finished"] and job["finished"] < cutoff]:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        """Stop the worker processes, dropping jobs that have not started"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+# Shared processor instance
+image_processor = ImageProcessor(
+    workers=settings.IMAGE_WORKERS,
+    max_pending=settings.IMAGE_MAX_PENDING_JOBS,
+    job_ttl=settings.IMAGE_JOB_TTL_SECONDS,
+    mode=settings.IMAGE_PROCESSING_MODE,
+)
@@ -0,0 +1,161 @@
+"""
+Image Worker
+Giải mã / thu nhỏ / mã hóa ảnh trong tiến trình con của process pool
+
+Runs inside the image process pool (services.image_processing), so it
+imports nothing from the application but PIL. Everything passed in and
+returned is plain data that pickles cheaply.
+
+The source is decoded once. JPEG sources use draft mode to decode at the
+smallest power-of-two scale still larger than the biggest variant, then
+every variant is produced from that one decoded image, largest first.
+render_variants() makes the upload-time sizes; render_variant() makes one
+on-demand variant for the /static/img endpoint.
+
+Every upload also gets a placeholder: the image shrunk to at most
+PLACEHOLDER_SIZE px and inlined as a base64 JPEG data URI (a few hundred
+bytes). Clients paint it, blurred, in the image box until the real file
+arrives. render_variants() includes it; render_placeholder() makes only
+the placeholder for uploads that need no variants, fingerprint_images()
+the hash and placeholder of many existing files for the reconcile scan.
+"""
+
+import base64
+import hashlib
+import io
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+# quality / optimize used for every encoded variant
+JPEG_QUALITY = 85
+
+# Output formats that can store transparency
+ALPHA_FORMATS = ("PNG", "WEBP", "AVIF")
+
+# Longest side of the inline placeholder and its JPEG quality
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 60
+
+def _prepare(img: Image.Image, keep_alpha: bool = False) -> Image.Image:
+    # Apply camera rotation before the EXIF block is dropped by the encoder
+    img = ImageOps.exif_transpose(img)
+    if keep_alpha and (img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)):
+        return img if img.mode == "RGBA" else img.convert("RGBA")
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    return img
+
+def _placeholder(img: Image.Image) -> str:
+    preview = img.copy()
+    preview.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.Resampling.LANCZOS, reducing_gap=3.0)
+    buffer = io.BytesIO()
+    preview.save(buffer, format="JPEG", quality=PLACEHOLDER_QUALITY, optimize=True)
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+def render_placeholder(source: str) -> str:
+    """Placeholder data URI for source (see module docstring)"""
+    with Image.open(source) as img:
+        img.draft("RGB", (PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+        return _placeholder(_prepare(img))
+
+def fingerprint_images(sources: List[str]) -> List[Optional[dict]]:
+    """
+    SHA-256 and placeholder of each source
+
+    Returns:
+        One {"sha256", "placeholder"} dict per source, None for a file that
+        is gone or cannot be decoded
+    """
+    results: List[Optional[dict]] = []
+    for source in sources:
+        try:
+            digest = hashlib.sha256()
+            with open(source, "rb") as f:
+                while chunk := f.read(1024 * 1024):
+                    digest.update(chunk)
+            results.append({"sha256": digest.hexdigest(), "placeholder": render_placeholder(source)})
+        except Exception:
+            results.append(None)
+    return results
+
+def render_variants(source: str, sizes: Dict[str, Tuple[int, int]]) -> Dict[str, dict]:
+    """
+    Write one resized copy of source per entry of sizes
+
+    Variants are saved next to the source as <stem>_<name><suffix>, fitted
+    inside (width, height) with the aspect ratio kept; they are never
+    enlarged.
+
+    Args:
+        source: Path of the uploaded image
+        sizes: Variant name -> (max width, max height)
+
+    Returns:
+        Dict with "original" (width, height), "placeholder" (data URI) and
+        one entry per variant with its path, width, height and size in bytes
+    """
+    source_path = Path(source)
+    results: Dict[str, dict] = {}
+    with Image.open(source_path) as img:
+        image_format = img.format
+        results["original"] = {"width": img.width, "height": img.height}
+        if sizes:
+            largest = max(sizes.values())
+            # JPEG only: decode at a reduced scale that still covers every variant
+            img.draft("RGB", largest)
+        img = _prepare(img)
+        results["placeholder"] = _placeholder(img)
+
+        for name, (width, height) in sorted(sizes.items(), key=lambda item: item[1], reverse=True):
+            variant = img.copy()
+            variant.thumbnail((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+            path = source_path.with_name(f"{source_path.stem}_{name}{source_path.suffix}")
+            # Write under a temp name so readers never see a partial file
+            temp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            variant.save(temp, format=image_format, quality=JPEG_QUALITY, optimize=True)
+            os.replace(temp, path)
+            results[name] = {
+                "path": str(path),
+                "width": variant.width,
+                "height": variant.height,
+                "bytes": path.stat().st_size,
+            }
+    return results
+
+def render_variant(
+    source: str,
+    destination: str,
+    box: Optional[Tuple[int, int]],
+    fit: str = "contain",
+    quality: int = JPEG_QUALITY,
+    output_format: Optional[str] = None
+) -> dict:
+    """
+    Write a single resized copy of source to destination
+
+    fit="contain" scales the image to fit inside box (never enlarging it);
+    fit="cover" scales and center-crops it to exactly fill box. With box
+    None the image keeps its size (format conversion only). output_format
+    is a Pillow format name such as "WEBP"; default is the source format.
+
+    Returns:
+        The variant's width, height and size in bytes
+    """
+    destination_path = Path(destination)
+    with Image.open(source) as img:
+        image_format = output_format or img.format
+        if box:
+            img.draft("RGB", box)
+        img = _prepare(img, keep_alpha=image_format in ALPHA_FORMATS)
+        if box and fit == "cover":
+            img = ImageOps.fit(img, box, Image.Resampling.LANCZOS)
+        elif box:
+            img.thumbnail(box, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+        temp = destination_path.with_name(f".{destination_path.name}.{os.getpid()}.tmp")
+        img.save(temp, format=image_format, quality=quality, optimize=True)
+        os.replace(temp, destination_path)
+        return {"width": img.width, "height": img.height, "bytes": destination_path.stat().st_size}
@@ -0,0 +1,192 @@
+"""
+Log Retention and Archival
+Chuyển log cũ (audit_logs, system_logs, login_attempts, ...) sang file nén và xóa khỏi database
+
+Rows older than LOG_RETENTION_DAYS are copied into gzip-compressed JSONL
+files partitioned by day:
+
+    {LOG_ARCHIVE_DIR}/{table}/{YYYY}/{MM}/{table}-{YYYY-MM-DD}.jsonl.gz
+
+and then deleted in batches of LOG_RETENTION_BATCH_SIZE. Each batch uses
+its own short transactions (one read, one delete) with a pause in between,
+so other writers are never locked out for long. Files are appended as new
+gzip members, which gzip readers treat as one stream.
+
+If the process dies between writing a batch and deleting it, the next run
+archives those rows again; read_archive() skips duplicate ids.
+
+Usage:
+    python -m services.log_retention            # archive with configured age
+    python -m services.log_retention --days 30
+"""
+
+import argparse
+import gzip
+import json
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import delete, select
+
+from config import settings
+from database import engine
+from models.audit_models import AuditLog, SystemLog, LoginAttempt, RequestLatencySample
+
+# Table name -> (model, timestamp column used for age and partitioning)
+RETENTION_TABLES = {
+    "audit_logs": (AuditLog, AuditLog.created_at),
+    "system_logs": (SystemLog, SystemLog.created_at),
+    "login_attempts": (LoginAttempt, LoginAttempt.attempted_at),
+    "request_latency_samples": (RequestLatencySample, RequestLatencySample.created_at),
+}
+
+# Pause between batches so request writers can take the write lock
+BATCH_PAUSE_SECONDS = 0.05
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+def _as_utc(value: datetime) -> datetime:
+    """SQLite returns naive datetimes; they are stored in UTC"""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def _partition_path(archive_dir: Path, table_name: str, day: date) -> Path:
+    return (archive_dir / table_name / f"{day:%Y}" / f"{day:%m}"
+            / f"{table_name}-{day:%Y-%m-%d}.jsonl.gz")
+
+def _write_partitions(archive_dir: Path, table_name: str, ts_key: str, rows: List[Dict[str, Any]]):
+    """Append rows to their daily archive files and fsync them"""
+    by_day: Dict[date, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_day.setdefault(_as_utc(row[ts_key]).date(), []).append(row)
+
+    for day, day_rows in by_day.items():
+        path = _partition_path(archive_dir, table_name, day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="ab") as gz:
+                for row in day_rows:
+                    gz.write(json.dumps(row, default=_json_default, ensure_ascii=False).encode("utf-8"))
+                    gz.write(b"\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+
+def archive_table(
+    table_name: str,
+    older_than_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    archive_dir: Optional[str] = None
+) -> int:
+    """
+    Archive and delete rows older than the retention age for one table
+
+    Args:
+        table_name: One of RETENTION_TABLES
+        older_than_days: Retention age (default LOG_RETENTION_DAYS)
+        batch_size: Rows per batch (default LOG_RETENTION_BATCH_SIZE)
+        archive_dir: Archive root (default LOG_ARCHIVE_DIR)
+
+    Returns:
+        Number of rows archived
+    """
+    model, ts_column = RETENTION_TABLES[table_name]
+    table = model.__table__
+    days = older_than_days if older_than_days is not None else settings.LOG_RETENTION_DAYS
+    batch_size = batch_size or settings.LOG_RETENTION_BATCH_SIZE
+    root = Path(archive_dir or settings.LOG_ARCHIVE_DIR)
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+
+    archived = 0
+    last_id = 0
+    while True:
+        # Short read transaction
+        with engine.connect() as conn:
+            rows = [
+                dict(row) for row in conn.execute(
+                    select(table)
+                    .where(ts_column < cutoff, table.c.id > last_id)
+                    .order_by(table.c.id)
+                    .limit(batch_size)
+                ).mappings()
+            ]
+        if not rows:
+            break
+
+        # Durable copy first, then delete
+        _write_partitions(root, table_name, ts_column.key, rows)
+        ids = [row["id"] for row in rows]
+        with engine.begin() as conn:
+            conn.execute(delete(table).where(table.c.id.in_(ids)))
+
+        archived += len(rows)
+        last_id = ids[-1]
+        if len(rows) < batch_size:
+            break
+        time.sleep(BATCH_PAUSE_SECONDS)
+
+    return archived
+
+def run_retention(older_than_days: Optional[int] = None) -> Dict[str, int]:
+    """Archive every retention table; returns rows archived per table"""
+    return {
+        table_name: archive_table(table_name, older_than_days=older_than_days)
+        for table_name in RETENTION_TABLES
+    }
+
+def read_archive(
+    table_name: str,
+    start: datetime,
+    end: datetime,
+    archive_dir: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Read archived rows with start <= timestamp < end
+
+    Only the daily files overlapping the range are opened. Timestamps are
+    returned as ISO strings, exactly as archived.
+
+    Args:
+        table_name: One of RETENTION_TABLES
+        start: Range start (naive values are treated as UTC)
+        end: Range end, exclusive
+        archive_dir: Archive root (default LOG_ARCHIVE_DIR)
+
+    Yields:
+        Archived rows as dicts, in file order
+    """
+    _, ts_column = RETENTION_TABLES[table_name]
+    root = Path(archive_dir or settings.LOG_ARCHIVE_DIR)
+    start, end = _as_utc(start), _as_utc(end)
+
+    seen_ids = set()
+    day = start.date()
+    while day <= end.date():
+        path = _partition_path(root, table_name, day)
+        if path.exists():
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    row = json.loads(line)
+                    if row["id"] in seen_ids:
+                        continue
+                    ts = _as_utc(datetime.fromisoformat(row[ts_column.key]))
+                    if start <= ts < end:
+                        seen_ids.add(row["id"])
+                        yield row
+        day += timedelta(days=1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive and purge old log rows")
+    parser.add_argument("--days", type=int, default=None, help="Retention age in days")
+    args = parser.parse_args()
+
+    result = run_retention(older_than_days=args.days)
+    for table_name, count in result.items():
+        print(f"📦 {table_name}: archived {count} rows")
@@ -0,0 +1,173 @@
+"""
+Login Attempt Rollup
+Thống kê lượt đăng nhập theo giờ cho dashboard bảo mật
+
+login_attempt_hourly holds one row per (hour, success/failure) with the
+number of attempts and of distinct client IPs. record_attempt() upserts it
+in the same transaction that inserts the LoginAttempt row, so dashboard
+widgets read a handful of buckets instead of scanning login_attempts.
+
+Distinct IPs are counted through login_attempt_hourly_ips: an IP bumps
+distinct_ips only when its (bucket, success, ip) row is new. Those rows are
+only needed while a bucket is still being written, so prune_ip_rows()
+drops old ones. The rollup itself is kept when login_attempts rows are
+archived by log retention.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, upsert_insert
+from models.audit_models import LoginAttempt, LoginAttemptHourly, LoginAttemptHourlyIp
+
+# How long per-IP rows are kept for distinct counting
+IP_ROWS_KEEP_HOURS = 48
+
+def hour_bucket(value: datetime) -> datetime:
+    """Start of the UTC hour containing value (naive values are UTC)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+def record_attempt(db: Session, ip_address: str, success: str, attempted_at: datetime):
+    """
+    Count one login attempt in its hourly bucket (caller commits)
+
+    Args:
+        db: Database session holding the LoginAttempt insert
+        ip_address: Client IP address
+        success: "success" or "failure"
+        attempted_at: Time of the attempt
+    """
+    bucket = hour_bucket(attempted_at)
+
+    new_ip = db.execute(
+        upsert_insert(LoginAttemptHourlyIp.__table__)
+        .values(bucket=bucket, success=success, ip_address=ip_address)
+        .on_conflict_do_nothing()
+    ).rowcount == 1
+
+    stmt = upsert_insert(LoginAttemptHourly.__table__).values(
+        bucket=bucket, success=success, attempts=1, distinct_ips=1 if new_ip else 0
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["bucket", "success"],
+        set_={
+            "attempts": LoginAttemptHourly.__table__.c.attempts + 1,
+            "distinct_ips": LoginAttemptHourly.__table__.c.distinct_ips + stmt.excluded.distinct_ips,
+        }
+    ))
+
+def count_attempts(db: Session, success: str, since: datetime) -> int:
+    """
+    Attempts with the given result from the hour containing since onwards
+
+    Whole buckets are counted, so the window is rounded down to the hour.
+    """
+    return int(db.query(func.coalesce(func.sum(LoginAttemptHourly.attempts), 0)).filter(
+        LoginAttemptHourly.success == success,
+        LoginAttemptHourly.bucket >= hour_bucket(since)
+    ).scalar())
+
+def daily_activity(db: Session, since: datetime) -> List[Tuple[str, int, int]]:
+    """
+    Per-day totals from the rollup
+
+    Returns:
+        List of (date, total_attempts, successful_logins), oldest first
+    """
+    days: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+    rows = db.query(
+        LoginAttemptHourly.bucket, LoginAttemptHourly.success, LoginAttemptHourly.attempts
+    ).filter(LoginAttemptHourly.bucket >= hour_bucket(since)).all()
+    for bucket, success, attempts in rows:
+        totals = days[hour_bucket(bucket).date().isoformat()]
+        totals[0] += attempts
+        if success == "success":
+            totals[1] += attempts
+    return [(day, total, successful) for day, (total, successful) in sorted(days.items())]
+
+def rebuild(since: Optional[datetime] = None) -> int:
+    """
+    Recompute the rollup from login_attempts
+
+    Only buckets from since onwards are replaced. It defaults to the oldest
+    attempt still in the table, so buckets whose attempts were already
+    archived are kept.
+
+    Returns:
+        Number of attempts counted
+    """
+    db = SessionLocal()
+    try:
+        if since is None:
+            since = db.query(func.min(LoginAttempt.attempted_at)).scalar()
+            if since is None:
+                return 0
+        start = hour_bucket(since)
+
+        attempts: Dict[Tuple[datetime, str], int] = defaultdict(int)
+        ips: Dict[Tuple[datetime, str], set] = defaultdict(set)
+        # SQLite keeps server-default timestamps without fractional seconds,
+        # which sort before the bound parameter at the same second: widen the
+        # SQL bound and filter exactly here
+        query = db.query(
+            LoginAttempt.attempted_at, LoginAttempt.success, LoginAttempt.ip_address
+        ).filter(LoginAttempt.attempted_at >= start - timedelta(seconds=1))
+        counted = 0
+        for attempted_at, success, ip_address in query.yield_per(5000):
+            bucket = hour_bucket(attempted_at)
+            if bucket < start:
+                continue
+            key = (bucket, success)
+            attempts[key] += 1
+            ips[key].add(ip_address)
+            counted += 1
+
+        db.execute(delete(LoginAttemptHourly).where(LoginAttemptHourly.bucket >= start))
+        db.execute(delete(LoginAttemptHourlyIp).where(LoginAttemptHourlyIp.bucket >= start))
+        if attempts:
+            db.execute(LoginAttemptHourly.__table__.insert(), [
+                {"bucket": bucket, "success": success, "attempts": count,
+                 "distinct_ips": len(ips[(bucket, success)])}
+                for (bucket, success), count in attempts.items()
+            ])
+            # Per-IP rows are only needed for buckets that can still be written
+            keep_from = hour_bucket(datetime.now(timezone.utc)) - timedelta(hours=IP_ROWS_KEEP_HOURS)
+            ip_rows = [
+                {"bucket": bucket, "success": success, "ip_address": ip}
+                for (bucket, success), bucket_ips in ips.items() if bucket >= keep_from
+                for ip in bucket_ips
+            ]
+            if ip_rows:
+                db.execute(LoginAttemptHourlyIp.__table__.insert(), ip_rows)
+        db.commit()
+        return counted
+    finally:
+        db.close()
+
+def ensure_rollup() -> int:
+    """Backfill the rollup once if it is empty but attempts exist"""
+    db = SessionLocal()
+    try:
+        has_rollup = db.execute(select(LoginAttemptHourly.bucket).limit(1)).first() is not None
+    finally:
+        db.close()
+    return 0 if has_rollup else rebuild()
+
+def prune_ip_rows(keep_hours: int = IP_ROWS_KEEP_HOURS) -> int:
+    """Delete per-IP rows of buckets that are no longer written"""
+    cutoff = hour_bucket(datetime.now(timezone.utc)) - timedelta(hours=keep_hours)
+    db = SessionLocal()
+    try:
+        deleted = db.execute(
+            delete(LoginAttemptHourlyIp).where(LoginAttemptHourlyIp.bucket < cutoff)
+        ).rowcount
+        db.commit()
+        return deleted
+    finally:
+        db.close()
@@ -0,0 +1,235 @@
+"""
+Price Analytics
+Phân tích giá, tồn kho và biên lợi nhuận trên toàn bộ danh mục sản phẩm
+
+The catalog is loaded once into a columnar snapshot (one NumPy array per
+field) and kept until stat_counters' catalog.version changes, so repeated
+requests with different buckets or quantiles never touch the products
+table. Histograms, quantiles, valuation and per-category margins are
+vectorized over the snapshot.
+
+Prices:
+    effective  sale price when set, otherwise the original price
+    original   list price
+    cost       cost price (products without one are left out)
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Float, cast, select
+from sqlalchemy.orm import Session
+
+from models.product_models import Product, Category
+from services.stat_counters import CATALOG_VERSION, read_counters
+
+PRICE_FIELDS = ("effective", "original", "cost")
+SCALES = ("linear", "log")
+DEFAULT_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+MAX_BUCKETS = 100
+# Distinct parameter combinations remembered per catalog version
+MAX_CACHED_RESULTS = 64
+
+@dataclass
+class CatalogSnapshot:
+    """Columnar copy of the catalog fields used by the analytics"""
+    version: int
+    category_id: np.ndarray
+    status: np.ndarray
+    original: np.ndarray
+    sale: np.ndarray
+    cost: np.ndarray
+    stock: np.ndarray
+    category_names: Dict[int, str]
+    # Computed results for this version, keyed by request parameters
+    results: Dict[Tuple, Any] = field(default_factory=dict)
+
+    @property
+    def effective(self) -> np.ndarray:
+        return np.where(np.isnan(self.sale), self.original, self.sale)
+
+    def prices(self, price_field: str) -> np.ndarray:
+        if price_field == "original":
+            return self.original
+        if price_field == "cost":
+            return self.cost
+        return self.effective
+
+_snapshot: Optional[CatalogSnapshot] = None
+_lock = threading.Lock()
+
+def _load(db: Session, version: int) -> CatalogSnapshot:
+    rows = db.execute(select(
+        Product.category_id,
+        Product.status,
+        # Floats straight from the driver: NULL becomes NaN below, no Decimals
+        cast(Product.original_price, Float),
+        cast(Product.sale_price, Float),
+        cast(Product.cost_price, Float),
+        Product.stock_quantity,
+    )).all()
+    columns = list(zip(*rows)) if rows else [()] * 6
+    return CatalogSnapshot(
+        version=version,
+        category_id=np.array(columns[0], dtype=np.int64),
+        status=np.array(columns[1], dtype=object),
+        original=np.array(columns[2], dtype=np.float64),
+        sale=np.array(columns[3], dtype=np.float64),
+        cost=np.array(columns[4], dtype=np.float64),
+        stock=np.nan_to_num(np.array(columns[5], dtype=np.float64)).astype(np.int64),
+        category_names=dict(db.query(Category.id, Category.name).all()),
+    )
+
+def get_snapshot(db: Session) -> CatalogSnapshot:
+    """Current snapshot, reloaded when the catalog version has moved on"""
+    global _snapshot
+    version = read_counters(db, [CATALOG_VERSION])[CATALOG_VERSION]
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = _load(db, version)
+        return _snapshot
+
+def bucket_edges(values: np.ndarray, buckets: int, scale: str = "linear") -> np.ndarray:
+    """buckets + 1 edges spanning the values, equal width or equal ratio"""
+    if values.size == 0:
+        return np.array([0.0, 0.0])
+    low, high = float(values.min()), float(values.max())
+    if low == high:
+        return np.array([low, high])
+    if scale == "log" and low > 0:
+        return np.geomspace(low, high, buckets + 1)
+    return np.linspace(low, high, buckets + 1)
+
+def histogram(values: np.ndarray, edges: Sequence[float]) -> List[Dict[str, Any]]:
+    """
+    Counts per [lower, upper) bucket; the last bucket includes its upper edge
+
+    Values outside the edges are not counted (see analyze's out_of_range).
+    """
+    edges = np.asarray(edges, dtype=np.float64)
+    counts, _ = np.histogram(values, bins=edges)
+    return [
+        {
+            "label": f"{lower:,.0f} - {upper:,.0f}",
+            "lower": float(lower),
+            "upper": float(upper),
+            "count": int(count),
+        }
+        for lower, upper, count in zip(edges[:-1], edges[1:], counts)
+    ]
+
+def quantiles(values: np.ndarray, probabilities: Sequence[float]) -> Dict[str, Optional[float]]:
+    if values.size == 0:
+        return {str(p): None for p in probabilities}
+    results = np.quantile(values, probabilities)
+    return {str(p): round(float(v), 2) for p, v in zip(probabilities, results)}
+
+def valuation(snapshot: CatalogSnapshot, mask: np.ndarray) -> Dict[str, Any]:
+    """Inventory value at cost and at the effective price"""
+    stock = snapshot.stock[mask]
+    cost = snapshot.cost[mask]
+    retail = snapshot.effective[mask]
+    has_cost = ~np.isnan(cost)
+    return {
+        "stock_units": int(stock.sum()),
+        "cost_value": round(float((cost[has_cost] * stock[has_cost]).sum()), 2),
+        "retail_value": round(float((retail * stock).sum()), 2),
+        # Retail value of the stock that has a known cost, for margin math
+        "retail_value_with_cost": round(float((retail[has_cost] * stock[has_cost]).sum()), 2),
+        "products_without_cost": int((~has_cost).sum()),
+    }
+
+def margin_by_category(snapshot: CatalogSnapshot, mask: np.ndarray) -> List[Dict[str, Any]]:
+    """
+    Stock-weighted margin per category, over products with a cost price
+
+    margin = retail value - cost value of the stock on hand;
+    margin_percent is relative to the retail value.
+    """
+    mask = mask & ~np.isnan(snapshot.cost)
+    categories = snapshot.category_id[mask]
+    if categories.size == 0:
+        return []
+    stock = snapshot.stock[mask].astype(np.float64)
+    retail = snapshot.effective[mask] * stock
+    cost = snapshot.cost[mask] * stock
+
+    ids, index = np.unique(categories, return_inverse=True)
+    products = np.bincount(index, minlength=len(ids))
+    units = np.bincount(index, weights=stock, minlength=len(ids))
+    retail_value = np.bincount(index, weights=retail, minlength=len(ids))
+    cost_value = np.bincount(index, weights=cost, minlength=len(ids))
+    margin = retail_value - cost_value
+
+    results = []
+    for i, category_id in enumerate(ids.tolist()):
+        results.append({
+            "category_id": category_id,
+            "category": snapshot.category_names.get(category_id, f"#{category_id}"),
+            "products": int(products[i]),
+            "stock_units": int(units[i]),
+            "cost_value": round(float(cost_value[i]), 2),
+            "retail_value": round(float(retail_value[i]), 2),
+            "margin": round(float(margin[i]), 2),
+            "margin_percent": round(float(margin[i] / retail_value[i] * 100), 2) if retail_value[i] else None,
+        })
+    results.sort(key=lambda row: row["margin"], reverse=True)
+    return results
+
+def analyze(db: Session, price_field: str = "effective", buckets: int = 10,
+            edges: Optional[Sequence[float]] = None, scale: str = "linear",
+            probabilities: Sequence[float] = DEFAULT_QUANTILES,
+            status: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Price distribution, quantiles, inventory valuation and margins
+
+    Args:
+        db: Database session
+        price_field: effective, original or cost
+        buckets: Number of histogram buckets when edges is not given
+        edges: Explicit ascending bucket edges
+        scale: linear or log spacing for generated buckets
+        probabilities: Quantiles to report, each in [0, 1]
+        status: Only products with this status (all when None)
+
+    Returns:
+        Dict matching schemas.dashboard_schemas.PriceAnalyticsResponse
+    """
+    snapshot = get_snapshot(db)
+    key = (price_field, buckets, tuple(edges) if edges else None, scale, tuple(probabilities), status)
+    cached = snapshot.results.get(key)
+    if cached is not None:
+        return cached
+
+    mask = np.ones(snapshot.stock.shape, dtype=bool)
+    if status:
+        mask &= snapshot.status == status
+    prices = snapshot.prices(price_field)[mask]
+    prices = prices[~np.isnan(prices)]
+
+    bucket_bounds = np.asarray(edges, dtype=np.float64) if edges else bucket_edges(prices, buckets, scale)
+    in_range = (prices >= bucket_bounds[0]) & (prices <= bucket_bounds[-1])
+
+    result = {
+        "catalog_version": snapshot.version,
+        "price_field": price_field,
+        "products": int(mask.sum()),
+        "priced_products": int(prices.size),
+        "min_price": round(float(prices.min()), 2) if prices.size else None,
+        "max_price": round(float(prices.max()), 2) if prices.size else None,
+        "mean_price": round(float(prices.mean()), 2) if prices.size else None,
+        "out_of_range": int((~in_range).sum()),
+        "histogram": histogram(prices, bucket_bounds),
+        "quantiles": quantiles(prices, probabilities),
+        "valuation": valuation(snapshot, mask),
+        "margin_by_category": margin_by_category(snapshot, mask),
+    }
+    if len(snapshot.results) >= MAX_CACHED_RESULTS:
+        snapshot.results.clear()
+    snapshot.results[key] = result
+    return result
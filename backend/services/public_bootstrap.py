@@ -0,0 +1,131 @@
+"""
+Public Bootstrap Payload
+Gói dữ liệu khởi động cho website: cấu hình, liên hệ, SEO, giao diện và menu danh mục
+
+Everything the storefront needs before rendering its first page, built
+once per (settings.version, catalog.version) pair:
+
+    settings     public website settings by group (the system group is left out)
+    contact      contact details plus the quick-contact buttons to show
+    seo          site-wide SEO defaults
+    appearance   branding, colors, layout and custom code
+    categories   active category tree with active product counts
+
+The JSON body, its gzip encoding and a strong ETag for each of the two
+(the gzip one ends in -gz) are computed together when the versions change, so a request only does the version checks and
+either returns 304 or writes the prepared bytes.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models.product_models import Product, Category, ProductStatus
+from models.settings_models import SettingGroup
+from services.settings_cache import SettingsSnapshot, settings_cache
+from services.stat_counters import CATALOG_VERSION, read_counters
+
+# Columns of settings rows that only matter to the admin panel
+INTERNAL_COLUMNS = ("id", "created_at", "updated_at", "updated_by")
+
+CATEGORY_FIELDS = ("id", "name", "slug", "description", "image_url", "icon_class", "color", "is_featured")
+
+@dataclass(frozen=True)
+class BootstrapPayload:
+    versions: Tuple[int, int]
+    etag: str
+    gzip_etag: str
+    body: bytes
+    gzipped: bytes
+
+_payload: Optional[BootstrapPayload] = None
+_lock = threading.Lock()
+
+def _public_row(row: Optional[Mapping[str, Any]]) -> Optional[Dict[str, Any]]:
+    if row is None:
+        return None
+    return {key: value for key, value in row.items() if key not in INTERNAL_COLUMNS}
+
+def _contact(snapshot: SettingsSnapshot) -> Optional[Dict[str, Any]]:
+    contact = _public_row(snapshot.contact[0] if snapshot.contact else None)
+    if contact is None:
+        return None
+    zalo_url = contact["zalo_url"] or (f"https://zalo.me/{contact['zalo_phone']}" if contact["zalo_phone"] else None)
+    contact["buttons"] = {
+        "call": {
+            "enabled": bool(contact["show_call_button"]),
+            "phone": contact["call_button_phone"] or contact["primary_phone"],
+        },
+        "zalo": {"enabled": bool(contact["show_zalo_button"]), "url": zalo_url},
+        "facebook": {"enabled": bool(contact["show_facebook_button"]), "url": contact["facebook_url"]},
+    }
+    return contact
+
+def _category_tree(db: Session) -> List[Dict[str, Any]]:
+    counts = dict(db.query(Product.category_id, func.count(Product.id)).filter(
+        Product.status == ProductStatus.ACTIVE.value
+    ).group_by(Product.category_id).all())
+    categories = db.query(Category).filter(Category.is_active == True).order_by(
+        Category.sort_order, Category.name
+    ).all()
+
+    nodes = {}
+    for category in categories:
+        node = {field: getattr(category, field) for field in CATEGORY_FIELDS}
+        node["product_count"] = counts.get(category.id, 0)
+        node["children"] = []
+        nodes[category.id] = (category.parent_id, node)
+
+    roots = []
+    for parent_id, node in nodes.values():
+        parent = nodes.get(parent_id)
+        # Children of an inactive or missing parent are shown at the top level
+        (parent[1]["children"] if parent else roots).append(node)
+    return roots
+
+def _build(db: Session, snapshot: SettingsSnapshot, versions: Tuple[int, int]) -> BootstrapPayload:
+    settings_by_group: Dict[str, Dict[str, Any]] = {}
+    for key, row in snapshot.website.items():
+        if row["group"] != SettingGroup.SYSTEM.value:
+            settings_by_group.setdefault(row["group"], {})[key] = snapshot.value(key)
+
+    data = {
+        "versions": {"settings": versions[0], "catalog": versions[1]},
+        "settings": settings_by_group,
+        "contact": _contact(snapshot),
+        "seo": _public_row(snapshot.seo[0] if snapshot.seo else None),
+        "appearance": _public_row(snapshot.appearance[0] if snapshot.appearance else None),
+        "categories": _category_tree(db),
+    }
+    # Frozen snapshot values (mappings, tuples) serialize through default
+    body = json.dumps(
+        data, ensure_ascii=False, separators=(",", ":"),
+        default=lambda value: dict(value) if isinstance(value, Mapping) else str(value)
+    ).encode("utf-8")
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return BootstrapPayload(
+        versions=versions,
+        etag=f'"{digest}"',
+        gzip_etag=f'"{digest}-gz"',
+        body=body,
+        gzipped=gzip.compress(body, compresslevel=9, mtime=0),
+    )
+
+def get_payload(db: Session) -> BootstrapPayload:
+    """Current payload, rebuilt when settings or the catalog changed"""
+    global _payload
+    snapshot = settings_cache.get(db)
+    versions = (snapshot.version, read_counters(db, [CATALOG_VERSION])[CATALOG_VERSION])
+    payload = _payload
+    if payload is not None and payload.versions == versions:
+        return payload
+    with _lock:
+        if _payload is None or _payload.versions != versions:
+            _payload = _build(db, snapshot, versions)
+        return _payload
@@ -0,0 +1,116 @@
+"""
+Response Cache
+Cache kết quả dashboard trong thời gian ngắn, tránh tính lại đồng thời
+
+Entries are fresh for `ttl` seconds. After that they are served stale for
+up to `stale_ttl` more seconds while a single background recomputation
+runs. Only a miss with nothing usable waits for the computation. Every
+computation is single-flight: concurrent requests for the same key share
+one in-progress task, so a burst of dashboard refreshes runs the
+aggregate queries once.
+
+Computations are plain functions taking a Session. They run in a worker
+thread with their own session, so a slow aggregate never blocks the event
+loop and outlives any single request.
+
+At most max_entries keys are kept. Each insert first drops entries past
+their stale window, then the least recently used ones, so keys built from
+free-form parameters (dates) cannot grow the cache without bound.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """TTL cache with stale-while-revalidate and single-flight recomputation"""
+
+    def __init__(self, ttl: float, stale_ttl: float, max_entries: int = 256):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        # key -> (computed at, value), least recently used first
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[..., Any], *args) -> Any:
+        """
+        Return the cached value for key, computing it with compute(db, *args)
+
+        Args:
+            key: Cache key; include every argument that changes the result
+            compute: Function taking a Session followed by args
+            *args: Extra arguments for compute
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            age = time.monotonic() - entry[0]
+            if age < self.ttl:
+                self.hits += 1
+                return entry[1]
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._start(key, compute, args)
+                return entry[1]
+
+        self.misses += 1
+        # Shielded so a client disconnect does not cancel the shared computation
+        return await asyncio.shield(self._start(key, compute, args))
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry, or everything when key is None"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def _start(self, key: Hashable, compute: Callable[..., Any], args: tuple) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._compute(key, compute, args))
+            # Background refreshes may have no waiter; mark their errors as seen
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return task
+
+    async def _compute(self, key: Hashable, compute: Callable[..., Any], args: tuple) -> Any:
+        try:
+            value = await asyncio.to_thread(self._run, compute, args)
+            self._store(key, value)
+            return value
+        except Exception:
+            if key in self._entries:
+                # A stale value is still being served; keep it and report
+                logger.exception("Refreshing cached %s failed", key)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store(self, key: Hashable, value: Any):
+        now = time.monotonic()
+        expired = [k for k, (computed_at, _) in self._entries.items()
+                   if now - computed_at >= self.ttl + self.stale_ttl]
+        for k in expired:
+            del self._entries[k]
+        self._entries[key] = (now, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _run(compute: Callable[..., Any], args: tuple) -> Any:
+        db = SessionLocal()
+        try:
+            return compute(db, *args)
+        finally:
+            db.close()
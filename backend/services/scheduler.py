@@ -0,0 +1,93 @@
+"""
+Periodic Job Scheduler
+Chạy các tác vụ định kỳ (dọn log, đối soát số liệu...) trong nền
+
+Jobs are plain synchronous functions. Each one runs in a worker thread on
+its own interval so database work never blocks the event loop. The
+scheduler is started and stopped by the application lifespan.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class PeriodicJob:
+    """A named function with its interval and last-run bookkeeping"""
+
+    def __init__(self, name: str, func: Callable[[], object], interval_seconds: float,
+                 initial_delay: float = 0.0):
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.initial_delay = initial_delay
+        self.last_run: Optional[datetime] = None
+        self.last_result: object = None
+        self.last_error: Optional[str] = None
+        self.running = False
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "interval_seconds": self.interval_seconds,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "last_error": self.last_error,
+            "running": self.running
+        }
+
+class Scheduler:
+    """Runs registered jobs on asyncio tasks"""
+
+    def __init__(self):
+        self.jobs: Dict[str, PeriodicJob] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def add_job(self, name: str, func: Callable[[], object], interval_seconds: float,
+                initial_delay: float = 0.0) -> PeriodicJob:
+        """Register a job; takes effect on the next start()"""
+        job = PeriodicJob(name, func, interval_seconds, initial_delay)
+        self.jobs[name] = job
+        return job
+
+    def start(self):
+        """Start one task per registered job (must be called inside the event loop)"""
+        if self._tasks:
+            return
+        for job in self.jobs.values():
+            self._tasks.append(asyncio.create_task(self._loop(job), name=f"job:{job.name}"))
+
+    async def stop(self):
+        """Cancel all job tasks and wait for them to finish"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run_job(self, name: str) -> object:
+        """Run a job once, outside its schedule"""
+        return await self._run_once(self.jobs[name])
+
+    async def _loop(self, job: PeriodicJob):
+        if job.initial_delay:
+            await asyncio.sleep(job.initial_delay)
+        while True:
+            await self._run_once(job)
+            await asyncio.sleep(job.interval_seconds)
+
+    async def _run_once(self, job: PeriodicJob) -> object:
+        job.running = True
+        try:
+            job.last_result = await asyncio.to_thread(job.func)
+            job.last_error = None
+        except Exception as e:
+            job.last_error = str(e)
+            logger.exception("Scheduled job %s failed", job.name)
+        finally:
+            job.running = False
+            job.last_run = datetime.now(timezone.utc)
+        return job.last_result
+
+# Shared scheduler instance (started by main.lifespan)
+scheduler = Scheduler()
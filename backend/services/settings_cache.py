@@ -0,0 +1,151 @@
+"""
+Settings Cache
+Ảnh chụp (snapshot) bất biến của toàn bộ cấu hình website, dùng chung cho mọi nơi đọc
+
+All active website settings plus the contact, SEO and appearance rows are
+loaded into one immutable SettingsSnapshot. The snapshot is keyed by the
+settings.version row in stat_counters:
+
+- A before_flush listener bumps settings.version in the same transaction
+  as any ORM insert, update or delete of a settings row. That covers every
+  write path (single updates, resets, seeding). Set-based UPDATEs bypass
+  the flush and call record_change() themselves.
+- Readers call settings_cache.get(db). It compares the cached version with
+  the stored one at most every SETTINGS_VERSION_CHECK_SECONDS. That check is
+  a primary-key lookup, so other workers pick up changes without reloading
+  anything until the version actually moves. Commits in this process skip
+  the wait.
+
+Snapshot rows are read-only mappings of column values (JSON columns frozen
+into nested mappings and tuples). Build response models from them, never
+mutate them.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config import settings
+from models.settings_models import WebsiteSetting, ContactSetting, SeoSetting, AppearanceSetting
+from services.stat_counters import apply_deltas, read_counters
+
+SETTINGS_VERSION = "settings.version"
+SETTINGS_MODELS = (WebsiteSetting, ContactSetting, SeoSetting, AppearanceSetting)
+
+# Session.info key marking a transaction that changed settings
+_PENDING_KEY = "settings_changed"
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _row(obj) -> Mapping[str, Any]:
+    return MappingProxyType({
+        column.key: _freeze(getattr(obj, column.key)) for column in obj.__table__.columns
+    })
+
+@dataclass(frozen=True)
+class SettingsSnapshot:
+    """Every active setting at one settings version"""
+    version: int
+    # Active website settings by key, ordered by group, sort order and key
+    website: Mapping[str, Mapping[str, Any]]
+    contact: Tuple[Mapping[str, Any], ...]
+    seo: Tuple[Mapping[str, Any], ...]
+    appearance: Tuple[Mapping[str, Any], ...]
+
+    def value(self, key: str, default: Any = None) -> Any:
+        """Current value of a website setting (its default when unset)"""
+        row = self.website.get(key)
+        if row is None:
+            return default
+        return row["value"] if row["value"] is not None else row["default_value"]
+
+    def values(self, group: Optional[str] = None) -> Dict[str, Any]:
+        """Current values by key, optionally for one group"""
+        return {
+            key: self.value(key) for key, row in self.website.items()
+            if group is None or row["group"] == group
+        }
+
+    def group_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for row in self.website.values():
+            counts[row["group"]] = counts.get(row["group"], 0) + 1
+        return counts
+
+def _load(db: Session, version: int) -> SettingsSnapshot:
+    website = db.query(WebsiteSetting).filter(WebsiteSetting.is_active == True).order_by(
+        WebsiteSetting.group, WebsiteSetting.sort_order, WebsiteSetting.key
+    ).all()
+    return SettingsSnapshot(
+        version=version,
+        website=MappingProxyType({setting.key: _row(setting) for setting in website}),
+        contact=tuple(_row(row) for row in db.query(ContactSetting).order_by(ContactSetting.id)),
+        seo=tuple(_row(row) for row in db.query(SeoSetting).order_by(SeoSetting.id)),
+        appearance=tuple(_row(row) for row in db.query(AppearanceSetting).order_by(AppearanceSetting.id)),
+    )
+
+class SettingsCache:
+    """Holds the current snapshot and reloads it when settings.version moves"""
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self._snapshot: Optional[SettingsSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self, db: Session) -> SettingsSnapshot:
+        """Current snapshot (db is only used for the version check or a reload)"""
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - self._checked_at < self.check_interval:
+            return snapshot
+
+        version = read_counters(db, [SETTINGS_VERSION])[SETTINGS_VERSION]
+        self._checked_at = now
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version != version:
+                self._snapshot = _load(db, version)
+                self.loads += 1
+            return self._snapshot
+
+    def invalidate(self):
+        """Check the version on the next get()"""
+        self._checked_at = 0.0
+
+# Shared cache instance
+settings_cache = SettingsCache(settings.SETTINGS_VERSION_CHECK_SECONDS)
+
+def record_change(session: Session):
+    """Bump settings.version in the session's transaction (for writes that skip the ORM flush)"""
+    apply_deltas(session.connection(), {SETTINGS_VERSION: 1})
+    session.info[_PENDING_KEY] = True
+
+@event.listens_for(Session, "before_flush")
+def _bump_version(session: Session, flush_context, instances):
+    changed = any(isinstance(obj, SETTINGS_MODELS) for obj in session.new | session.deleted) or any(
+        isinstance(obj, SETTINGS_MODELS) and session.is_modified(obj) for obj in session.dirty
+    )
+    if changed:
+        record_change(session)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session):
+    if session.info.pop(_PENDING_KEY, False):
+        settings_cache.invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,231 @@
+"""
+Dashboard Stat Counters
+Bộ đếm số liệu dashboard được cập nhật cùng transaction với mỗi thay đổi
+
+stat_counters holds one row per named counter:
+
+    products.total, products.status.<status>, products.featured, products.low_stock
+    users.total, users.status.<status>
+    categories.total, categories.active
+
+plus catalog.version, which is not a count: it goes up by one in every
+flush that changes a product or category field used by the price
+analytics or the storefront category menu (services.price_analytics,
+services.public_bootstrap), so caches of the catalog can be keyed on it. Other modules keep their own *.version stamps in the same table
+(settings.version, see services.settings_cache); reconcile() leaves every
+*.version row alone. counters.version goes up in every flush that changes
+a counter and is read back inside the same transaction.
+
+A before_flush listener on every Session computes the counter deltas of
+the Product, User and Category rows being inserted, updated or deleted
+and applies them in the same flush. Every ORM write path (products, users,
+auth register/approve, ...) is therefore counted in its own transaction
+without per-endpoint bookkeeping. Bulk query.update()/delete() and writes
+from other processes bypass the listener; reconcile() recomputes all
+counters from the tables and corrects any drift.
+
+Once a transaction commits, its deltas are published on the event bus as a
+"counters" event for live dashboards, stamped with that counters.version. A
+reader of read_counters() skips the events its snapshot already includes.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, upsert_insert
+from models.user_models import User, UserStatus
+from models.product_models import Product, Category, ProductStatus
+from models.stats_models import StatCounter
+from services import stats_service
+from services.event_bus import event_bus
+
+# Session.info keys holding deltas (and the counters.version they reached)
+# of the open transaction until it commits
+_PENDING_KEY = "stat_counter_deltas"
+_VERSION_KEY = "stat_counter_version"
+
+def _value(obj, attr: str, old: bool = False):
+    """Current (or pre-change) attribute value, falling back to the column default"""
+    state = inspect(obj)
+    value = getattr(obj, attr)
+    if old:
+        history = state.attrs[attr].history
+        if history.deleted:
+            value = history.deleted[0]
+    if value is None:
+        default = obj.__table__.columns[attr].default
+        if default is not None and default.is_scalar:
+            value = default.arg
+    return value
+
+def _product_keys(obj, old: bool = False) -> List[str]:
+    keys = ["products.total", f"products.status.{_value(obj, 'status', old)}"]
+    if _value(obj, "is_featured", old):
+        keys.append("products.featured")
+    stock = _value(obj, "stock_quantity", old)
+    if stock is not None and stock <= stats_service.LOW_STOCK_THRESHOLD:
+        keys.append("products.low_stock")
+    return keys
+
+def _user_keys(obj, old: bool = False) -> List[str]:
+    return ["users.total", f"users.status.{_value(obj, 'status', old)}"]
+
+def _category_keys(obj, old: bool = False) -> List[str]:
+    keys = ["categories.total"]
+    if _value(obj, "is_active", old):
+        keys.append("categories.active")
+    return keys
+
+COUNTED_MODELS = {
+    Product: _product_keys,
+    User: _user_keys,
+    Category: _category_keys,
+}
+
+CATALOG_VERSION = "catalog.version"
+COUNTERS_VERSION = "counters.version"
+
+# Fields whose changes invalidate catalog snapshots
+CATALOG_FIELDS = {
+    Product: ("original_price", "sale_price", "cost_price", "stock_quantity", "status", "category_id"),
+    Category: ("name", "slug", "description", "parent_id", "sort_order", "is_active",
+               "image_url", "icon_class", "color", "is_featured"),
+}
+
+def _catalog_changed(session: Session) -> bool:
+    for obj in session.new | session.deleted:
+        if type(obj) in CATALOG_FIELDS:
+            return True
+    for obj in session.dirty:
+        fields = CATALOG_FIELDS.get(type(obj))
+        if fields:
+            attrs = inspect(obj).attrs
+            if any(attrs[field].history.has_changes() for field in fields):
+                return True
+    return False
+
+def _collect_deltas(session: Session) -> Dict[str, int]:
+    deltas: Dict[str, int] = defaultdict(int)
+    for obj in session.new:
+        keys_for = COUNTED_MODELS.get(type(obj))
+        if keys_for:
+            for key in keys_for(obj):
+                deltas[key] += 1
+    for obj in session.deleted:
+        keys_for = COUNTED_MODELS.get(type(obj))
+        if keys_for:
+            for key in keys_for(obj, old=True):
+                deltas[key] -= 1
+    for obj in session.dirty:
+        keys_for = COUNTED_MODELS.get(type(obj))
+        if keys_for and session.is_modified(obj):
+            for key in keys_for(obj, old=True):
+                deltas[key] -= 1
+            for key in keys_for(obj):
+                deltas[key] += 1
+    if _catalog_changed(session):
+        deltas[CATALOG_VERSION] += 1
+    return {key: delta for key, delta in deltas.items() if delta}
+
+def apply_deltas(connection, deltas: Dict[str, int]):
+    """Add deltas to counters on the given connection (creates missing rows)"""
+    table = StatCounter.__table__
+    for name, delta in sorted(deltas.items()):
+        stmt = upsert_insert(table).values(name=name, value=delta)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=["name"],
+            set_={"value": table.c.value + stmt.excluded.value}
+        ))
+
+def _bump_version(connection) -> int:
+    """Increment counters.version and return the new value (row stays locked until commit)"""
+    apply_deltas(connection, {COUNTERS_VERSION: 1})
+    table = StatCounter.__table__
+    return connection.execute(select(table.c.value).where(table.c.name == COUNTERS_VERSION)).scalar_one()
+
+@event.listens_for(Session, "before_flush")
+def _count_changes(session: Session, flush_context, instances):
+    deltas = _collect_deltas(session)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+        session.info[_VERSION_KEY] = _bump_version(session.connection())
+        pending = session.info.setdefault(_PENDING_KEY, defaultdict(int))
+        for name, delta in deltas.items():
+            pending[name] += delta
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session: Session):
+    deltas = session.info.pop(_PENDING_KEY, None)
+    version = session.info.pop(_VERSION_KEY, None)
+    if deltas:
+        deltas = {name: delta for name, delta in deltas.items() if delta}
+        if deltas:
+            event_bus.publish("counters", deltas, version=version)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_VERSION_KEY, None)
+
+def read_counters(db: Session, names: Iterable[str] = None) -> Dict[str, int]:
+    """Counter values by name (missing counters read as 0 when named)"""
+    query = db.query(StatCounter.name, StatCounter.value)
+    if names is not None:
+        names = list(names)
+        query = query.filter(StatCounter.name.in_(names))
+        values = dict.fromkeys(names, 0)
+    else:
+        values = {}
+    values.update({name: value for name, value in query.all()})
+    return values
+
+def compute_counters(db: Session) -> Dict[str, int]:
+    """All counters recomputed from the tables"""
+    products = stats_service.product_counts(db)
+    users = stats_service.user_counts(db)
+    categories = stats_service.category_counts(db)
+
+    counters = {
+        "products.total": products["total"],
+        "products.featured": products["featured"],
+        "products.low_stock": products["low_stock"],
+        "users.total": users["total"],
+        "categories.total": categories["total"],
+        "categories.active": categories["active"],
+    }
+    for status in ProductStatus:
+        counters[f"products.status.{status.value}"] = products[status.value]
+    for status in UserStatus:
+        counters[f"users.status.{status.value}"] = users[status.value]
+    return counters
+
+def reconcile() -> Dict[str, int]:
+    """
+    Recompute every counter from scratch and store the result
+
+    Returns:
+        Counters that had drifted, as name -> correction applied
+    """
+    db = SessionLocal()
+    try:
+        expected = compute_counters(db)
+        current = read_counters(db)
+        drift = {name: value - current.get(name, 0) for name, value in expected.items()
+                 if value != current.get(name, 0)}
+        # Counters for values that no longer exist (e.g. an unknown status)
+        drift.update({name: -value for name, value in current.items()
+                      if name not in expected and value and not name.endswith(".version")})
+        if drift:
+            # Catalog rows changed behind the ORM's back
+            if any(not name.startswith("users.") for name in drift):
+                drift[CATALOG_VERSION] = 1
+            apply_deltas(db.connection(), drift)
+            version = _bump_version(db.connection())
+            db.commit()
+            event_bus.publish("counters", drift, version=version)
+        return drift
+    finally:
+        db.close()
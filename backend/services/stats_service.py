@@ -0,0 +1,111 @@
+"""
+Dashboard Statistics Service
+Đếm số liệu người dùng / sản phẩm / danh mục bằng một câu truy vấn mỗi bảng
+
+Every status and flag count of a table is computed in a single scan with
+SUM(CASE ...) instead of one COUNT query per filter. The dashboard, users
+and products endpoints share these helpers so their numbers always agree.
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from models.user_models import User, Role, UserStatus
+from models.product_models import Product, Category, ProductStatus
+
+# Products at or below this stock quantity count as low stock
+LOW_STOCK_THRESHOLD = 5
+
+# Effective selling price: sale price when set, otherwise the original price
+effective_price = func.coalesce(Product.sale_price, Product.original_price)
+
+# (label, lower bound inclusive, upper bound exclusive) in VND
+PRICE_RANGES = [
+    ("Under 500K", None, 500000),
+    ("500K - 1M", 500000, 1000000),
+    ("1M - 2M", 1000000, 2000000),
+    ("Over 2M", 2000000, None),
+]
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+def user_counts(db: Session, since: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    User counts by status in one query
+
+    Returns:
+        Dict with total, active, pending, suspended, banned and, when since
+        is given, new (registered at or after since)
+    """
+    columns = [
+        func.count(User.id).label("total"),
+        _count_if(User.status == UserStatus.ACTIVE.value).label("active"),
+        _count_if(User.status == UserStatus.PENDING.value).label("pending"),
+        _count_if(User.status == UserStatus.SUSPENDED.value).label("suspended"),
+        _count_if(User.status == UserStatus.BANNED.value).label("banned"),
+    ]
+    if since is not None:
+        columns.append(_count_if(User.created_at >= since).label("new"))
+    return {key: int(value) for key, value in db.query(*columns).one()._mapping.items()}
+
+def product_counts(db: Session, since: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Product counts by status and flag in one query
+
+    Returns:
+        Dict with total, active, draft, inactive, out_of_stock, featured,
+        low_stock and, when since is given, new (created at or after since)
+    """
+    columns = [
+        func.count(Product.id).label("total"),
+        _count_if(Product.status == ProductStatus.ACTIVE.value).label("active"),
+        _count_if(Product.status == ProductStatus.DRAFT.value).label("draft"),
+        _count_if(Product.status == ProductStatus.INACTIVE.value).label("inactive"),
+        _count_if(Product.status == ProductStatus.OUT_OF_STOCK.value).label("out_of_stock"),
+        _count_if(Product.is_featured == True).label("featured"),
+        _count_if(Product.stock_quantity <= LOW_STOCK_THRESHOLD).label("low_stock"),
+    ]
+    if since is not None:
+        columns.append(_count_if(Product.created_at >= since).label("new"))
+    return {key: int(value) for key, value in db.query(*columns).one()._mapping.items()}
+
+def category_counts(db: Session) -> Dict[str, int]:
+    """Category total and active count in one query"""
+    row = db.query(
+        func.count(Category.id).label("total"),
+        _count_if(Category.is_active == True).label("active"),
+    ).one()
+    return {key: int(value) for key, value in row._mapping.items()}
+
+def price_range_counts(db: Session) -> Dict[str, int]:
+    """Products per PRICE_RANGES bucket of the effective price, in one query"""
+    columns = []
+    for label, low, high in PRICE_RANGES:
+        condition = effective_price.isnot(None)
+        if low is not None:
+            condition = condition & (effective_price >= low)
+        if high is not None:
+            condition = condition & (effective_price < high)
+        columns.append(_count_if(condition))
+    row = db.query(*columns).one()
+    return {label: int(count) for (label, _, _), count in zip(PRICE_RANGES, row)}
+
+def role_distribution(db: Session) -> Dict[str, int]:
+    """Users per role display name"""
+    rows = db.query(
+        Role.display_name,
+        func.count(User.id).label('count')
+    ).join(User).group_by(Role.id, Role.display_name).all()
+    return {role: count for role, count in rows}
+
+def category_distribution(db: Session) -> Dict[str, int]:
+    """Products per category name"""
+    rows = db.query(
+        Category.name,
+        func.count(Product.id).label('count')
+    ).join(Product).group_by(Category.id, Category.name).all()
+    return {category: count for category, count in rows}
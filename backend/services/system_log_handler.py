@@ -0,0 +1,202 @@
+"""
+System Log Handler
+Ghi log lỗi vào bảng system_logs theo lô, gộp các lỗi lặp lại
+
+Application code logs through the standard logging module. The root logger
+gets a QueueHandler, so a log call only puts the record on an in-memory
+queue and never touches the database on the request path. A QueueListener
+thread hands the records to:
+
+- a console StreamHandler, so messages still show up in the server output
+- SystemLogHandler, which writes WARNING and above to system_logs
+
+SystemLogHandler collapses identical records (same logger, source line,
+message and exception type) seen within SYSTEM_LOG_DEDUPE_SECONDS into one
+row. The row's context holds count, first_seen and last_seen. Finished rows
+are inserted by a background thread with one executemany per flush.
+"""
+
+import copy
+import logging
+import logging.handlers
+import queue
+import socket
+import threading
+import traceback
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from config import settings
+from database import engine
+from models.audit_models import SystemLog
+
+# Reserved LogRecord attributes; anything else passed via extra= goes into context
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+class SystemLogHandler(logging.Handler):
+    """Deduplicating, batch-writing handler for the system_logs table"""
+    
+    def __init__(self, level: int = logging.WARNING, dedupe_seconds: float = 60.0,
+                 flush_interval: float = 1.0, max_pending: int = 1000):
+        super().__init__(level)
+        self.dedupe_seconds = dedupe_seconds
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.server_name = socket.gethostname()[:100]
+        self._pending: Dict[Tuple, Dict[str, Any]] = {}
+        self._pending_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Start the background flush thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="system-log-writer", daemon=True)
+        self._thread.start()
+    
+    def close(self):
+        """Stop the flush thread and write everything still pending"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5.0)
+            self._thread = None
+        self.flush_pending(force=True)
+        super().close()
+    
+    def emit(self, record: logging.LogRecord):
+        try:
+            now = datetime.fromtimestamp(record.created, timezone.utc)
+            exc_type = record.exc_info[0].__name__ if record.exc_info and record.exc_info[0] else None
+            message = record.getMessage()
+            key = (record.name, record.levelno, record.pathname, record.lineno, message, exc_type)
+            
+            with self._pending_lock:
+                row = self._pending.get(key)
+                if row is not None:
+                    row["context"]["count"] += 1
+                    row["context"]["last_seen"] = now.isoformat()
+                    return
+                self._pending[key] = self._build_row(record, message, exc_type, now)
+                full = len(self._pending) >= self.max_pending
+            if full:
+                self.flush_pending(force=True)
+        except Exception:
+            self.handleError(record)
+    
+    def _build_row(self, record: logging.LogRecord, message: str,
+                   exc_type: Optional[str], now: datetime) -> Dict[str, Any]:
+        extra = {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS}
+        context = {k: (v if isinstance(v, (str, int, float, bool, type(None))) else repr(v))
+                   for k, v in extra.items()}
+        context.update(count=1, first_seen=now.isoformat(), last_seen=now.isoformat())
+        
+        exc_message = stack_trace = None
+        if record.exc_info and record.exc_info[1] is not None:
+            exc_message = str(record.exc_info[1])
+            stack_trace = "".join(traceback.format_exception(*record.exc_info))
+        
+        return {
+            "level": record.levelname.lower(),
+            "message": message,
+            "logger_name": record.name[:100],
+            "module": record.module[:100],
+            "function": (record.funcName or "")[:100],
+            "line_number": record.lineno,
+            "context": context,
+            "exception_type": exc_type,
+            "exception_message": exc_message,
+            "stack_trace": stack_trace,
+            "server_name": self.server_name,
+            "process_id": record.process,
+            "thread_id": str(record.thread),
+            "created_at": now,
+        }
+    
+    def flush_pending(self, force: bool = False):
+        """Insert rows whose dedupe window has closed (all rows if force)"""
+        cutoff = datetime.now(timezone.utc).timestamp() - self.dedupe_seconds
+        with self._pending_lock:
+            ready = [key for key, row in self._pending.items()
+                     if force or row["created_at"].timestamp() <= cutoff]
+            rows = [self._pending.pop(key) for key in ready]
+        if not rows:
+            return
+        try:
+            with engine.begin() as conn:
+                conn.execute(SystemLog.__table__.insert(), rows)
+        except Exception as e:
+            # Never log from here: it would feed straight back into this handler
+            print(f"❌ Failed to write {len(rows)} system log rows: {e}")
+    
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush_pending()
+
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler for an in-process queue
+    
+    The stock prepare() folds the traceback into the message and drops
+    exc_info so records can be pickled. Records never leave this process,
+    so only the message arguments are frozen and exc_info is kept for
+    SystemLogHandler.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[LocalQueueHandler] = None
+
+def install_system_logging() -> LocalQueueHandler:
+    """
+    Attach the non-blocking QueueHandler to the root logger
+    
+    Records logged before start_system_logging() wait on the queue.
+    """
+    global _queue_handler
+    if _queue_handler is None:
+        _queue_handler = LocalQueueHandler(queue.Queue(-1))
+        logging.getLogger().addHandler(_queue_handler)
+    return _queue_handler
+
+def start_system_logging():
+    """Start the listener thread that writes queued records"""
+    global _listener
+    if _listener is not None:
+        return
+    queue_handler = install_system_logging()
+    
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter("%(levelname)s [%(name)s] %(message)s"))
+    
+    db_handler = SystemLogHandler(
+        level=getattr(logging, settings.SYSTEM_LOG_LEVEL.upper(), logging.WARNING),
+        dedupe_seconds=settings.SYSTEM_LOG_DEDUPE_SECONDS,
+        flush_interval=settings.SYSTEM_LOG_FLUSH_INTERVAL_MS / 1000.0
+    )
+    db_handler.start()
+    
+    _listener = logging.handlers.QueueListener(
+        queue_handler.queue, console, db_handler, respect_handler_level=True
+    )
+    _listener.start()
+
+def queue_depth() -> int:
+    """Records waiting for the listener thread"""
+    return _queue_handler.queue.qsize() if _queue_handler is not None else 0
+
+def stop_system_logging():
+    """Drain the queue and write pending rows"""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
@@ -0,0 +1,136 @@
+"""
+Image Variant Cache
+Bộ nhớ đệm trên đĩa cho ảnh resize theo yêu cầu, giới hạn dung lượng theo LRU
+
+Files live flat under IMAGE_VARIANT_CACHE_DIR, named by a key the caller
+derives from the source file and the variant parameters. The cache tracks
+every file's size in recency order:
+
+- A hit moves the entry to the end and refreshes the file's mtime, so
+  the order survives a restart (the directory is rescanned by mtime on
+  first use).
+- A miss builds the file through the caller's coroutine. Concurrent
+  misses for the same key wait on the first build instead of starting
+  their own.
+- After each build, least recently used files are deleted until the
+  total is back under IMAGE_VARIANT_CACHE_BYTES.
+
+State is per process. With several server processes each one keeps its
+own LRU over the shared directory; builds write under a temp name and
+rename, so they never expose partial files to each other.
+"""
+
+import asyncio
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from config import settings
+
+class VariantCache:
+    """Byte-budgeted LRU of generated files with request coalescing"""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        # file name -> size in bytes, least recently used first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._loaded = False
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _load(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        files = []
+        for path in self.root.iterdir():
+            if path.name.startswith("."):
+                # Temp file of a build interrupted by a restart
+                path.unlink(missing_ok=True)
+                continue
+            stat = path.stat()
+            files.append((stat.st_mtime, path.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self.total_bytes += size
+        self._loaded = True
+        self._evict()
+
+    def _evict(self, keep: Optional[str] = None):
+        while self.total_bytes > self.max_bytes and self._entries:
+            name, size = next(iter(self._entries.items()))
+            if name == keep:
+                break
+            del self._entries[name]
+            self.total_bytes -= size
+            (self.root / name).unlink(missing_ok=True)
+            self.evictions += 1
+
+    def _add(self, name: str, size: int):
+        self.total_bytes += size - self._entries.pop(name, 0)
+        self._entries[name] = size
+        self._evict(keep=name)
+
+    async def get(self, key: str, build: Callable[[Path], Awaitable[Any]]) -> Path:
+        """
+        Path of the cached file for key, calling build(path) to create it on a miss
+
+        build must write the file at the given path. Its exceptions reach
+        every caller waiting on that key.
+        """
+        if not self._loaded:
+            self._load()
+        path = self.root / key
+
+        if key in self._entries:
+            try:
+                os.utime(path)
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return path
+            except FileNotFoundError:
+                # Deleted behind our back (another process evicted it)
+                self.total_bytes -= self._entries.pop(key)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            await asyncio.shield(inflight)
+            return path
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.misses += 1
+        try:
+            await build(path)
+            self._add(key, path.stat().st_size)
+            future.set_result(path)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark retrieved: waiters re-raise it, but there may be none
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+        return path
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "files": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+        }
+
+# Shared cache instance
+variant_cache = VariantCache(settings.IMAGE_VARIANT_CACHE_DIR, settings.IMAGE_VARIANT_CACHE_BYTES)
@@ -0,0 +1,63 @@
+"""
+Test Buffered Audit Writer
+Kiểm tra ghi audit log theo lô với các dòng có tập cột khác nhau
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, select
+
+from models.user_models import User
+from models.audit_models import AuditLog
+from services import audit_writer as audit_writer_module
+from services.audit_writer import BufferedWriter
+
+def _write_batch(tmp_path, monkeypatch, rows):
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    User.metadata.create_all(engine, tables=[User.__table__, AuditLog.__table__])
+    monkeypatch.setattr(audit_writer_module, "engine", engine)
+    
+    writer = BufferedWriter()
+    writer._flush([(AuditLog.__table__, row) for row in rows])
+    with engine.connect() as conn:
+        written = conn.execute(
+            select(AuditLog.action, AuditLog.tags, AuditLog.method, AuditLog.duration_ms).order_by(AuditLog.id)
+        ).all()
+    return writer, written
+
+def _mixed_rows():
+    plain = AuditLog.build_row(action="plain", resource="test")
+    tagged = AuditLog.build_row(action="tagged", resource="test", notes="hello")
+    # Stamped by middleware.request_timing after the response was sent
+    in_request = AuditLog.build_row(action="in_request", resource="test")
+    in_request.update(method="POST", endpoint="/api/v1/products/", response_status=200, duration_ms=12)
+    # Row built by hand with only some of the columns
+    partial = {"action": "partial", "resource": "test", "level": "info"}
+    return plain, tagged, in_request, partial
+
+def test_mixed_row_shapes_untagged_first(tmp_path, monkeypatch):
+    plain, tagged, in_request, partial = _mixed_rows()
+    writer, written = _write_batch(tmp_path, monkeypatch, [plain, tagged, in_request, partial, AuditLog.build_row(action="last", resource="test")])
+    
+    assert writer.rows_written == 5
+    assert writer.rows_dropped == 0
+    by_action = {action: (tags, method, duration_ms) for action, tags, method, duration_ms in written}
+    assert by_action["tagged"] == ({"notes": "hello"}, None, None)
+    assert by_action["in_request"] == (None, "POST", 12)
+    assert by_action["plain"] == (None, None, None)
+    assert "partial" in by_action
+
+def test_mixed_row_shapes_tagged_first(tmp_path, monkeypatch):
+    plain, tagged, in_request, partial = _mixed_rows()
+    writer, written = _write_batch(tmp_path, monkeypatch, [tagged, plain, partial, in_request])
+    
+    assert writer.rows_written == 4
+    assert writer.rows_dropped == 0
+    assert {action for action, _, _, _ in written} == {"tagged", "plain", "partial", "in_request"}
+
+def test_build_row_has_every_column():
+    columns = {column.name for column in AuditLog.__table__.columns if not column.primary_key}
+    assert set(AuditLog.build_row(action="a", resource="test")) == columns
+    assert set(AuditLog.build_row(action="a", resource="test", notes="x")) == columns
@@ -55,6 +55,9 @@ export interface Product {
   rating_average: number;
   rating_count: number;
   main_image_url?: string;
+  main_image_width?: number;
+  main_image_height?: number;
+  main_image_placeholder?: string; // base64 data URI, paint blurred until the image loads
   created_at: string;
   updated_at: string;
   
@@ -92,7 +95,37 @@ export interface Category {
   products: Product[];
 }
 
+export interface BootstrapCategory {
+  id: number;
+  name: string;
+  slug: string;
+  description: string | null;
+  image_url: string | null;
+  icon_class: string | null;
+  color: string | null;
+  is_featured: boolean;
+  product_count: number;
+  children: BootstrapCategory[];
+}
+
+export interface SiteBootstrap {
+  versions: { settings: number; catalog: number };
+  settings: Record<string, Record<string, string | null>>;
+  contact: Record<string, any> | null;
+  seo: Record<string, any> | null;
+  appearance: Record<string, any> | null;
+  categories: BootstrapCategory[];
+}
+
 export const apiService = {
+  // Lấy cấu hình, liên hệ, SEO, giao diện và menu danh mục trong một request
+  // (trình duyệt tự gửi If-None-Match và nhận gzip)
+  async getBootstrap(): Promise<SiteBootstrap> {
+    const response = await api.get('/api/v1/public/bootstrap');
+    return response.data;
+  },
+
+
   // Lấy tất cả sản phẩm
   async getProducts(): Promise<Product[]> {
     const response = await api.get('/api/products');
@@ -192,6 +225,6 @@ export const apiService = {
 };
 
 // Export individual functions for easier import
-export const { getProducts, getProduct, getProductById, getCategories, getCategory, searchProducts } = apiService;
+export const { getBootstrap, getProducts, getProduct, getProductById, getCategories, getCategory, searchProducts } = apiService;
 
 export default apiService;
\ No newline at end of file